@@ -0,0 +1,480 @@
+"""
+Local stand-ins for every external service the pipeline talks to.
+
+Each fake takes a `LatencyProfile` so benchmarks can model slow or flaky upstreams:
+- FakeTranscriber: drop-in for `assemblyai.Transcriber`
+- FakeLLMClient: Gemini-shaped (`models.generate_content`) and OpenAI/Groq-shaped
+  (`chat.completions.create`) clients
+- FakeBibleServer: a real HTTP server speaking the bible-api.com protocol
+- FakeBatchServer: a real HTTP server speaking the OpenAI Batch and Gemini batch-mode
+  protocols (files, job creation, polling, results)
+- FakeYoutubeDL: drop-in for `yt_dlp.YoutubeDL`
+"""
+import itertools
+import json
+import os
+import random
+import re
+import shutil
+import threading
+import time
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, Optional
+from urllib.parse import unquote, urlparse
+
+import assemblyai as aai
+
+from benchmarks.synthetic import CITED_REFERENCES, transcript_sidecar, wav_duration
+
+
+class InjectedFailure(Exception):
+    """Raised by a fake when failure injection fires."""
+
+
+class LatencyProfile:
+    """
+    Latency model for one fake service: `base_s` per call, plus `per_unit_s` per unit of
+    work (bytes, tokens...), with +/- `jitter` (fraction) and a `failure_rate` in [0, 1].
+    """
+
+    def __init__(self, base_s: float = 0.0, per_unit_s: float = 0.0, jitter: float = 0.1,
+                 failure_rate: float = 0.0, seed: int = 0):
+        self.base_s = base_s
+        self.per_unit_s = per_unit_s
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def scaled(self, factor: float) -> "LatencyProfile":
+        return LatencyProfile(self.base_s * factor, self.per_unit_s * factor, self.jitter, self.failure_rate)
+
+    def apply(self, units: float = 0, what: str = "call"):
+        with self._lock:
+            roll = self._rng.random()
+            noise = 1 + self._rng.uniform(-self.jitter, self.jitter)
+        delay = (self.base_s + self.per_unit_s * units) * noise
+        if delay > 0:
+            time.sleep(delay)
+        if roll < self.failure_rate:
+            raise InjectedFailure(f"Injected failure in {what}")
+
+
+# Rough per-provider behaviour: (base latency, seconds per output token)
+PROVIDER_LATENCY = {
+    "gemini": LatencyProfile(base_s=0.08, per_unit_s=0.00002),
+    "openai": LatencyProfile(base_s=0.12, per_unit_s=0.00003),
+    "groq": LatencyProfile(base_s=0.03, per_unit_s=0.00001),
+    "openrouter": LatencyProfile(base_s=0.15, per_unit_s=0.00003),
+}
+
+
+# --- AssemblyAI ---------------------------------------------------------------
+
+class FakeTranscriber:
+    """
+    Mimics `aai.Transcriber`. Upload cost scales with file size, transcription cost
+    with audio duration. The text comes from the synthetic `.transcript.txt` sidecar.
+    """
+
+    upload_latency = LatencyProfile(base_s=0.01, per_unit_s=1e-9)     # per byte
+    transcribe_latency = LatencyProfile(base_s=0.02, per_unit_s=1e-5)  # per audio second
+
+    def __init__(self, *args, **kwargs):
+        self._uploads: Dict[str, str] = {}
+
+    def upload_file(self, data) -> str:
+        path = data if isinstance(data, str) else getattr(data, "name", "stream")
+        size = 0
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    break
+                size += len(chunk)
+        self.upload_latency.apply(size, "upload")
+        url = f"fake://upload/{len(self._uploads)}"
+        self._uploads[url] = path
+        return url
+
+    def transcribe(self, data, config=None):
+        path = self._uploads.get(data, data)
+        duration = wav_duration(path) if path.endswith(".wav") else 0
+        self.transcribe_latency.apply(duration, "transcribe")
+        with open(transcript_sidecar(path), encoding="utf-8") as f:
+            text = f.read()
+        return SimpleNamespace(
+            id=f"fake-{os.path.basename(path)}",
+            status=aai.TranscriptStatus.completed,
+            text=text,
+            error=None,
+            audio_duration=duration,
+            words=[],
+        )
+
+
+# --- LLM providers ------------------------------------------------------------
+
+def fake_guide(seed: int = 0, days: int = 6) -> Dict:
+    rng = random.Random(seed)
+    refs = rng.sample(CITED_REFERENCES, days + 1)
+    reflection = " ".join(["We must renew our minds daily and trust the Lord."] * 25)
+    return {
+        "series_title": "Benchmark Series",
+        "memory_verse_reference": refs[0],
+        "days": [
+            {
+                "day": i + 1,
+                "title": f"Benchmark Series: Point {i + 1}",
+                "scripture_reference": refs[i + 1],
+                "reflection": reflection,
+                "question": "What will you change this week?",
+                "prayer": "Lord, help me to walk in Your truth today. Amen.",
+            }
+            for i in range(days)
+        ],
+        "key_quotes": ["Strong minds unleash potential.", "Renew your mind daily.", "God is faithful."],
+    }
+
+
+class FakeLLMClient:
+    """
+    One client object exposing both the Gemini and the OpenAI-compatible call shapes.
+    Gemini context caches (`caches.create`) and OpenAI-style automatic prefix caching are
+    modelled by reporting the cached system prompt as cached input tokens.
+    """
+
+    def __init__(self, provider: str = "gemini", latency: Optional[LatencyProfile] = None):
+        self.provider = provider
+        self.latency = latency or PROVIDER_LATENCY.get(provider, LatencyProfile())
+        self.calls = 0
+        self._cached: Dict[str, str] = {}      # cache name -> system instruction
+        self._prefixes = set()                 # system prompts seen (automatic prefix cache)
+        self.models = SimpleNamespace(generate_content=self._gemini_generate)
+        self.caches = SimpleNamespace(create=self._gemini_cache_create)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._openai_create))
+
+    def _respond(self, prompt_chars: int, cached_chars: int = 0):
+        self.calls += 1
+        body = json.dumps(fake_guide(seed=self.calls))
+        input_tokens = prompt_chars // 4
+        output_tokens = len(body) // 4
+        # Cached input is processed at a fraction of the cost
+        uncached_tokens = input_tokens - cached_chars // 4
+        self.latency.apply(uncached_tokens * 0.1 + (input_tokens - uncached_tokens) * 0.01 + output_tokens,
+                           f"{self.provider} generate")
+        return body, input_tokens, output_tokens
+
+    def _gemini_cache_create(self, model: str, config=None):
+        name = f"cachedContents/fake-{len(self._cached)}"
+        self._cached[name] = str(getattr(config, "system_instruction", "") or "")
+        return SimpleNamespace(name=name, model=model)
+
+    def _gemini_generate(self, model: str, contents, config=None):
+        cached = self._cached.get(getattr(config, "cached_content", None), "")
+        system = cached or str(getattr(config, "system_instruction", None) or "")
+        body, input_tokens, output_tokens = self._respond(len(system) + len(str(contents)), len(cached))
+        usage = SimpleNamespace(prompt_token_count=input_tokens, candidates_token_count=output_tokens,
+                                cached_content_token_count=len(cached) // 4 or None)
+        return SimpleNamespace(text=body, usage_metadata=usage)
+
+    def _openai_create(self, model: str, messages, **kwargs):
+        system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+        cached_chars = len(system) if system in self._prefixes else 0
+        self._prefixes.add(system)
+        body, input_tokens, output_tokens = self._respond(sum(len(m["content"]) for m in messages), cached_chars)
+        usage = SimpleNamespace(prompt_tokens=input_tokens, completion_tokens=output_tokens,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=cached_chars // 4))
+        message = SimpleNamespace(content=body)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+# --- bible-api.com ------------------------------------------------------------
+
+class FakeBibleServer:
+    """
+    Threaded HTTP server answering `GET /<reference>?translation=<v>` like bible-api.com.
+    Injected failures are returned as HTTP 500.
+    """
+
+    def __init__(self, latency: Optional[LatencyProfile] = None, host: str = "127.0.0.1"):
+        self.latency = latency or LatencyProfile(base_s=0.005)
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                parsed = urlparse(self.path)
+                reference = unquote(parsed.path.lstrip("/"))
+                try:
+                    server.latency.apply(what="bible-api")
+                except InjectedFailure:
+                    self.send_error(500)
+                    return
+                body = json.dumps({
+                    "reference": reference,
+                    "text": f"{reference}: For I know the thoughts that I think toward you, saith the LORD.\n",
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, 0), Handler)
+        self._httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self._httpd.server_address[1]}/"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeBibleServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+# --- Batch APIs ---------------------------------------------------------------
+
+class FakeBatchServer:
+    """
+    Threaded HTTP server standing in for two batch APIs, both answered with `fake_guide` JSON:
+    - OpenAI-compatible (`/v1/files`, `/v1/batches`, `/v1/files/<id>/content`), as used by
+      OpenAI and Groq
+    - Gemini batch mode (`/v1beta/models/<model>:batchGenerateContent`, `/v1beta/batches/<id>`)
+    A job completes on its `polls_to_complete`-th status request. Requests whose
+    custom_id / metadata key is in `fail_ids` come back as per-request errors; with
+    `job_state` set, every job ends in that state instead (e.g. "expired").
+    """
+
+    def __init__(self, polls_to_complete: int = 1, fail_ids=(), job_state: Optional[str] = None,
+                 host: str = "127.0.0.1"):
+        self.polls_to_complete = polls_to_complete
+        self.fail_ids = set(fail_ids)
+        self.job_state = job_state
+        self.files: Dict[str, bytes] = {}
+        self.jobs: Dict[str, Dict] = {}
+        self.requests = []  # (method, path) in arrival order
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status: int, payload, content_type: str = "application/json"):
+                body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def _dispatch(self, method: str):
+                path = urlparse(self.path).path
+                server.requests.append((method, path))
+                with server._lock:
+                    status, payload, content_type = server._handle(method, path, self._body(), self.headers)
+                self._send(status, payload, content_type)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, 0), Handler)
+        self._httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeBatchServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handle(self, method: str, path: str, body: bytes, headers):
+        not_found = (404, {"error": {"message": f"No route for {method} {path}"}}, "application/json")
+        if method == "POST" and path == "/v1/files":
+            return self._upload(body, headers)
+        if method == "POST" and path == "/v1/batches":
+            return self._openai_create(json.loads(body))
+        match = re.fullmatch(r"/v1/batches/([^/]+)", path)
+        if method == "GET" and match and match.group(1) in self.jobs:
+            return 200, self._openai_poll(self.jobs[match.group(1)]), "application/json"
+        match = re.fullmatch(r"/v1/files/([^/]+)/content", path)
+        if method == "GET" and match and match.group(1) in self.files:
+            return 200, self.files[match.group(1)], "application/jsonl"
+        match = re.fullmatch(r"/v1beta/models/([^/:]+):batchGenerateContent", path)
+        if method == "POST" and match:
+            return self._gemini_create(match.group(1), json.loads(body))
+        match = re.fullmatch(r"/v1beta/(batches/[^/]+)", path)
+        if method == "GET" and match and match.group(1) in self.jobs:
+            return 200, self._gemini_poll(self.jobs[match.group(1)]), "application/json"
+        return not_found
+
+    def _guide(self, key: str, seed: int) -> Optional[str]:
+        return None if key in self.fail_ids else json.dumps(fake_guide(seed=seed))
+
+    def _finished(self, job: Dict) -> bool:
+        job["polls"] += 1
+        return job["polls"] >= self.polls_to_complete
+
+    # OpenAI-compatible
+
+    def _upload(self, body: bytes, headers):
+        message = BytesParser().parsebytes(f"Content-Type: {headers['Content-Type']}\r\n\r\n".encode() + body)
+        parts = {part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+                 for part in message.get_payload()}
+        file_id = f"file-{next(self._ids)}"
+        self.files[file_id] = parts["file"]
+        return 200, {"id": file_id, "object": "file", "bytes": len(parts["file"]),
+                     "purpose": parts.get("purpose", b"").decode()}, "application/json"
+
+    def _openai_create(self, params: Dict):
+        if params.get("input_file_id") not in self.files:
+            return 400, {"error": {"message": "Unknown input_file_id"}}, "application/json"
+        job_id = f"batch_{next(self._ids)}"
+        lines = [json.loads(line) for line in self.files[params["input_file_id"]].decode().splitlines() if line.strip()]
+        self.jobs[job_id] = {"id": job_id, "kind": "openai", "polls": 0, "lines": lines, "params": params}
+        return 200, {"id": job_id, "object": "batch", "status": "validating", "endpoint": params.get("endpoint"),
+                     "input_file_id": params["input_file_id"]}, "application/json"
+
+    def _openai_poll(self, job: Dict) -> Dict:
+        batch = {"id": job["id"], "object": "batch", "status": "in_progress", "input_file_id": job["params"]["input_file_id"],
+                 "request_counts": {"total": len(job["lines"]), "completed": 0, "failed": 0}}
+        if not self._finished(job):
+            return batch
+        if self.job_state:
+            batch["status"] = self.job_state
+            return batch
+        if "output_file_id" not in job:
+            outputs, errors = [], []
+            for n, line in enumerate(job["lines"]):
+                text = self._guide(line["custom_id"], n)
+                if text is None:
+                    errors.append({"id": f"req_{n}", "custom_id": line["custom_id"], "response": None,
+                                   "error": {"code": "server_error", "message": "Injected failure"}})
+                    continue
+                body = {"id": f"chatcmpl-{n}", "object": "chat.completion", "model": line["body"]["model"],
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}}],
+                        "usage": {"prompt_tokens": len(json.dumps(line["body"])) // 4, "completion_tokens": len(text) // 4}}
+                outputs.append({"id": f"req_{n}", "custom_id": line["custom_id"],
+                                "response": {"status_code": 200, "request_id": f"req_{n}", "body": body}, "error": None})
+            for name, rows in (("output_file_id", outputs), ("error_file_id", errors)):
+                if rows:
+                    file_id = f"file-{next(self._ids)}"
+                    self.files[file_id] = "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+                    job[name] = file_id
+            job["counts"] = {"total": len(job["lines"]), "completed": len(outputs), "failed": len(errors)}
+        batch.update(status="completed", output_file_id=job.get("output_file_id"), error_file_id=job.get("error_file_id"),
+                     request_counts=job["counts"])
+        return batch
+
+    # Gemini batch mode
+
+    def _gemini_create(self, model: str, params: Dict):
+        name = f"batches/{next(self._ids)}"
+        batch = params.get("batch", {})
+        requests = batch.get("inputConfig", {}).get("requests", {}).get("requests", [])
+        self.jobs[name] = {"id": name, "kind": "gemini", "polls": 0, "model": f"models/{model}",
+                           "display_name": batch.get("displayName"), "requests": requests}
+        return 200, self._gemini_batch(self.jobs[name], "BATCH_STATE_PENDING"), "application/json"
+
+    def _gemini_batch(self, job: Dict, state: str, output: Optional[Dict] = None) -> Dict:
+        metadata = {"@type": "type.googleapis.com/google.ai.generativelanguage.v1main.GenerateContentBatch",
+                    "model": job["model"], "displayName": job["display_name"], "state": state}
+        if output is not None:
+            metadata["output"] = output
+        return {"name": job["id"], "metadata": metadata, "done": output is not None}
+
+    def _gemini_poll(self, job: Dict) -> Dict:
+        if not self._finished(job):
+            return self._gemini_batch(job, "BATCH_STATE_RUNNING")
+        if self.job_state:
+            return self._gemini_batch(job, f"BATCH_STATE_{self.job_state.upper()}")
+        responses = []
+        for n, item in enumerate(job["requests"]):
+            metadata = item.get("metadata") or {}
+            text = self._guide(metadata.get("key"), n)
+            if text is None:
+                responses.append({"error": {"code": 13, "message": "Injected failure"}, "metadata": metadata})
+                continue
+            prompt = "".join(p.get("text", "") for c in item["request"]["contents"] for p in c.get("parts", []))
+            responses.append({"metadata": metadata, "response": {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+                "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(text) // 4},
+            }})
+        return self._gemini_batch(job, "BATCH_STATE_SUCCEEDED", {"inlinedResponses": {"inlinedResponses": responses}})
+
+
+# --- yt-dlp -------------------------------------------------------------------
+
+def _copy_into_place(source: str, target: str):
+    # Concurrent runs download the same video to the same path: write beside the target
+    # and rename, as yt-dlp does, so a run still reading the file never sees a partial copy
+    partial = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.copyfile(source, partial)
+    os.replace(partial, target)
+
+
+class FakeYoutubeDL:
+    """
+    Mimics `yt_dlp.YoutubeDL`. URLs are resolved through the class-level `catalog`
+    (url -> local audio file); a download copies that file to the requested outtmpl.
+    """
+
+    catalog: Dict[str, str] = {}
+    metadata_latency = LatencyProfile(base_s=0.01)
+    download_latency = LatencyProfile(base_s=0.01, per_unit_s=2e-9)  # per byte
+
+    def __init__(self, params: Optional[Dict] = None):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _info(self, url: str) -> Dict:
+        if url not in self.catalog:
+            raise InjectedFailure(f"Unknown video: {url}")
+        path = self.catalog[url]
+        video_id = url.rsplit("=", 1)[-1]
+        return {
+            "id": video_id,
+            "title": f"Sermon {video_id}",
+            "duration": wav_duration(path),
+            "ext": "wav",
+            "filesize": os.path.getsize(path),
+        }
+
+    def extract_info(self, url: str, download: bool = True) -> Dict:
+        info = self._info(url)
+        if not download:
+            self.metadata_latency.apply(what="extract_info")
+            return info
+        self.download_latency.apply(info["filesize"], "download")
+        target = self.prepare_filename(info)
+        _copy_into_place(self.catalog[url], target)
+        _copy_into_place(transcript_sidecar(self.catalog[url]), transcript_sidecar(target))
+        return info
+
+    def prepare_filename(self, info: Dict) -> str:
+        template = self.params.get("outtmpl", "%(title)s.%(ext)s")
+        return template % {"title": info["title"], "ext": info["ext"], "id": info["id"]}
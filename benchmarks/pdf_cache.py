@@ -0,0 +1,72 @@
+"""
+Per-document render time of a 7-page guide (cover + 6 days) with and without the
+shared font/logo cache in `src.design.resource_cache`.
+
+Usage:
+    python -m benchmarks.pdf_cache --documents 20
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.fakes import fake_guide
+from benchmarks.run import percentile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _guide() -> Dict:
+    content = fake_guide(days=6)
+    content["preacher_name"] = "Pastor Jane Doe"
+    content["memory_verse"] = f"{content['memory_verse_reference']} (KJV):\nAnd we know that all things work together for good."
+    for day in content["days"]:
+        day["scripture"] = f"{day['scripture_reference']} (KJV): \"For God so loved the world.\""
+    return content
+
+
+def _make_logo(path: str, px: int = 2400):
+    from PIL import Image
+    Image.new("RGB", (px, px), (24, 37, 72)).save(path)
+
+
+def render_times(documents: int, cache: bool, logo_path: str, out_dir: str) -> List[float]:
+    from src.design.pdf_designer import PDFDesigner
+    from src.design.resource_cache import clear_caches
+
+    clear_caches()
+    content = _guide()
+    times = []
+    for i in range(documents):
+        started = time.perf_counter()
+        designer = PDFDesigner(cache_resources=cache)
+        designer.create_pdf(content, os.path.join(out_dir, f"guide_{i}.pdf"), logo_path)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PDF render time with and without the resource cache")
+    parser.add_argument("--documents", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    previous_cwd = os.getcwd()
+    os.chdir(ROOT)  # PDFDesigner resolves assets/fonts relative to the working directory
+    try:
+        with tempfile.TemporaryDirectory() as out_dir:
+            logo_path = os.path.join(out_dir, "logo.png")
+            _make_logo(logo_path)
+            print(f"{'mode':<10}{'docs':>6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+            for label, cache in (("uncached", False), ("cached", True)):
+                times = render_times(args.documents, cache, logo_path, out_dir)
+                print(f"{label:<10}{len(times):>6}{statistics.mean(times) * 1000:>10.1f}"
+                      f"{percentile(times, 50) * 1000:>10.1f}{percentile(times, 95) * 1000:>10.1f}")
+    finally:
+        os.chdir(previous_cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Offline pipeline benchmarks.
+
+Runs `src.main.run_pipeline` end to end against the local fakes in `benchmarks.fakes`,
+collects the tracing spans of every run and reports p50/p95 latency per stage plus
+end-to-end latency and throughput, for single runs and concurrent batches.
+
+Usage:
+    python -m benchmarks.run                         # compare against benchmarks/baselines.json
+    python -m benchmarks.run --update-baseline       # record new baselines
+    python -m benchmarks.run --sizes long --providers groq --batch 16 --concurrency 8
+    python -m benchmarks.run --failure-rate 0.05     # failure injection in every fake
+    python -m benchmarks.run --governed 3            # more runs under the real rate limits
+
+Exit status is 1 when a metric regresses past the tolerance.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Dict, List, Tuple
+from unittest.mock import patch
+
+from benchmarks.fakes import (
+    PROVIDER_LATENCY,
+    FakeBibleServer,
+    FakeLLMClient,
+    FakeTranscriber,
+    FakeYoutubeDL,
+    LatencyProfile,
+)
+from benchmarks.synthetic import ensure_assets
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines.json")
+ASSET_CACHE = os.path.join(tempfile.gettempdir(), "church_study_guide_bench_assets")
+
+# Spans reported per scenario; `end_to_end` is the benchmark's own root span
+REPORTED_SPANS = [
+    "download", "download.metadata", "download.fetch",
+    "transcription", "transcription.upload", "transcription.poll",
+    "generation", "llm.call", "quotes.verify", "enrichment", "scripture.fetch",
+    "pdf_render", "pdf.layout", "pdf.output",
+    "end_to_end",
+]
+
+# Governed scenarios render every version, the heaviest use of the Bible API quota
+GOVERNED_VERSIONS = ("kjv", "web", "rvr")
+
+# Ignore regressions smaller than this (timer noise on tiny stages)
+MIN_REGRESSION_S = 0.02
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def configure_fakes(latency_scale: float, failure_rate: float) -> Dict[str, LatencyProfile]:
+    def tune(profile: LatencyProfile) -> LatencyProfile:
+        tuned = profile.scaled(latency_scale)
+        tuned.failure_rate = failure_rate
+        return tuned
+
+    FakeTranscriber.upload_latency = tune(LatencyProfile(base_s=0.01, per_unit_s=1e-9))
+    FakeTranscriber.transcribe_latency = tune(LatencyProfile(base_s=0.02, per_unit_s=1e-5))
+    FakeYoutubeDL.metadata_latency = tune(LatencyProfile(base_s=0.01))
+    FakeYoutubeDL.download_latency = tune(LatencyProfile(base_s=0.01, per_unit_s=2e-9))
+    profiles = {name: tune(p) for name, p in PROVIDER_LATENCY.items()}
+    profiles["bible"] = tune(LatencyProfile(base_s=0.005))
+    return profiles
+
+
+def run_scenario(name: str, urls: List[str], provider: str, profiles: Dict[str, LatencyProfile],
+                 bible_url: str, concurrency: int, governed: bool = False, versions: Tuple[str, ...] = ("kjv",)) -> Dict:
+    from src.main import build_parser, run_pipeline
+    from src.utils.tracing import configure_tracer
+    from src.utils.rate_limit import DEFAULT_LIMITS, configure_governor
+
+    tracer = configure_tracer()
+    if governed:
+        # The real default quotas: what a run spends waiting on them (bible-api.com above all)
+        configure_governor()
+    else:
+        # The fakes have no quotas: measure the pipeline, not the governor's pacing
+        configure_governor({name: None for name in DEFAULT_LIMITS})
+    failures = 0
+
+    def one(index_url):
+        index, url = index_url
+        args = build_parser().parse_args([
+            "--url", url, "--provider", provider, "--series", f"Bench {name.replace('/', ' ')} {index}",
+            # Every iteration measures the full pipeline, not an archived transcript
+            "--no-archive",
+            "--bible-version", *versions,
+        ])
+        with tracer.span("end_to_end", scenario=name):
+            run_pipeline(args, tracer)
+
+    def guarded(index_url):
+        nonlocal failures
+        try:
+            one(index_url)
+        except (SystemExit, Exception):
+            failures += 1
+
+    llm_client = FakeLLMClient(provider, profiles[provider])
+    with ExitStack() as stack:
+        stack.enter_context(patch("src.ingestion.audio_downloader.yt_dlp.YoutubeDL", FakeYoutubeDL))
+        stack.enter_context(patch("src.transcription.transcriber.aai.Transcriber", FakeTranscriber))
+        stack.enter_context(patch("src.generation.content_generator.get_llm_client",
+                                  lambda: (llm_client, provider)))
+        stack.enter_context(patch("src.utils.bible_fetcher.BibleFetcher.BASE_URL", bible_url))
+
+        started = time.perf_counter()
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(guarded, enumerate(urls)))
+        else:
+            for item in enumerate(urls):
+                guarded(item)
+        wall = time.perf_counter() - started
+
+    durations: Dict[str, List[float]] = {}
+    rate_limit_wait = 0.0
+    for s in tracer.finished_spans():
+        rate_limit_wait += s.attributes.get("rate_limit_wait_s", 0)
+        if s.name in REPORTED_SPANS and s.status == "ok":
+            durations.setdefault(s.name, []).append(s.duration)
+
+    metrics = {
+        span_name: {
+            "n": len(values),
+            "p50": round(percentile(values, 50), 6),
+            "p95": round(percentile(values, 95), 6),
+        }
+        for span_name, values in durations.items()
+    }
+    return {
+        "runs": len(urls),
+        "failures": failures,
+        "wall_s": round(wall, 4),
+        "throughput_per_min": round((len(urls) - failures) / wall * 60, 3) if wall else 0.0,
+        "rate_limit_wait_s": round(rate_limit_wait, 3),
+        "metrics": metrics,
+    }
+
+
+def print_report(results: Dict[str, Dict]):
+    for name, result in results.items():
+        print(f"\n== {name}: {result['runs']} runs, {result['failures']} failed, "
+              f"{result['wall_s']:.2f}s wall, {result['throughput_per_min']:.1f} guides/min, "
+              f"{result.get('rate_limit_wait_s', 0):.1f}s rate-limit wait over all calls")
+        print(f"   {'span':<22}{'n':>5}{'p50 ms':>12}{'p95 ms':>12}")
+        for span_name in REPORTED_SPANS:
+            m = result["metrics"].get(span_name)
+            if m:
+                print(f"   {span_name:<22}{m['n']:>5}{m['p50'] * 1000:>12.1f}{m['p95'] * 1000:>12.1f}")
+
+
+def compare_to_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Returns human-readable regression lines (empty when everything is within tolerance)."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result.get("failures", 0) > base.get("failures", 0):
+            regressions.append(f"{name} failures: {result['failures']} of {result['runs']} runs "
+                               f"vs baseline {base.get('failures', 0)}")
+        for span_name, m in result["metrics"].items():
+            base_m = base.get("metrics", {}).get(span_name)
+            if not base_m:
+                continue
+            # p95 of individual spans is dominated by thread scheduling in batch runs,
+            # so only the end-to-end tail is gated; every span is gated on its median.
+            stats = ("p50", "p95") if span_name == "end_to_end" else ("p50",)
+            for stat in stats:
+                limit = base_m[stat] * (1 + tolerance)
+                if m[stat] > limit and m[stat] - base_m[stat] > MIN_REGRESSION_S:
+                    regressions.append(
+                        f"{name} {span_name} {stat}: {m[stat] * 1000:.1f}ms vs baseline {base_m[stat] * 1000:.1f}ms"
+                    )
+        base_tp = base.get("throughput_per_min", 0)
+        if base_tp and result["throughput_per_min"] < base_tp / (1 + tolerance):
+            regressions.append(
+                f"{name} throughput: {result['throughput_per_min']:.1f}/min vs baseline {base_tp:.1f}/min"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks")
+    parser.add_argument("--sizes", nargs="+", default=["short", "medium", "long"], choices=["short", "medium", "long"])
+    parser.add_argument("--providers", nargs="+", default=["gemini"], choices=sorted(PROVIDER_LATENCY))
+    parser.add_argument("--iterations", type=int, default=5, help="Sequential runs per single-run scenario")
+    parser.add_argument("--batch", type=int, default=8, help="Guides per batch scenario (0 to skip)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Worker threads for batch scenarios")
+    parser.add_argument("--governed", type=int, default=1,
+                        help="Sequential runs per scenario under the default rate limits, in three Bible versions (0 to skip)")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplier for every fake latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Failure probability for every fake call")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown before flagging (0.5 = 50%%)")
+    parser.add_argument("--json-out", help="Also write the raw results to this file")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LLM_MODEL", "bench-model")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    assets = ensure_assets(ASSET_CACHE)
+    profiles = configure_fakes(args.latency_scale, args.failure_rate)
+
+    workdir = tempfile.mkdtemp(prefix="csg_bench_")
+    os.symlink(os.path.join(ROOT, "assets"), os.path.join(workdir, "assets"))
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+
+    results: Dict[str, Dict] = {}
+    try:
+        with FakeBibleServer(profiles["bible"]) as bible:
+            for size in args.sizes:
+                url = f"https://www.youtube.com/watch?v=bench-{size}"
+                FakeYoutubeDL.catalog[url] = assets[size]
+                for provider in args.providers:
+                    name = f"single/{size}/{provider}"
+                    results[name] = run_scenario(name, [url] * args.iterations, provider, profiles, bible.base_url, 1)
+                    # One size is enough: the quota, not the transcript, sets this scenario's cost
+                    if args.governed and size == args.sizes[-1]:
+                        name = f"governed/{size}/{provider}"
+                        results[name] = run_scenario(name, [url] * args.governed, provider, profiles,
+                                                     bible.base_url, 1, governed=True, versions=GOVERNED_VERSIONS)
+                    if args.batch:
+                        name = f"batch{args.batch}x{args.concurrency}/{size}/{provider}"
+                        results[name] = run_scenario(name, [url] * args.batch, provider, profiles,
+                                                     bible.base_url, args.concurrency)
+    finally:
+        os.chdir(previous_cwd)
+
+    print_report(results)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nNo baseline found; run with --update-baseline to record one.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Synthetic sermon inputs for the offline benchmarks.
+
+Audio is a low-rate mono WAV so long services stay cheap to generate; each file gets a
+`.transcript.txt` sidecar that the fake transcriber returns as the recognized text.
+"""
+import math
+import os
+import random
+import wave
+from typing import Dict, List
+
+# Rough spoken rate of a preacher, used to size transcripts from audio duration
+WORDS_PER_SECOND = 2.3
+
+# name -> duration in seconds
+SIZES: Dict[str, int] = {
+    "short": 10 * 60,      # midweek devotional
+    "medium": 40 * 60,     # Sunday sermon
+    "long": 90 * 60,       # conference talk
+}
+
+CITED_REFERENCES: List[str] = [
+    "Romans 8:28", "John 3:16", "Philippians 4:13", "Proverbs 23:7", "Psalm 23:1",
+    "Isaiah 40:31", "Matthew 6:33", "Hebrews 11:1", "James 1:22", "Ephesians 2:8",
+    "2 Corinthians 5:17", "Galatians 5:22", "Jeremiah 29:11", "1 John 1:9",
+]
+
+_VOCABULARY = (
+    "grace faith mind renewal heart soul strength church family prayer word spirit "
+    "truth love hope purpose calling servant kingdom light obedience worship mercy "
+    "today tomorrow journey transformation identity promise covenant wisdom peace "
+    "we must never forget that the Lord is faithful and His word stands forever"
+).split()
+
+
+def make_transcript(words: int, seed: int = 0) -> str:
+    """Deterministic sermon-like text with a scripture citation every ~150 words."""
+    rng = random.Random(seed)
+    out: List[str] = []
+    sentence: List[str] = []
+    for i in range(words):
+        if i and i % 150 == 0:
+            out.append(f"Turn with me to {rng.choice(CITED_REFERENCES)}.")
+        sentence.append(rng.choice(_VOCABULARY))
+        if len(sentence) >= rng.randint(8, 18):
+            text = " ".join(sentence)
+            out.append(text[0].upper() + text[1:] + ".")
+            sentence = []
+    if sentence:
+        out.append(" ".join(sentence) + ".")
+    return " ".join(out)
+
+
+def make_wav(path: str, seconds: int, sample_rate: int = 4000):
+    """Writes an 8-bit mono tone of the given duration."""
+    frames_per_chunk = sample_rate
+    chunk = bytes(
+        128 + int(60 * math.sin(2 * math.pi * 220 * i / sample_rate))
+        for i in range(frames_per_chunk)
+    )
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(1)
+        w.setframerate(sample_rate)
+        for _ in range(seconds):
+            w.writeframes(chunk)
+
+
+def wav_duration(path: str) -> float:
+    with wave.open(path, "rb") as w:
+        return w.getnframes() / float(w.getframerate())
+
+
+def transcript_sidecar(audio_path: str) -> str:
+    return f"{audio_path}.transcript.txt"
+
+
+def ensure_assets(asset_dir: str) -> Dict[str, str]:
+    """Creates (once) one WAV plus transcript sidecar per size and returns name -> audio path."""
+    os.makedirs(asset_dir, exist_ok=True)
+    paths = {}
+    for index, (name, seconds) in enumerate(SIZES.items()):
+        audio_path = os.path.join(asset_dir, f"sermon_{name}.wav")
+        if not os.path.exists(audio_path):
+            make_wav(audio_path, seconds)
+        sidecar = transcript_sidecar(audio_path)
+        if not os.path.exists(sidecar):
+            with open(sidecar, "w", encoding="utf-8") as f:
+                f.write(make_transcript(int(seconds * WORDS_PER_SECOND), seed=index))
+        paths[name] = audio_path
+    return paths
+
@@ -1,5 +1,18 @@
 import sys
 import os
+import shutil
+import tempfile
 
 # Add project root to python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__))))
+
+# Modules configure logging when imported, so the log directory is set before any test
+# module is collected; test runs must not write into logs/ of the working tree
+_log_dir = tempfile.mkdtemp(prefix="study-guide-logs-")
+os.environ["LOG_DIR"] = _log_dir
+
+
+def pytest_unconfigure(config):
+    from src.utils.logger import shutdown_logging
+    shutdown_logging()
+    shutil.rmtree(_log_dir, ignore_errors=True)
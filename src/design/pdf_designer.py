@@ -1,15 +1,34 @@
+import io
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Union
 from fpdf import FPDF
 from fpdf.enums import XPos, YPos
 from src.utils.logger import setup_logger
+from src.utils.tracing import span
+from src.utils.workspace import atomic_write
+from src.design.resource_cache import load_font, load_logo, encode_logo
+from src.generation.models import Day, Guide
+
+LOGO_WIDTH_MM = 30
+# Compact mode: screen/office-printer quality is plenty for a 30mm logo
+COMPACT_LOGO_DPI = 150
 
 logger = setup_logger("pdf_designer")
 
 
 class PDFDesigner(FPDF):
-    def __init__(self, orientation='P', unit='mm', format='A4'):
+    def __init__(self, orientation='P', unit='mm', format='A4', cache_resources: bool = True,
+                 compact: bool = False, logo_dpi: int = COMPACT_LOGO_DPI):
         super().__init__(orientation=orientation, unit=unit, format=format)
+        # Reuse fonts and decoded logos parsed by earlier designers in this process
+        self.cache_resources = cache_resources
+        # Compact output: compressed streams, subset fonts (fpdf2 always subsets TTFs),
+        # and the logo downsampled to `logo_dpi` and re-encoded
+        self.compact = compact
+        self.logo_dpi = logo_dpi
+        self.set_compression(True)
+        self.output_size = None
+        self._cover_pages = set()
         self.primary_color = (24, 37, 72)
         self.secondary_color = (120, 130, 150)
         self.accent_color = (211, 83, 121)
@@ -20,9 +39,12 @@ class PDFDesigner(FPDF):
         font_dir = os.path.join("assets", "fonts")
         if os.path.exists(font_dir):
             try:
-                self.add_font("Montserrat", style="", fname=os.path.join(font_dir, "Montserrat-Regular.ttf"))
-                self.add_font("Montserrat", style="B", fname=os.path.join(font_dir, "Montserrat-Bold.ttf"))
-                self.add_font("Montserrat", style="I", fname=os.path.join(font_dir, "Montserrat-Italic.ttf"))
+                for style, fname in (("", "Montserrat-Regular.ttf"), ("B", "Montserrat-Bold.ttf"), ("I", "Montserrat-Italic.ttf")):
+                    font_path = os.path.join(font_dir, fname)
+                    if self.cache_resources:
+                        load_font(self, "Montserrat", style, font_path)
+                    else:
+                        self.add_font("Montserrat", style=style, fname=font_path)
                 logger.info("Montserrat fonts loaded successfully.")
             except Exception as e:
                 logger.warning(f"Failed to load fonts: {e}. Fallback to Helvetica.")
@@ -36,47 +58,79 @@ class PDFDesigner(FPDF):
             self.set_font("Helvetica", style, size)
 
     def header(self):
-        if self.page_no() > 1:
+        if self.page_no() not in self._cover_pages:
             self._set_font('I', 8)
             self.set_text_color(*self.secondary_color)
             self.cell(0, 10, f'{self.series_title} - Discipleship Guide', new_x=XPos.RIGHT, new_y=YPos.TOP, align='R')
             self.ln(10)
 
     def footer(self):
-        if self.page_no() > 1:
+        if self.page_no() not in self._cover_pages:
             self.set_y(-15)
             self._set_font('I', 8)
             self.set_text_color(128)
             self.cell(0, 10, f'Page {self.page_no()}', new_x=XPos.RIGHT, new_y=YPos.TOP, align='C')
 
-    def create_pdf(self, content: Dict[str, Any], output_path: str, logo_path: str = None):
+    def create_pdf(self, content: Union[Guide, Dict[str, Any]], output_path: str, logo_path: str = None):
         """
-        Generates the PDF based on content dictionary.
+        Generates the PDF for a guide (or a content dictionary).
         """
-        self.series_title = content.get("series_title", "Study Guide")
-        
+        guide = Guide.coerce(content)
+        with span("pdf.layout", days=len(guide.days)):
+            self._add_guide(guide, logo_path)
+
+        return self._save(output_path)
+
+    def create_booklet(self, contents: List[Union[Guide, Dict[str, Any]]], output_path: str, logo_path: str = None):
+        """
+        Generates one PDF holding several weeks' guides (cover + days each), in order.
+        Fonts and the logo are embedded once for the whole series instead of per week.
+        """
+        with span("pdf.layout", guides=len(contents)):
+            for content in contents:
+                self._add_guide(Guide.coerce(content), logo_path)
+
+        return self._save(output_path)
+
+    def _add_guide(self, guide: Guide, logo_path: str = None):
+        self.series_title = guide.series_title or "Study Guide"
+
         # --- Cover Page ---
+        # Registered before add_page so header/footer skip it
+        self._cover_pages.add(self.page_no() + 1)
         self.add_page()
-        self._create_cover_page(content, logo_path)
-        
+        self._create_cover_page(guide, logo_path)
+
         # --- Daily Guides ---
-        for day_data in content.get("days", []):
+        for day in guide.days:
             self.add_page()
-            self._create_day_page(day_data)
-            
-        # --- Save ---
-        try:
-            self.output(output_path)
-            logger.info(f"PDF generated successfully at {output_path}")
-            return output_path
-        except Exception as e:
-            logger.error(f"Failed to save PDF: {e}")
-            raise
+            self._create_day_page(day)
+
+    def _save(self, output_path: str):
+        with span("pdf.output", path=output_path, compact=self.compact) as s:
+            try:
+                # Rendered in memory and renamed into place, so a reader never sees half a PDF
+                with atomic_write(output_path, "wb") as f:
+                    f.write(self.output())
+                self.output_size = os.path.getsize(output_path)
+                s.set_attribute("size_bytes", self.output_size)
+                logger.info(f"PDF generated successfully at {output_path} ({self.output_size / 1024:.1f} KB)")
+                return output_path
+            except Exception as e:
+                logger.error(f"Failed to save PDF: {e}")
+                raise
+
+    def _logo_source(self, logo_path: str):
+        if self.compact:
+            return io.BytesIO(encode_logo(logo_path, LOGO_WIDTH_MM, self.logo_dpi))
+        if self.cache_resources:
+            return load_logo(logo_path, LOGO_WIDTH_MM)
+        return logo_path
 
-    def _create_cover_page(self, content: Dict[str, Any], logo_path: str = None):
+    def _create_cover_page(self, guide: Guide, logo_path: str = None):
         if logo_path and os.path.exists(logo_path):
             try:
-                self.image(logo_path, x=20, y=20, w=30)
+                self.image(self._logo_source(logo_path), x=20, y=20, w=LOGO_WIDTH_MM)
             except Exception as e:
                 logger.warning(f"Could not add logo image: {e}")
 
@@ -90,9 +144,9 @@ class PDFDesigner(FPDF):
         self.cell(self.w, band_height, "", new_x=XPos.LMARGIN, new_y=YPos.NEXT, fill=True)
         self.set_y(band_top + 8)
         self._set_font('B', 22)
-        self.cell(0, 10, content.get("series_title", "Sermon Series").upper(), align='C')
+        self.cell(0, 10, (guide.series_title or "Sermon Series").upper(), align='C')
 
-        preacher_name = content.get("preacher_name") or ""
+        preacher_name = guide.preacher_name or ""
         if preacher_name:
             self.ln(12)
             self._set_font('I', 11)
@@ -122,13 +176,13 @@ class PDFDesigner(FPDF):
         self.set_x(25)
         self._set_font('I', 11)
         self.set_text_color(40, 40, 40)
-        self.multi_cell(self.w - 50, 6, content.get("memory_verse", ""), align='L')
+        self.multi_cell(self.w - 50, 6, guide.memory_verse.text or "", align='L')
 
-    def _create_day_page(self, day_data: Dict[str, Any]):
+    def _create_day_page(self, day: Day):
         # Day Header
         self._set_font('B', 16)
         self.set_text_color(*self.primary_color)
-        self.multi_cell(0, 10, f"DAY {day_data.get('day', '?')}: {day_data.get('title', '').upper()}", align='L')
+        self.multi_cell(0, 10, f"DAY {day.day if day.day is not None else '?'}: {day.title.upper()}", align='L')
         self.ln(1)
         self.set_draw_color(*self.secondary_color)
         self.set_line_width(0.3)
@@ -145,7 +199,7 @@ class PDFDesigner(FPDF):
         self.cell(label_width, 8, label, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L', fill=True)
         self._set_font('', 11)
         self.set_text_color(0, 0, 0)
-        self.multi_cell(0, 6, day_data.get('scripture', ''))
+        self.multi_cell(0, 6, day.scripture.text or '')
         
         # Reflection
         self.ln(8)
@@ -157,7 +211,7 @@ class PDFDesigner(FPDF):
         self.cell(label_width, 8, label, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L', fill=True)
         self._set_font('', 11)
         self.set_text_color(0, 0, 0)
-        self.multi_cell(0, 6, day_data.get('reflection', ''))
+        self.multi_cell(0, 6, day.reflection)
         
         # Question
         self.ln(8)
@@ -170,17 +224,9 @@ class PDFDesigner(FPDF):
         self._set_font('', 11)
         self.set_text_color(0, 0, 0)
         
-        # Support both new 'question' string and legacy 'questions' list
-        question = day_data.get('question')
-        if not question and 'questions' in day_data:
-            qs = day_data['questions']
-            if isinstance(qs, list) and qs:
-                question = qs[0]
-            elif isinstance(qs, str):
-                question = qs
-                
-        if question:
-            self.multi_cell(0, 6, question)
+        # A legacy 'questions' list was already normalized by the model
+        if day.question:
+            self.multi_cell(0, 6, day.question)
             
         self.ln(2)
             
@@ -192,7 +238,7 @@ class PDFDesigner(FPDF):
         self.line(self.l_margin, y, self.w - self.r_margin, y)
         self.ln(5)
 
-        prayer_text = day_data.get('prayer', '')
+        prayer_text = day.prayer
 
         # Calculate height needed for prayer text
         # Width = Page Width - Margins - Padding
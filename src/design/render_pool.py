@@ -0,0 +1,122 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+
+from src.generation.models import Guide, dumps, read_guide
+from src.utils.logger import configure_worker_logging, setup_logger, worker_log_queue
+from src.utils.workspace import DEFAULT_OUTPUT_ROOT, RUNS_DIR, RunWorkspace
+
+logger = setup_logger("render_pool")
+
+
+def guide_filename(content: Union[Guide, Dict[str, Any]]) -> str:
+    """
+    Unique, deterministic PDF filename for a guide: the sanitized series title plus a
+    short hash of the content, so guides of the same series no longer overwrite each other.
+    """
+    guide = Guide.coerce(content)
+    title = guide.series_title or "study_guide"
+    safe_title = "".join([c for c in title if c.isalnum() or c in (' ', '-', '_')]).strip() or "study_guide"
+    digest = hashlib.sha1(dumps(guide.to_dict(), sort_keys=True)).hexdigest()[:10]
+    return f"{safe_title.replace(' ', '_')}_{digest}.pdf"
+
+
+def _warm_worker(cwd: str, log_queue):
+    # Records go to the parent's app.log through the queue; workers never open it themselves
+    configure_worker_logging(log_queue)
+    # Fonts are resolved relative to the working directory; parsing them here once means
+    # every document this worker renders reuses the cached faces.
+    os.chdir(cwd)
+    from src.design.pdf_designer import PDFDesigner
+    PDFDesigner()
+
+
+def _render_one(content: Guide, output_path: str, logo_path: Optional[str], compact: bool) -> Dict[str, Any]:
+    from src.design.pdf_designer import PDFDesigner
+
+    started = time.perf_counter()
+    designer = PDFDesigner(compact=compact)
+    designer.create_pdf(content, output_path, logo_path)
+    return {
+        "output_path": output_path,
+        "seconds": time.perf_counter() - started,
+        "size_bytes": designer.output_size,
+        "pid": os.getpid(),
+    }
+
+
+def render_guides(contents: List[Union[Guide, Dict[str, Any]]], output_dir: Optional[str] = None,
+                  logo_path: Optional[str] = None, max_workers: Optional[int] = None,
+                  compact: bool = False) -> List[Dict[str, Any]]:
+    """
+    Renders many guides across worker processes into `output_dir`: a run's workspace
+    directory, say, or by default a new run directory under DEFAULT_OUTPUT_ROOT.
+
+    Returns one result per input (same order) with `output_path`, render `seconds`,
+    `size_bytes`, the worker `pid` and `error` (None on success). Identical contents
+    map to the same filename and are rendered only once.
+    """
+    if output_dir is None:
+        output_dir = RunWorkspace(DEFAULT_OUTPUT_ROOT).directory
+    os.makedirs(output_dir, exist_ok=True)
+    contents = [Guide.coerce(content) for content in contents]
+    paths = [os.path.join(output_dir, guide_filename(content)) for content in contents]
+    unique = {}
+    for content, path in zip(contents, paths):
+        unique.setdefault(path, content)
+
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(unique)))
+    logger.info(f"Rendering {len(unique)} guides on {workers} worker processes...")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    # spawn: workers must not inherit the parent's logging/metrics threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_warm_worker, initargs=(os.getcwd(), worker_log_queue())) as pool:
+        futures = {path: pool.submit(_render_one, content, path, logo_path, compact) for path, content in unique.items()}
+        for path, future in futures.items():
+            try:
+                results[path] = dict(future.result(), error=None)
+            except Exception as e:
+                logger.error(f"Rendering {path} failed: {e}")
+                results[path] = {"output_path": path, "seconds": None, "size_bytes": None, "pid": None, "error": str(e)}
+
+    return [dict(results[path]) for path in paths]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render saved *_content.json files to PDF in parallel")
+    parser.add_argument("content_files", nargs="+", help="Paths to *_content.json files")
+    parser.add_argument("--output-dir", help=f"Directory for the PDFs (default: a new run directory under {DEFAULT_OUTPUT_ROOT}/{RUNS_DIR}/)")
+    parser.add_argument("--logo", help="Path to church logo for PDF branding")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--compact", action="store_true", help="Compact output (compressed, downsampled logo)")
+    parser.add_argument("--booklet", help="Instead of one PDF per guide, write a single series booklet to this path")
+    args = parser.parse_args()
+
+    contents = [read_guide(path) for path in args.content_files]
+
+    started = time.perf_counter()
+    if args.booklet:
+        from src.design.pdf_designer import PDFDesigner
+        designer = PDFDesigner(compact=args.compact)
+        designer.create_booklet(contents, args.booklet, args.logo)
+        print(f"Booklet of {len(contents)} guides: {args.booklet} ({designer.output_size / 1024:.1f} KB) "
+              f"in {time.perf_counter() - started:.2f}s")
+        return
+
+    results = render_guides(contents, args.output_dir, args.logo, args.workers, args.compact)
+    for source, result in zip(args.content_files, results):
+        if result["error"]:
+            print(f"FAILED  {source}: {result['error']}")
+        else:
+            print(f"{result['seconds']:.2f}s  {result['size_bytes'] / 1024:8.1f} KB  {source} -> {result['output_path']}")
+    print(f"\nRendered {len(results)} guides in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
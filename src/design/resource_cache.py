@@ -0,0 +1,138 @@
+import copy
+import io
+import os
+import threading
+from typing import Dict, Tuple
+
+from fontTools import ttLib
+from fpdf import FPDF
+from fpdf.fonts import SubsetMap
+from src.utils.logger import setup_logger
+
+logger = setup_logger("resource_cache")
+
+# Process-wide caches shared by every PDFDesigner. Keys include the file's mtime so an
+# edited font or logo is picked up without restarting the process.
+_lock = threading.Lock()
+_font_templates: Dict[Tuple[str, int, str, str], object] = {}
+_font_bytes: Dict[Tuple[str, int], bytes] = {}
+_logos: Dict[Tuple[str, int, int], object] = {}
+_encoded_logos: Dict[Tuple[str, int, float, int, int], bytes] = {}
+
+# Logo is drawn 30mm wide on the cover; 300 DPI is print quality at that size
+LOGO_DPI = 300
+
+
+def _file_key(path: str) -> Tuple[str, int]:
+    return os.path.abspath(path), os.stat(path).st_mtime_ns
+
+
+def _font_template(family: str, style: str, path: str):
+    """Parses a font once on a scratch document and keeps it as a pristine template."""
+    abs_path, mtime = _file_key(path)
+    key = (abs_path, mtime, family, style)
+    with _lock:
+        template = _font_templates.get(key)
+        if template is None:
+            scratch = FPDF()
+            scratch.add_font(family, style=style, fname=abs_path)
+            template = next(iter(scratch.fonts.values()))
+            with open(abs_path, "rb") as f:
+                _font_bytes[(abs_path, mtime)] = f.read()
+            _font_templates[key] = template
+        return template, _font_bytes[(abs_path, mtime)]
+
+
+def load_font(pdf: FPDF, family: str, style: str, path: str):
+    """
+    Registers a TTF on `pdf` from the shared cache instead of re-parsing it.
+
+    The parsed metrics (cmap, widths, glyph ids, descriptor) are shared; everything the
+    document mutates (subset map, fontTools object that gets subset on output) is fresh.
+    Falls back to a plain `add_font` if the cached copy cannot be built.
+    """
+    template, raw = _font_template(family, style, path)
+    fontkey = template.fontkey
+    if fontkey in pdf.fonts:
+        return
+    try:
+        font = copy.copy(template)
+        font.i = len(pdf.fonts) + 1
+        font.ttfont = ttLib.TTFont(io.BytesIO(raw), recalcTimestamp=False, lazy=True)
+        font._hbfont = None
+        font.biggest_size_pt = 0
+        font.missing_glyphs = []
+        font.subset = SubsetMap(font)
+        pdf.fonts[fontkey] = font
+    except Exception as e:
+        logger.warning(f"Font cache unavailable for {path}: {e}. Parsing directly.")
+        pdf.fonts.pop(fontkey, None)
+        pdf.add_font(family, style=style, fname=path)
+
+
+def load_logo(path: str, width_mm: float, dpi: int = LOGO_DPI):
+    """
+    Returns the decoded logo as a PIL image downscaled to `dpi` at `width_mm`.
+    Decoded images are cached per (path, mtime, target width).
+    """
+    from PIL import Image
+
+    abs_path, mtime = _file_key(path)
+    target_px = max(1, int(round(width_mm / 25.4 * dpi)))
+    key = (abs_path, mtime, target_px)
+    with _lock:
+        cached = _logos.get(key)
+    if cached is not None:
+        return cached
+
+    with Image.open(abs_path) as img:
+        img.load()
+        if img.mode not in ("RGB", "RGBA", "L", "LA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode == "P" else "RGB")
+        if img.width > target_px:
+            height = max(1, int(round(img.height * target_px / img.width)))
+            img = img.resize((target_px, height), Image.LANCZOS)
+        else:
+            img = img.copy()
+
+    with _lock:
+        _logos[key] = img
+    return img
+
+
+def encode_logo(path: str, width_mm: float, dpi: int, jpeg_quality: int = 85) -> bytes:
+    """
+    Downsamples the logo to `dpi` at `width_mm` and re-encodes it compactly: JPEG for
+    opaque images, optimized PNG when there is transparency. Cached like `load_logo`.
+    """
+    abs_path, mtime = _file_key(path)
+    key = (abs_path, mtime, width_mm, dpi, jpeg_quality)
+    with _lock:
+        cached = _encoded_logos.get(key)
+    if cached is not None:
+        return cached
+
+    img = load_logo(path, width_mm, dpi)
+    buffer = io.BytesIO()
+    if img.mode in ("RGBA", "LA"):
+        img.save(buffer, format="PNG", optimize=True)
+    else:
+        img.save(buffer, format="JPEG", quality=jpeg_quality, optimize=True)
+    encoded = buffer.getvalue()
+
+    with _lock:
+        _encoded_logos[key] = encoded
+    return encoded
+
+
+def clear_caches():
+    with _lock:
+        _font_templates.clear()
+        _font_bytes.clear()
+        _logos.clear()
+        _encoded_logos.clear()
+
+
+def cache_stats() -> Dict[str, int]:
+    with _lock:
+        return {"fonts": len(_font_templates), "logos": len(_logos)}
@@ -0,0 +1,149 @@
+"""
+Live preview: re-renders a guide's PDF whenever its content JSON, the logo or the fonts
+change, without rerunning the pipeline.
+
+    python -m src.design.watch output/runs/<run id>/The_Book_of_Romans_content.json --logo assets/logo.png
+
+The process stays warm, so parsed fonts and the decoded logo are reused by every render.
+Scripture is fetched again only for references whose text no longer matches, e.g. after
+an editor changed a day's `scripture_reference`; everything else is rendered as saved.
+"""
+import argparse
+import glob
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from src.design.pdf_designer import PDFDesigner
+from src.generation.content_generator import enrich_scriptures
+from src.generation.models import Guide, read_guide
+from src.utils.bible_fetcher import BibleFetcher
+from src.utils.logger import setup_logger
+from src.utils.tracing import span
+
+logger = setup_logger("watch")
+
+# Seconds between checks of the watched files
+POLL_INTERVAL_S = 0.2
+# Fonts PDFDesigner loads, relative to the working directory
+FONT_GLOB = os.path.join("assets", "fonts", "*.ttf")
+# Saved scripture text starts with its reference and version: "John 3:16 (KJV): ..."
+_VERSION = re.compile(r"\(([A-Za-z]+)\):")
+_NOT_FOUND = "(Text not found)"
+
+
+def infer_version(guide: Guide) -> Optional[str]:
+    """Bible version the saved scripture text was fetched in, if it says."""
+    for text in [guide.memory_verse.text] + [day.scripture.text for day in guide.days]:
+        match = _VERSION.search(str(text or ""))
+        if match:
+            return match.group(1).lower()
+    return None
+
+
+def stale_references(guide: Guide) -> List[str]:
+    """References whose saved text is missing, was not found, or belongs to another reference."""
+    def stale(ref: Optional[str], text: Any) -> bool:
+        text = str(text or "")
+        return bool(ref) and (not text.startswith(f"{ref} (") or text.startswith(f"{ref} {_NOT_FOUND}"))
+
+    scriptures = [guide.memory_verse] + [day.scripture for day in guide.days]
+    return list(dict.fromkeys(s.reference for s in scriptures if stale(s.reference, s.text)))
+
+
+class PreviewWatcher:
+    """Renders `content_path` to `output_path` and again after every change to its inputs."""
+
+    def __init__(self, content_path: str, output_path: Optional[str] = None, logo_path: Optional[str] = None,
+                 version: Optional[str] = None, compact: bool = False, bible_fetcher: Optional[BibleFetcher] = None):
+        self.content_path = content_path
+        base = content_path[:-len("_content.json")] if content_path.endswith("_content.json") else os.path.splitext(content_path)[0]
+        self.output_path = output_path or f"{base}.pdf"
+        self.logo_path = logo_path
+        self.version = version
+        self.compact = compact
+        # Kept for the whole session: a reference fetched once is never fetched again
+        self.bible_fetcher = bible_fetcher or BibleFetcher()
+        self.renders = 0
+        self.last_seconds: Optional[float] = None
+
+    def watched_files(self) -> List[str]:
+        files = [self.content_path] + sorted(glob.glob(FONT_GLOB))
+        return files + [self.logo_path] if self.logo_path else files
+
+    def snapshot(self) -> Dict[str, Optional[int]]:
+        """mtime (ns) of every watched file; None while a file is missing, e.g. mid-save"""
+        mtimes = {}
+        for path in self.watched_files():
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                mtimes[path] = None
+        return mtimes
+
+    def render(self) -> Optional[float]:
+        """Renders once; returns the seconds taken, or None if the content could not be rendered"""
+        started = time.perf_counter()
+        try:
+            guide = read_guide(self.content_path)
+        except (OSError, ValueError) as e:
+            # Typically a save in progress; the next change triggers another attempt
+            logger.warning(f"Skipping render, {self.content_path} is not readable JSON: {e}")
+            return None
+
+        with span("watch.render", path=self.output_path) as s:
+            stale = stale_references(guide)
+            if stale:
+                version = self.version or infer_version(guide) or "kjv"
+                # Only the rendered copy is refreshed; the editor's file is left as saved
+                for day in guide.days:
+                    if day.scripture.reference in stale:
+                        day.scripture.text = None
+                enrich_scriptures(guide, version, self.bible_fetcher, only=set(stale))
+                logger.info(f"Fetched {len(stale)} changed reference(s): {', '.join(stale)}")
+            try:
+                designer = PDFDesigner(compact=self.compact)
+                designer.create_pdf(guide, self.output_path, self.logo_path)
+            except Exception as e:
+                logger.error(f"Render failed: {e}")
+                return None
+            self.renders += 1
+            self.last_seconds = time.perf_counter() - started
+            s.set_attributes(stale_references=len(stale), seconds=round(self.last_seconds, 3))
+        print(f"Rendered {self.output_path} in {self.last_seconds:.2f}s")
+        return self.last_seconds
+
+    def run(self, interval: float = POLL_INTERVAL_S, stop: Optional[threading.Event] = None):
+        """Renders now, then after each change until `stop` is set (or Ctrl+C)."""
+        stop = stop or threading.Event()
+        seen = self.snapshot()
+        self.render()
+        logger.info(f"Watching {', '.join(seen)}")
+        try:
+            while not stop.wait(interval):
+                current = self.snapshot()
+                if current != seen:
+                    seen = current
+                    self.render()
+        except KeyboardInterrupt:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-render a guide's PDF whenever its content JSON, logo or fonts change")
+    parser.add_argument("content_file", help="A *_content.json file written by a pipeline run")
+    parser.add_argument("--output", help="PDF to write (default: next to the content file)")
+    parser.add_argument("--logo", help="Path to church logo for PDF branding")
+    parser.add_argument("--bible-version", help="Version for changed references (default: the one in the saved text, else kjv)")
+    parser.add_argument("--compact", action="store_true", help="Compact output (compressed, downsampled logo)")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL_S, help="Seconds between checks for changes")
+    args = parser.parse_args()
+
+    watcher = PreviewWatcher(args.content_file, args.output, args.logo, args.bible_version, args.compact)
+    watcher.run(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""
+Deferred generation through provider batch APIs.
+
+Non-urgent guides can be generated as one batch job instead of one synchronous call
+each: batch requests are billed at a discount and do not count against the interactive
+rate limits. A job is submitted, persisted as JSON under `output/batches/`, and picked
+up again by `resume` (from the same process or a later one) until the provider has
+finished it; the results then go through the usual parse -> validate -> enrich -> PDF path.
+
+    python -m src.generation.batch submit output/runs/*/*_transcript.txt --provider gemini
+    python -m src.generation.batch status
+    python -m src.generation.batch resume --wait
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from dotenv import load_dotenv
+
+from src.design.pdf_designer import PDFDesigner
+from src.generation.content_generator import ContentGenerator, save_content
+from src.generation.prompts import DEVOTIONAL_SYSTEM_PROMPT
+from src.providers.router import Route, Router
+from src.storage.archive import ArchiveStore, DEFAULT_ARCHIVE_PATH
+from src.utils.bible_fetcher import BibleFetcher
+from src.utils.logger import setup_logger
+from src.utils.rate_limit import governed
+from src.utils.scripture_refs import extract_references, MAX_CITED_REFERENCES
+from src.utils.tracing import configure_tracer, span
+from src.utils.workspace import DEFAULT_OUTPUT_ROOT, RunWorkspace
+
+logger = setup_logger("batch")
+
+DEFAULT_BATCH_DIR = os.path.join("output", "batches")
+# Seconds between status checks when resuming with --wait
+POLL_INTERVAL_S = 60.0
+# OpenAI-compatible batch endpoints; Groq mirrors OpenAI's Batch API
+OPENAI_BASE_URLS = {"openai": "https://api.openai.com/v1", "groq": "https://api.groq.com/openai/v1"}
+# Providers finish a batch within this window or expire it
+COMPLETION_WINDOW = "24h"
+HTTP_TIMEOUT_S = 120
+
+# Local job states: waiting on the provider, results downloaded, every item finished
+SUBMITTED, COLLECTED, DONE = "submitted", "collected", "done"
+# Normalized provider states
+RUNNING, SUCCEEDED, FAILED = "running", "succeeded", "failed"
+
+_GEMINI_STATES = {
+    # Partial success still ends the job; the failed requests carry their own errors
+    "JOB_STATE_SUCCEEDED": SUCCEEDED, "JOB_STATE_PARTIALLY_SUCCEEDED": SUCCEEDED,
+    "JOB_STATE_FAILED": FAILED, "JOB_STATE_CANCELLED": FAILED, "JOB_STATE_EXPIRED": FAILED,
+}
+_OPENAI_STATES = {"completed": SUCCEEDED, "failed": FAILED, "expired": FAILED, "cancelled": FAILED}
+
+
+class GeminiBatchBackend:
+    """Gemini batch mode with inlined requests; each request's metadata carries its custom_id."""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        from google import genai
+        from google.genai import types
+        self._types = types
+        http_options = types.HttpOptions(base_url=base_url) if base_url else None
+        self.client = genai.Client(api_key=api_key, http_options=http_options)
+
+    def submit(self, model: str, prompts: List[Tuple[str, str]], display_name: str) -> str:
+        src = [
+            self._types.InlinedRequest(contents=f"{DEVOTIONAL_SYSTEM_PROMPT}\n\n{prompt}", metadata={"key": custom_id})
+            for custom_id, prompt in prompts
+        ]
+        job = governed("gemini", lambda: self.client.batches.create(model=model, src=src,
+                                                                     config={"display_name": display_name}))
+        return job.name
+
+    def poll(self, remote_id: str) -> Tuple[str, Optional[Dict[str, Dict[str, Any]]]]:
+        job = governed("gemini", lambda: self.client.batches.get(name=remote_id))
+        state = _GEMINI_STATES.get(getattr(job.state, "name", str(job.state)), RUNNING)
+        if state == RUNNING:
+            return state, None
+        results = {}
+        # Failed or expired jobs may still carry the responses that did complete
+        for response in (job.dest.inlined_responses or []) if job.dest else []:
+            custom_id = (response.metadata or {}).get("key")
+            if response.error is not None:
+                results[custom_id] = {"error": response.error.message or str(response.error)}
+            else:
+                results[custom_id] = {"text": response.response.text}
+        return state, results
+
+
+class OpenAIBatchBackend:
+    """
+    OpenAI Batch API over plain HTTP (the SDK is optional): the requests are uploaded as a
+    JSONL file, and output and error files are downloaded once the batch is done.
+    """
+
+    def __init__(self, provider: str = "openai", api_key: Optional[str] = None, base_url: Optional[str] = None):
+        self.provider = provider
+        self.base_url = (base_url or OPENAI_BASE_URLS[provider]).rstrip("/")
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        response = governed(self.provider, lambda: self.session.request(
+            method, f"{self.base_url}{path}", timeout=HTTP_TIMEOUT_S, **kwargs))
+        response.raise_for_status()
+        return response
+
+    def submit(self, model: str, prompts: List[Tuple[str, str]], display_name: str) -> str:
+        lines = []
+        for custom_id, prompt in prompts:
+            body = {"model": model, "messages": [
+                {"role": "system", "content": DEVOTIONAL_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ]}
+            if self.provider == "openai":
+                body["response_format"] = {"type": "json_object"}
+            lines.append(json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}))
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+
+        upload = self._request("POST", "/files", data={"purpose": "batch"},
+                               files={"file": (f"{display_name}.jsonl", data, "application/jsonl")}).json()
+        batch = self._request("POST", "/batches", json={
+            "input_file_id": upload["id"], "endpoint": "/v1/chat/completions",
+            "completion_window": COMPLETION_WINDOW, "metadata": {"description": display_name},
+        }).json()
+        return batch["id"]
+
+    def poll(self, remote_id: str) -> Tuple[str, Optional[Dict[str, Dict[str, Any]]]]:
+        batch = self._request("GET", f"/batches/{remote_id}").json()
+        state = _OPENAI_STATES.get(batch.get("status"), RUNNING)
+        if state == RUNNING:
+            return state, None
+        results = {}
+        for file_id in (batch.get("output_file_id"), batch.get("error_file_id")):
+            if not file_id:
+                continue
+            for line in self._request("GET", f"/files/{file_id}/content").text.splitlines():
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                response = row.get("response") or {}
+                if row.get("error") or response.get("status_code") != 200:
+                    error = row.get("error") or response.get("body", {}).get("error") or {}
+                    results[row["custom_id"]] = {"error": error.get("message") or f"HTTP {response.get('status_code')}"}
+                else:
+                    results[row["custom_id"]] = {"text": response["body"]["choices"][0]["message"]["content"]}
+        return state, results
+
+
+def get_backend(provider: str, model: str = "", base_url: Optional[str] = None):
+    """Batch client for `provider`. LLM_BATCH_BASE_URL points every backend at a proxy or stand-in server."""
+    api_key = Route(provider, model).api_key()
+    base_url = base_url or os.getenv("LLM_BATCH_BASE_URL")
+    if provider == "gemini":
+        return GeminiBatchBackend(api_key, base_url)
+    if provider in OPENAI_BASE_URLS:
+        return OpenAIBatchBackend(provider, api_key, f"{base_url.rstrip('/')}/v1" if base_url else None)
+    raise ValueError(f"Provider {provider} has no batch API support")
+
+
+class BatchStore:
+    """One JSON file per job, rewritten atomically after every state change."""
+
+    def __init__(self, directory: str = DEFAULT_BATCH_DIR):
+        self.directory = directory
+
+    def path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def save(self, job: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        job["updated_at"] = _now()
+        tmp = self.path(job["id"]) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(job, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path(job["id"]))
+
+    def load(self, job_id: str) -> Dict[str, Any]:
+        with open(self.path(job_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.directory):
+            return []
+        jobs = [self.load(name[:-len(".json")]) for name in os.listdir(self.directory) if name.endswith(".json")]
+        return sorted(jobs, key=lambda job: job["created_at"])
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        return [job for job in self.jobs() if job["state"] != DONE]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def submit(transcripts: List[Dict[str, Any]], provider: str, model: str, bible_versions: List[str],
+           store: BatchStore, backend=None, compact: bool = False, logo: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Submits one batch job generating a guide per transcript and persists it.
+    Each transcript is {"transcript_path", "series"?, "preacher"?}.
+    """
+    if not transcripts:
+        raise ValueError("Nothing to submit")
+    job_id = f"{datetime.now(timezone.utc):%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+    items, prompts = [], []
+    for n, entry in enumerate(transcripts):
+        with open(entry["transcript_path"], "r", encoding="utf-8") as f:
+            transcript_text = f.read()
+        cited = extract_references(transcript_text, limit=MAX_CITED_REFERENCES)
+        custom_id = f"item-{n}"
+        prompts.append((custom_id, ContentGenerator.build_prompt(transcript_text, cited)))
+        items.append({
+            "custom_id": custom_id, "transcript_path": os.path.abspath(entry["transcript_path"]),
+            "series": entry.get("series"), "preacher": entry.get("preacher", ""), "cited_references": cited,
+            "status": "pending", "response": None, "error": None, "artifacts": {},
+        })
+
+    backend = backend or get_backend(provider, model)
+    with span("batch.submit", provider=provider, model=model, requests=len(items)) as s:
+        remote_id = backend.submit(model, prompts, f"study-guides-{job_id}")
+        s.set_attribute("remote_id", remote_id)
+
+    job = {
+        "id": job_id, "provider": provider, "model": model, "remote_id": remote_id, "state": SUBMITTED,
+        "remote_state": RUNNING, "created_at": _now(), "bible_versions": list(dict.fromkeys(bible_versions)),
+        "compact": compact, "logo": logo, "items": items,
+    }
+    store.save(job)
+    logger.info(f"Submitted batch {job_id} ({len(items)} guide(s)) to {provider} as {remote_id}")
+    return job
+
+
+def resume(job: Dict[str, Any], store: BatchStore, backend=None, archive: Optional[ArchiveStore] = None,
+           bible_fetcher: Optional[BibleFetcher] = None, output_root: str = DEFAULT_OUTPUT_ROOT) -> Dict[str, Any]:
+    """
+    Moves a job as far as it can go: polls the provider once while it is running,
+    downloads the results when it is done, then finishes every pending item. Progress
+    is saved after each step, so an interrupted resume picks up where it stopped.
+    Each finished item is a run of its own under `output_root` (see RunWorkspace).
+    """
+    if job["state"] == SUBMITTED:
+        backend = backend or get_backend(job["provider"], job["model"])
+        with span("batch.poll", provider=job["provider"], remote_id=job["remote_id"]) as s:
+            state, results = backend.poll(job["remote_id"])
+            s.set_attribute("state", state)
+        job["remote_state"] = state
+        if state == RUNNING:
+            store.save(job)
+            logger.info(f"Batch {job['id']} is still running")
+            return job
+        for item in job["items"]:
+            result = (results or {}).get(item["custom_id"]) or {"error": f"No result returned (batch {state})"}
+            item["response"], item["error"] = result.get("text"), result.get("error")
+        job["state"] = COLLECTED
+        store.save(job)
+
+    if job["state"] == COLLECTED:
+        pending = [item for item in job["items"] if item["status"] == "pending"]
+        bible_fetcher = bible_fetcher or BibleFetcher()
+        references = [ref for item in pending if item["response"] for ref in item["cited_references"]]
+        if references:
+            bible_fetcher.prefetch(list(dict.fromkeys(references)), job["bible_versions"])
+        for item in pending:
+            _finish_item(job, item, bible_fetcher, archive, output_root)
+            store.save(job)
+        job["state"] = DONE
+        store.save(job)
+        failed = sum(1 for item in job["items"] if item["status"] == "failed")
+        logger.info(f"Batch {job['id']} finished: {len(job['items']) - failed} guide(s) written, {failed} failed")
+    return job
+
+
+def _finish_item(job: Dict[str, Any], item: Dict[str, Any], bible_fetcher: BibleFetcher,
+                 archive: Optional[ArchiveStore], output_root: str):
+    """Takes one batch result through the same steps as a synchronous run, in its own workspace"""
+    if item["error"] or not item["response"]:
+        item["status"] = "failed"
+        logger.error(f"Batch {job['id']} {item['custom_id']} failed: {item['error']}")
+        return
+
+    workspace = RunWorkspace(output_root)
+    logger.info(f"Batch {job['id']} {item['custom_id']} writes to {workspace.directory}")
+    # Results are already generated: the route only names the provider and model, no client is made
+    generator = ContentGenerator(bible_fetcher=bible_fetcher, router=Router([Route(job["provider"], job["model"])]),
+                                 output_dir=workspace.directory)
+    with span("batch.finish", custom_id=item["custom_id"], run_id=workspace.run_id, versions=len(job["bible_versions"])):
+        try:
+            with open(item["transcript_path"], "r", encoding="utf-8") as f:
+                transcript_text = f.read()
+            base_content = generator.content_from_response(item["response"], transcript_text)
+            if item["series"] or not base_content.series_title:
+                base_content.series_title = item["series"] or "Sermon Series"
+            base_content.preacher_name = item["preacher"]
+
+            versions = generator.enrich_for_versions(base_content, job["bible_versions"])
+            multi = len(versions) > 1
+            series_key = (base_content.series_title or 'study_guide').replace(' ', '_')
+            base_name = workspace.path(series_key)
+            artifacts = {}
+            for version, guide in versions.items():
+                suffix = f"_{version}" if multi else ""
+                output_pdf = f"{base_name}{suffix}.pdf"
+                content_path = save_content(guide, generator.output_dir, suffix)
+                designer = PDFDesigner(compact=job["compact"])
+                designer.create_pdf(guide, output_pdf, job["logo"])
+                artifacts[version] = {"content_path": content_path, "pdf_path": output_pdf}
+                logger.info(f"Study Guide available at: {output_pdf}")
+        except Exception as e:
+            item["status"], item["error"] = "failed", str(e)
+            logger.error(f"Batch {job['id']} {item['custom_id']} failed: {e}")
+            return
+
+    item["status"], item["artifacts"] = "done", artifacts
+    try:
+        workspace.publish(series_key, artifacts, source=item["transcript_path"], batch=job["id"])
+    except OSError as e:
+        logger.warning(f"Updating the latest index failed: {e}")
+    if archive:
+        try:
+            archive.ingest(transcript_text, versions, source=item["transcript_path"],
+                           transcript_path=item["transcript_path"], artifacts=artifacts)
+        except Exception as e:
+            logger.warning(f"Archiving failed: {e}")
+
+
+def main(argv=None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Generate study guides through provider batch APIs")
+    parser.add_argument("--batch-dir", default=DEFAULT_BATCH_DIR, help="Where batch jobs are persisted")
+    parser.add_argument("--trace-file", default=os.path.join("logs", "trace.jsonl"), help="JSON-lines file that receives the spans")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit_cmd = commands.add_parser("submit", help="Submit one batch job for a set of transcripts")
+    submit_cmd.add_argument("transcripts", nargs="+", help="Transcript text files (e.g. output/runs/*/*_transcript.txt)")
+    submit_cmd.add_argument("--provider", default=os.getenv("LLM_PROVIDER", "gemini"), choices=["gemini", "openai", "groq"])
+    submit_cmd.add_argument("--model", default=os.getenv("LLM_MODEL"), help="Model name (default: LLM_MODEL)")
+    submit_cmd.add_argument("--series", help="Series title for every guide (default: the one the model proposes)")
+    submit_cmd.add_argument("--preacher", default="", help="Name of the Preacher")
+    submit_cmd.add_argument("--bible-version", nargs="+", default=["kjv"], choices=["kjv", "web", "rvr"])
+    submit_cmd.add_argument("--logo", help="Path to church logo for PDF branding")
+    submit_cmd.add_argument("--compact", action="store_true", help="Smaller PDFs")
+
+    commands.add_parser("status", help="List batch jobs")
+
+    resume_cmd = commands.add_parser("resume", help="Poll jobs and write the guides of finished ones")
+    resume_cmd.add_argument("jobs", nargs="*", help="Job ids (default: every unfinished job)")
+    resume_cmd.add_argument("--wait", action="store_true", help="Keep polling until the jobs are done")
+    resume_cmd.add_argument("--poll-interval", type=float, default=POLL_INTERVAL_S, help="Seconds between polls with --wait")
+    resume_cmd.add_argument("--archive", default=DEFAULT_ARCHIVE_PATH, help="SQLite archive for the finished runs")
+    resume_cmd.add_argument("--no-archive", action="store_true", help="Do not archive finished runs")
+    resume_cmd.add_argument("--output-dir", default=DEFAULT_OUTPUT_ROOT,
+                            help="Each finished guide writes to <output-dir>/runs/<run id>/; <output-dir>/latest.json indexes them")
+
+    args = parser.parse_args(argv)
+    store = BatchStore(args.batch_dir)
+
+    if args.command == "status":
+        for job in store.jobs():
+            done = sum(1 for item in job["items"] if item["status"] == "done")
+            print(f"{job['id']}  {job['provider']}/{job['model']}  {job['state']:<9} "
+                  f"(provider: {job['remote_state']})  {done}/{len(job['items'])} written")
+        return
+
+    tracer = configure_tracer()
+    try:
+        if args.command == "submit":
+            if not args.model:
+                print("Set --model or LLM_MODEL", file=sys.stderr)
+                sys.exit(2)
+            entries = [{"transcript_path": path, "series": args.series, "preacher": args.preacher} for path in args.transcripts]
+            with tracer.span("batch", command="submit", provider=args.provider):
+                job = submit(entries, args.provider, args.model, args.bible_version, store,
+                             compact=args.compact, logo=args.logo)
+            print(f"Submitted batch job {job['id']} ({len(job['items'])} guide(s)); "
+                  f"run `python -m src.generation.batch resume` to collect it")
+            return
+
+        jobs = [store.load(job_id) for job_id in args.jobs] if args.jobs else store.unfinished()
+        archive = None if args.no_archive else ArchiveStore(args.archive)
+        try:
+            while True:
+                with tracer.span("batch", command="resume", jobs=len(jobs)):
+                    jobs = [resume(job, store, archive=archive, output_root=args.output_dir) for job in jobs]
+                jobs = [job for job in jobs if job["state"] != DONE]
+                if not jobs or not args.wait:
+                    break
+                time.sleep(args.poll_interval)
+        finally:
+            if archive:
+                archive.close()
+        if jobs:
+            print(f"{len(jobs)} job(s) still running")
+    finally:
+        tracer.export_jsonl(args.trace_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,118 +1,381 @@
-import json
+import contextvars
 import re
 import os
-from typing import Dict, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Set
 from src.providers.llm_factory import get_llm_client
-from src.generation.prompts import DEVOTIONAL_SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
+from src.providers.router import Route, Router
+from src.providers.prompt_cache import caching_enabled, get_gemini_cache
+from src.generation.prompts import DEVOTIONAL_SYSTEM_PROMPT, USER_PROMPT_TEMPLATE, REFERENCE_HINTS_TEMPLATE
 from src.utils.logger import setup_logger
 from src.utils.bible_fetcher import BibleFetcher
+from src.generation.models import Guide, loads, write_guide
+from src.generation.quote_index import recheck_scripture_quotes, verify_quotes
+from src.utils.tracing import span
+from src.utils.cassette import replayable, scalar_fields
+from src.utils.rate_limit import governed
+from src.utils.workspace import DEFAULT_OUTPUT_ROOT
+
+GEMINI_USAGE_FIELDS = ("prompt_token_count", "candidates_token_count", "cached_content_token_count")
+OPENAI_USAGE_FIELDS = ("prompt_tokens", "completion_tokens")
+
+# Token budget charged to the rate limiter before a call; corrected from the reported usage
+CHARS_PER_TOKEN = 4
+OUTPUT_TOKENS_ESTIMATE = 2500
+# Routes tried per request (best first) before giving up
+MAX_ROUTE_ATTEMPTS = 2
 
 logger = setup_logger("content_generator")
 
+
+def enrich_scriptures(guide: Guide, version: str, bible_fetcher: BibleFetcher,
+                      only: Optional[Set[str]] = None):
+    """
+    Fetches scripture text for each day and memory verse using BibleFetcher.
+    With `only`, references outside that set are left as they are.
+    """
+    logger.info(f"Fetching scripture texts (Version: {version.upper()})...")
+    
+    # Enrich Memory Verse
+    memory_verse = guide.memory_verse
+    mv_ref = memory_verse.reference
+    if mv_ref:
+        if only is None or mv_ref in only:
+            text = bible_fetcher.get_scripture(mv_ref, version)
+            if text:
+                memory_verse.text = f"{mv_ref} ({version.upper()}):\n{text}"
+            else:
+                memory_verse.text = f"{mv_ref} (Text not found)"
+    else:
+        # Backward compatibility if LLM outputs old key or fails
+        if memory_verse.text is None:
+             memory_verse.text = "Memory verse not available"
+
+    # Enrich Daily Scriptures
+    for day in guide.days:
+        scripture = day.scripture
+        ref = scripture.reference
+        # If scripture_reference is missing, check if 'scripture' exists and use it as reference
+        if not ref and scripture.text is not None:
+             ref = scripture.text
+             
+        if ref and only is not None and ref not in only:
+            continue
+        if ref:
+            text = bible_fetcher.get_scripture(ref, version)
+            if text:
+                scripture.text = f"{ref} ({version.upper()}): \"{text}\""
+            else:
+                # Fallback: keep existing or mark as unavailable
+                if not scripture.text:
+                     scripture.text = f"{ref} (Text not found)"
+        else:
+            logger.warning(f"No scripture reference found for Day {day.day}")
+
+    # A reflection quoting the day's scripture word for word was not found in the transcript
+    for result in recheck_scripture_quotes(guide):
+        logger.info(f"Quote in {result['field']} is scripture ({result['scripture']}), not invented: {result['quote']}")
+
+
+def save_content(guide: Guide, output_dir: str, suffix: str = "") -> str:
+    """Saves a guide as <series title><suffix>_content.json in `output_dir`; returns the path"""
+    # Use series title or generic name for filename
+    safe_title = "".join([c for c in guide.series_title or "devotional" if c.isalnum() or c in (' ', '-', '_')]).strip()
+    filename = f"{safe_title.replace(' ', '_')}{suffix}_content.json"
+    path = os.path.join(output_dir, filename)
+    
+    write_guide(path, guide)
+    
+    logger.info(f"Saved generated content to {path}")
+    return path
+
+
 class ContentGenerator:
-    def __init__(self):
-        self.client, self.provider = get_llm_client()
-        self.bible_fetcher = BibleFetcher()
-        logger.info(f"Initialized ContentGenerator with provider: {self.provider}")
+    def __init__(self, bible_fetcher: Optional[BibleFetcher] = None, router: Optional[Router] = None,
+                 output_dir: str = DEFAULT_OUTPUT_ROOT):
+        # With a router, provider and model are picked per request; otherwise LLM_PROVIDER / LLM_MODEL
+        self.router = router
+        self.model: Optional[str] = None
+        self._clients: Dict[str, Any] = {}
+        if router is None:
+            self.client, self.provider = get_llm_client()
+        else:
+            self.client, self.provider = None, None
+        # A fetcher passed in may already be warm with the verses cited in the sermon
+        self.bible_fetcher = bible_fetcher or BibleFetcher()
+        # Content JSON goes here, e.g. a run's workspace directory
+        self.output_dir = output_dir
+        logger.info(f"Initialized ContentGenerator with provider: {self.provider or 'routed'}")
 
-    def generate_content(self, transcript_text: str, bible_version: str = "kjv") -> Dict[str, Any]:
+    def generate_content(self, transcript_text: str, bible_version: str = "kjv") -> Guide:
         """
         Generates devotional content from transcript text.
         """
-        if not transcript_text:
-            raise ValueError("Transcript text cannot be empty")
-
-        prompt = USER_PROMPT_TEMPLATE.format(transcript=transcript_text)
-        
+        guide = self.generate_base_content(transcript_text)
         try:
-            response_text = self._call_llm(prompt)
-            parsed_json = self._parse_json_response(response_text)
-            self._validate_schema(parsed_json)
-            
             # Enrich with actual scripture text
-            self._enrich_scriptures(parsed_json, bible_version)
+            self._enrich_scriptures(guide, bible_version)
             
             # Save output
-            self._save_output(parsed_json)
+            self._save_output(guide)
             
-            return parsed_json
+            return guide
             
         except Exception as e:
             logger.error(f"Content generation failed: {e}")
             raise
 
-    def _enrich_scriptures(self, data: Dict[str, Any], version: str):
-        """Fetches scripture text for each day and memory verse using BibleFetcher"""
-        logger.info(f"Fetching scripture texts (Version: {version.upper()})...")
+    def generate_base_content(self, transcript_text: str, cited_references: Optional[List[str]] = None) -> Guide:
+        """
+        Runs the LLM once and returns the validated guide with scripture references
+        only, so it can be enriched for any number of Bible versions.
+        `cited_references` (found in the transcript) are passed to the LLM as hints.
+        """
+        prompt = self.build_prompt(transcript_text, cited_references)
         
-        # Enrich Memory Verse
-        mv_ref = data.get("memory_verse_reference")
-        if mv_ref:
-            text = self.bible_fetcher.get_scripture(mv_ref, version)
-            if text:
-                data["memory_verse"] = f"{mv_ref} ({version.upper()}):\n{text}"
-            else:
-                data["memory_verse"] = f"{mv_ref} (Text not found)"
-        else:
-            # Backward compatibility if LLM outputs old key or fails
-            if "memory_verse" not in data:
-                 data["memory_verse"] = "Memory verse not available"
-
-        # Enrich Daily Scriptures
-        for day in data.get("days", []):
-            ref = day.get("scripture_reference")
-            # If scripture_reference is missing, check if 'scripture' exists and use it as reference
-            if not ref and "scripture" in day:
-                 ref = day["scripture"]
-                 
-            if ref:
-                text = self.bible_fetcher.get_scripture(ref, version)
-                if text:
-                    day["scripture"] = f"{ref} ({version.upper()}): \"{text}\""
-                else:
-                    # Fallback: keep existing or mark as unavailable
-                    if "scripture" not in day or not day["scripture"]:
-                         day["scripture"] = f"{ref} (Text not found)"
-            else:
-                logger.warning(f"No scripture reference found for Day {day.get('day')}")
+        try:
+            response_text = self._generate(prompt)
+            return self.content_from_response(response_text, transcript_text)
+            
+        except Exception as e:
+            logger.error(f"Content generation failed: {e}")
+            raise
+
+    @staticmethod
+    def build_prompt(transcript_text: str, cited_references: Optional[List[str]] = None) -> str:
+        """User prompt for one transcript (the system prompt is added per provider)"""
+        if not transcript_text:
+            raise ValueError("Transcript text cannot be empty")
+
+        prompt = USER_PROMPT_TEMPLATE.format(transcript=transcript_text)
+        if cited_references:
+            prompt += REFERENCE_HINTS_TEMPLATE.format(references="; ".join(cited_references))
+        return prompt
+
+    def content_from_response(self, response_text: str, transcript_text: str) -> Guide:
+        """Parses, validates and quote-checks raw LLM output, however it was obtained"""
+        guide = self._validate_schema(self._parse_json_response(response_text))
+        self._verify_quotes(guide, transcript_text)
+        return guide
+
+    def enrich_for_versions(self, content: Guide, versions: List[str]) -> Dict[str, Guide]:
+        """
+        Fans one generated guide out to several Bible versions. Each version gets its own
+        copy of `content`; scripture fetches for different versions run in parallel.
+        Returns {version: enriched guide} in the order given.
+        """
+        versions = list(dict.fromkeys(versions))
+        content = Guide.coerce(content)
+
+        def enrich(version: str) -> Guide:
+            guide = content.copy()
+            self._enrich_scriptures(guide, version)
+            return guide
+
+        if len(versions) == 1:
+            return {versions[0]: enrich(versions[0])}
+
+        with ThreadPoolExecutor(max_workers=len(versions)) as pool:
+            # copy_context keeps the scripture spans under the caller's span
+            futures = [pool.submit(contextvars.copy_context().run, enrich, version) for version in versions]
+            return {version: future.result() for version, future in zip(versions, futures)}
+
+    def _enrich_scriptures(self, guide: Guide, version: str):
+        """Fetches scripture text for each day and memory verse using BibleFetcher"""
+        enrich_scriptures(guide, version, self.bible_fetcher)
+
+    def _generate(self, prompt: str) -> str:
+        """Calls the LLM directly, or along the router's ranked routes until one succeeds"""
+        if self.router is None:
+            return self._call_llm(prompt)
+
+        decision = self.router.choose((len(DEVOTIONAL_SYSTEM_PROMPT) + len(prompt)) // CHARS_PER_TOKEN)
+        last_error: Optional[Exception] = None
+        for route in decision.ranked[:MAX_ROUTE_ATTEMPTS]:
+            self._use_route(route)
+            started = time.perf_counter()
+            try:
+                text = self._call_llm(prompt)
+            except Exception as e:
+                self.router.record(route.provider, route.model, time.perf_counter() - started, False)
+                logger.warning(f"LLM route {route} failed: {e}")
+                last_error = e
+                continue
+            self.router.record(route.provider, route.model, time.perf_counter() - started, True)
+            return text
+        raise last_error
+
+    def _use_route(self, route: Route):
+        if route.provider not in self._clients:
+            self._clients[route.provider] = get_llm_client(route.provider, route.api_key())[0]
+        self.client, self.provider, self.model = self._clients[route.provider], route.provider, route.model
 
     def _call_llm(self, user_prompt: str) -> str:
         """Dispatches call to specific LLM provider"""
         logger.info(f"Sending request to {self.provider}...")
         
-        model_name = os.getenv('LLM_MODEL')
+        model_name = self.model or os.getenv('LLM_MODEL')
         if not model_name:
             raise ValueError("LLM_MODEL must be set in .env file")
         
-        if self.provider == 'gemini':
-            # Google Gen AI SDK (v1.0+ / Unified SDK)
-            # Client is initialized in factory, but we need to pass model name here
-            
-            full_prompt = f"{DEVOTIONAL_SYSTEM_PROMPT}\n\n{user_prompt}"
-            
-            # New SDK usage: client.models.generate_content
-            response = self.client.models.generate_content(
-                model=model_name,
-                contents=full_prompt
-            )
-            return response.text
-
-        elif self.provider in ['openai', 'openrouter', 'groq']:
-            # OpenAI-compatible APIs
-            response = self.client.chat.completions.create(
-                model=model_name,
-                messages=[
+        estimated_tokens = (len(DEVOTIONAL_SYSTEM_PROMPT) + len(user_prompt)) // CHARS_PER_TOKEN + OUTPUT_TOKENS_ESTIMATE
+
+        with span("llm.call", provider=self.provider, model=model_name, prompt_chars=len(user_prompt)) as s:
+            timing: Dict[str, float] = {}
+            if self.provider == 'gemini':
+                # Google Gen AI SDK (v1.0+ / Unified SDK)
+                # Client is initialized in factory, but we need to pass model name here
+                response = replayable(
+                    # Same key as when the system prompt was sent inline, so earlier cassettes still replay
+                    "llm", {"provider": self.provider, "model": model_name, "contents": f"{DEVOTIONAL_SYSTEM_PROMPT}\n\n{user_prompt}"},
+                    lambda: governed(
+                        self.provider,
+                        lambda: self._gemini_generate(model_name, user_prompt, s, timing),
+                        tokens=estimated_tokens,
+                        actual_tokens=lambda r: self._total_tokens(
+                            getattr(r, "usage_metadata", None), "prompt_token_count", "candidates_token_count"),
+                    ),
+                    encode=self._encode_gemini, decode=self._decode_gemini,
+                )
+                usage = getattr(response, "usage_metadata", None)
+                self._record_usage(s, usage, "prompt_token_count", "candidates_token_count",
+                                   getattr(usage, "cached_content_token_count", None), timing)
+                return response.text
+
+            elif self.provider in ['openai', 'openrouter', 'groq']:
+                # OpenAI-compatible APIs. The fixed system prompt leads every request so the
+                # providers' automatic prefix caching can serve it; only the user turn varies.
+                messages = [
                     {"role": "system", "content": DEVOTIONAL_SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"} if self.provider == 'openai' else None 
-                # Groq/OpenRouter might not support response_format="json_object" identically in all models, 
-                # but we instruct JSON in prompt.
-            )
-            return response.choices[0].message.content
-            
-        else:
-            raise ValueError(f"Provider {self.provider} not implemented in generation logic")
+                ]
+
+                def create():
+                    started = time.perf_counter()
+                    response = self.client.chat.completions.create(
+                        model=model_name,
+                        messages=messages,
+                        response_format={"type": "json_object"} if self.provider == 'openai' else None
+                        # Groq/OpenRouter might not support response_format="json_object" identically in all models,
+                        # but we instruct JSON in prompt.
+                    )
+                    timing["latency_s"] = time.perf_counter() - started
+                    return response
+
+                response = replayable(
+                    "llm", {"provider": self.provider, "model": model_name, "messages": messages},
+                    lambda: governed(
+                        self.provider,
+                        create,
+                        tokens=estimated_tokens,
+                        actual_tokens=lambda r: self._total_tokens(getattr(r, "usage", None), "prompt_tokens", "completion_tokens"),
+                    ),
+                    encode=self._encode_openai, decode=self._decode_openai,
+                )
+                usage = getattr(response, "usage", None)
+                self._record_usage(s, usage, "prompt_tokens", "completion_tokens", self._openai_cached_tokens(usage), timing)
+                return response.choices[0].message.content
+
+            else:
+                raise ValueError(f"Provider {self.provider} not implemented in generation logic")
+
+    def _gemini_generate(self, model_name: str, user_prompt: str, s, timing: Dict[str, float]):
+        """
+        The system prompt goes in an explicit context cache when the model supports one,
+        else as the system instruction; either way only the user prompt is sent as contents.
+        """
+        from google.genai import types, errors
+
+        cache = get_gemini_cache()
+        cache_name = cache.get(self.client, model_name, DEVOTIONAL_SYSTEM_PROMPT) if caching_enabled() else None
+        if cache_name:
+            started = time.perf_counter()
+            try:
+                response = self.client.models.generate_content(
+                    model=model_name, contents=user_prompt, config=types.GenerateContentConfig(cached_content=cache_name),
+                )
+                timing["latency_s"] = time.perf_counter() - started
+                s.set_attribute("prompt_cache", cache_name)
+                return response
+            except errors.ClientError as e:
+                if e.code not in (403, 404):
+                    raise
+                # Deleted or expired on the provider's side before our TTL ran out
+                logger.warning(f"Context cache {cache_name} is gone ({e}); sending the system prompt uncached")
+                cache.invalidate(self.client, model_name, DEVOTIONAL_SYSTEM_PROMPT)
+
+        started = time.perf_counter()
+        response = self.client.models.generate_content(
+            model=model_name, contents=user_prompt,
+            config=types.GenerateContentConfig(system_instruction=DEVOTIONAL_SYSTEM_PROMPT),
+        )
+        timing["latency_s"] = time.perf_counter() - started
+        return response
+
+    @staticmethod
+    def _record_usage(s, usage, input_field: str, output_field: str, cached_tokens: Optional[int] = None,
+                      timing: Optional[Dict[str, float]] = None):
+        """
+        Copies provider token counts onto the LLM span (skips fields the SDK did not fill in),
+        with the input split into tokens served from the prompt cache and uncached ones, and
+        the provider call's latency (without rate-limit waits; absent on cassette replay).
+        """
+        if timing and "latency_s" in timing:
+            s.set_attribute("latency_s", round(timing["latency_s"], 3))
+        if usage is None:
+            return
+        for attr, field in (("input_tokens", input_field), ("output_tokens", output_field)):
+            value = getattr(usage, field, None)
+            if isinstance(value, int):
+                s.set_attribute(attr, value)
+        input_tokens = getattr(usage, input_field, None)
+        if isinstance(input_tokens, int):
+            # Providers leave the cached count out when nothing was served from cache
+            cached = cached_tokens if isinstance(cached_tokens, int) else 0
+            s.set_attributes(cached_input_tokens=cached, uncached_input_tokens=input_tokens - cached)
+            latency = f" in {timing['latency_s']:.1f}s" if timing and "latency_s" in timing else ""
+            logger.info(f"LLM input: {cached} of {input_tokens} tokens from the prompt cache{latency}")
+
+    @staticmethod
+    def _openai_cached_tokens(usage) -> Optional[int]:
+        """`usage.prompt_tokens_details.cached_tokens`, or the flattened field of a replayed response"""
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None)
+        if isinstance(cached, int):
+            return cached
+        cached = getattr(usage, "cached_tokens", None)
+        return cached if isinstance(cached, int) else None
+
+    @staticmethod
+    def _total_tokens(usage, input_field: str, output_field: str) -> Optional[int]:
+        """Input plus output tokens reported by the provider, if it reported both"""
+        values = [getattr(usage, field, None) for field in (input_field, output_field)]
+        return sum(values) if all(isinstance(v, int) for v in values) else None
+
+    # Cassette (de)serialization of provider responses: keep only text and token usage
+
+    @staticmethod
+    def _encode_gemini(response) -> Dict[str, Any]:
+        return {"text": response.text, "usage": scalar_fields(getattr(response, "usage_metadata", None), GEMINI_USAGE_FIELDS)}
+
+    @staticmethod
+    def _decode_gemini(payload: Dict[str, Any]):
+        return SimpleNamespace(text=payload["text"], usage_metadata=SimpleNamespace(**payload["usage"]))
+
+    @staticmethod
+    def _encode_openai(response) -> Dict[str, Any]:
+        return {
+            "content": response.choices[0].message.content,
+            "usage": {**scalar_fields(getattr(response, "usage", None), OPENAI_USAGE_FIELDS),
+                      "cached_tokens": ContentGenerator._openai_cached_tokens(getattr(response, "usage", None))},
+        }
+
+    @staticmethod
+    def _decode_openai(payload: Dict[str, Any]):
+        message = SimpleNamespace(content=payload["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=SimpleNamespace(**payload["usage"]))
 
     def _parse_json_response(self, response_text: str) -> Dict[str, Any]:
         """Extracts and parses JSON from response text"""
@@ -120,55 +383,32 @@ class ContentGenerator:
         cleaned_text = re.sub(r'```json\s*|\s*```', '', response_text).strip()
         
         try:
-            return json.loads(cleaned_text)
-        except json.JSONDecodeError:
+            return loads(cleaned_text)
+        except ValueError:
             logger.error("Failed to parse JSON response. Raw text logged.")
             logger.debug(cleaned_text)
             raise ValueError("LLM did not return valid JSON")
 
-    def _validate_schema(self, data: Dict[str, Any]):
-        """Simple schema validation"""
-        # Note: 'memory_verse' changed to 'memory_verse_reference' in new schema
-        required_keys = ["series_title", "days", "key_quotes"] 
-        for key in required_keys:
-            if key not in data:
-                raise ValueError(f"Missing required key in JSON: {key}")
-        
-        # Check for memory verse reference or legacy memory verse
-        if "memory_verse_reference" not in data and "memory_verse" not in data:
-             raise ValueError("Missing memory_verse_reference in JSON")
-        
-        if not isinstance(data["days"], list):
-            raise ValueError("'days' must be a list")
-            
-        # Validate day structure
-        for i, day in enumerate(data["days"]):
-            if "question" not in day and "questions" not in day:
-                 raise ValueError(f"Day {i+1} missing 'question' field")
-            
-            # Normalize to 'question' if 'questions' is present (legacy/LLM slip)
-            if "questions" in day and isinstance(day["questions"], list) and day["questions"]:
-                if "question" not in day:
-                    day["question"] = day["questions"][0] # Take first question
-            
+    def _verify_quotes(self, guide: Guide, transcript_text: str):
+        """Attaches transcript match spans and scores to each quote and flags invented ones"""
+        with span("quotes.verify") as s:
+            results = verify_quotes(guide, transcript_text)
+            invented = [r for r in results if r["invented"]]
+            s.set_attributes(quotes=len(results), invented=len(invented))
+        for r in invented:
+            logger.warning(f"Quote not found in transcript ({r['field']}, score {r['score']}): {r['quote']}")
+        guide.quote_verification = results
+
+    def _validate_schema(self, data: Dict[str, Any]) -> Guide:
+        """Checks the LLM's JSON and returns it as a normalized Guide"""
+        guide = Guide.from_dict(data, strict=True)
         # Requirement: 6 days (or 5 days + cover, but prompt asks for 6 days)
         # Prompt says: "Create a structured 6-day guide"
-        if len(data["days"]) < 5: 
+        if len(guide.days) < 5: 
              # Allow 5 or 6, just warn if low.
-             logger.warning(f"Generated {len(data['days'])} days. Expected 6.")
+             logger.warning(f"Generated {len(guide.days)} days. Expected 6.")
+        return guide
 
-    def _save_output(self, data: Dict[str, Any]):
+    def _save_output(self, guide: Guide, suffix: str = ""):
         """Saves generated content to output directory"""
-        output_dir = "output"
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            
-        # Use series title or generic name for filename
-        safe_title = "".join([c for c in data.get("series_title", "devotional") if c.isalnum() or c in (' ', '-', '_')]).strip()
-        filename = f"{safe_title.replace(' ', '_')}_content.json"
-        path = os.path.join(output_dir, filename)
-        
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-        
-        logger.info(f"Saved generated content to {path}")
+        return save_content(guide, self.output_dir, suffix)
@@ -0,0 +1,205 @@
+"""
+Typed model of a study guide as it moves through the pipeline: generated, enriched per
+Bible version, rendered, saved and archived.
+
+`Guide.from_dict` is the one place raw JSON (LLM output, saved content files, archived
+guides) is checked and normalized, e.g. a legacy `questions` list becomes `question`.
+`to_dict` gives back the JSON shape the content files have always had, so files written
+before the model existed still load. orjson is used for (de)serialization when installed.
+"""
+import json
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional speedup; the stdlib writes the same documents
+    orjson = None
+
+from src.utils.workspace import atomic_write
+
+REQUIRED_KEYS = ("series_title", "days", "key_quotes")
+_GUIDE_KEYS = frozenset(REQUIRED_KEYS + ("memory_verse_reference", "memory_verse", "preacher_name", "quote_verification"))
+_DAY_KEYS = frozenset(("day", "title", "scripture_reference", "scripture", "reflection", "question", "prayer"))
+
+
+def dumps(data: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """UTF-8 JSON of plain data, laid out the same with or without orjson"""
+    if orjson:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, indent=2 if indent else None, separators=None if indent else (",", ":"),
+                      sort_keys=sort_keys, ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+class ScriptureRef:
+    """A Bible reference and, once enriched, its text as printed: 'John 3:16 (KJV): ...'"""
+    __slots__ = ("reference", "text")
+
+    def __init__(self, reference: Optional[str] = None, text: Optional[str] = None):
+        self.reference = reference
+        self.text = text
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, ScriptureRef) and (self.reference, self.text) == (other.reference, other.text)
+
+    def __repr__(self) -> str:
+        return f"ScriptureRef({self.reference!r}, {self.text!r})"
+
+
+class Day:
+    """One day of a guide. Keys the model does not know are kept in `extra`."""
+    __slots__ = ("day", "title", "scripture", "reflection", "question", "prayer", "extra")
+
+    def __init__(self, day: Any = None, title: str = "", scripture: Optional[ScriptureRef] = None,
+                 reflection: str = "", question: Optional[str] = None, prayer: str = "",
+                 extra: Optional[Dict[str, Any]] = None):
+        self.day = day
+        self.title = title
+        self.scripture = scripture or ScriptureRef()
+        self.reflection = reflection
+        self.question = question
+        self.prayer = prayer
+        self.extra = extra or {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], number: int, strict: bool = False) -> "Day":
+        question = data.get("question")
+        if not question:
+            # Legacy/LLM slip: a list of questions (or one under the plural key); the guide has room for one
+            questions = data.get("questions")
+            if isinstance(questions, list) and questions:
+                question = questions[0]
+            elif isinstance(questions, str):
+                question = questions
+        if strict and "question" not in data and "questions" not in data:
+            raise ValueError(f"Day {number} missing 'question' field")
+        return cls(
+            day=data.get("day"),
+            title=data.get("title") or "",
+            scripture=ScriptureRef(data.get("scripture_reference"), data.get("scripture")),
+            reflection=data.get("reflection") or "",
+            question=question,
+            prayer=data.get("prayer") or "",
+            extra={k: v for k, v in data.items() if k not in _DAY_KEYS},
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"day": self.day} if self.day is not None else {}
+        data["title"] = self.title
+        if self.scripture.reference is not None:
+            data["scripture_reference"] = self.scripture.reference
+        if self.scripture.text is not None:
+            data["scripture"] = self.scripture.text
+        data.update(reflection=self.reflection, question=self.question, prayer=self.prayer)
+        data.update(self.extra)
+        return data
+
+    def copy(self) -> "Day":
+        return Day(self.day, self.title, ScriptureRef(self.scripture.reference, self.scripture.text),
+                   self.reflection, self.question, self.prayer, dict(self.extra))
+
+
+class Guide:
+    """A generated study guide. Keys the model does not know are kept in `extra`."""
+    __slots__ = ("series_title", "memory_verse", "days", "key_quotes", "preacher_name", "quote_verification", "extra")
+
+    def __init__(self, series_title: str = "", memory_verse: Optional[ScriptureRef] = None,
+                 days: Optional[List[Day]] = None, key_quotes: Optional[List[str]] = None,
+                 preacher_name: Optional[str] = None, quote_verification: Optional[List[Dict[str, Any]]] = None,
+                 extra: Optional[Dict[str, Any]] = None):
+        self.series_title = series_title
+        self.memory_verse = memory_verse or ScriptureRef()
+        self.days = days or []
+        self.key_quotes = key_quotes or []
+        self.preacher_name = preacher_name
+        # Filled by the quote check: one result per quote (see quote_index.verify_quotes)
+        self.quote_verification = quote_verification
+        self.extra = extra or {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], strict: bool = False) -> "Guide":
+        """
+        Builds a guide from JSON data in one pass. `strict` (LLM output) also requires the
+        keys the prompt asks for; otherwise missing fields are left empty, as a hand-edited
+        content file may lack them and still render.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Guide JSON must be an object")
+        if strict:
+            for key in REQUIRED_KEYS:
+                if key not in data:
+                    raise ValueError(f"Missing required key in JSON: {key}")
+            if "memory_verse_reference" not in data and "memory_verse" not in data:
+                raise ValueError("Missing memory_verse_reference in JSON")
+        days = data.get("days") or []
+        if not isinstance(days, list):
+            raise ValueError("'days' must be a list")
+        parsed = []
+        for i, day in enumerate(days):
+            if not isinstance(day, dict):
+                raise ValueError(f"Day {i + 1} must be an object")
+            parsed.append(Day.from_dict(day, i + 1, strict))
+        return cls(
+            series_title=data.get("series_title") or "",
+            memory_verse=ScriptureRef(data.get("memory_verse_reference"), data.get("memory_verse")),
+            days=parsed,
+            key_quotes=list(data.get("key_quotes") or []),
+            preacher_name=data.get("preacher_name"),
+            quote_verification=data.get("quote_verification"),
+            extra={k: v for k, v in data.items() if k not in _GUIDE_KEYS},
+        )
+
+    @classmethod
+    def coerce(cls, content: Union["Guide", Dict[str, Any]]) -> "Guide":
+        """The guide itself, or one built from a content dict"""
+        return content if isinstance(content, Guide) else cls.from_dict(content)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"series_title": self.series_title}
+        if self.memory_verse.reference is not None:
+            data["memory_verse_reference"] = self.memory_verse.reference
+        if self.memory_verse.text is not None:
+            data["memory_verse"] = self.memory_verse.text
+        data["days"] = [day.to_dict() for day in self.days]
+        data["key_quotes"] = list(self.key_quotes)
+        if self.preacher_name is not None:
+            data["preacher_name"] = self.preacher_name
+        if self.quote_verification is not None:
+            data["quote_verification"] = self.quote_verification
+        data.update(self.extra)
+        return data
+
+    def copy(self) -> "Guide":
+        """Copy whose days and scripture can be enriched without touching this guide"""
+        return Guide(self.series_title, ScriptureRef(self.memory_verse.reference, self.memory_verse.text),
+                     [day.copy() for day in self.days], list(self.key_quotes), self.preacher_name,
+                     self.quote_verification, dict(self.extra))
+
+    def to_json(self, indent: bool = False) -> bytes:
+        return dumps(self.to_dict(), indent=indent)
+
+    @classmethod
+    def from_json(cls, data: Union[bytes, str]) -> "Guide":
+        return cls.from_dict(loads(data))
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Guide) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"Guide({self.series_title!r}, {len(self.days)} days)"
+
+
+def read_guide(path: str) -> Guide:
+    """Loads a saved content file"""
+    with open(path, "rb") as f:
+        return Guide.from_json(f.read())
+
+
+def write_guide(path: str, guide: Guide):
+    """Saves a guide as an indented content file (editors and the live preview read these)"""
+    with atomic_write(path, "wb") as f:
+        f.write(guide.to_json(indent=True))
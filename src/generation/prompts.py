@@ -68,3 +68,8 @@ Here is the sermon transcript:
 
 Generate the 6-day devotional guide now following the JSON instructions provided in the system prompt.
 """
+
+REFERENCE_HINTS_TEMPLATE = """
+Scripture references cited in the sermon: {references}
+Where they fit the day's focus, prefer these for scripture_reference and memory_verse_reference.
+"""
@@ -0,0 +1,143 @@
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.generation.models import Guide
+
+# Words per indexed n-gram
+NGRAM = 3
+# N-grams occurring more often than this ("and we must") say nothing about where a quote is
+MAX_POSTINGS = 50
+# Alignments compared in full per quote
+CANDIDATES = 3
+# Share of a quote's words that must be found in order in the transcript
+VERIFIED_THRESHOLD = 0.8
+
+_WORD_RE = re.compile(r"\w+(?:['’]\w+)*")
+# Passages in quotation marks inside a reflection
+_QUOTED_RE = re.compile(r"[\"“]([^\"“”]+?)[\"”]")
+# Field of a quote inside a reflection
+_DAY_FIELD_RE = re.compile(r"days\[(\d+)\]\.reflection")
+
+
+def _tokens(text: str) -> List[Tuple[str, int, int]]:
+    return [(re.sub(r"['’]", "", m.group().lower()), m.start(), m.end()) for m in _WORD_RE.finditer(text or "")]
+
+
+class QuoteIndex:
+    """
+    Word n-gram index over a transcript. Built once in O(words); each lookup only aligns
+    the quote against the few positions its n-grams vote for, so checking a quote does
+    not scan the transcript.
+    """
+
+    def __init__(self, text: str, n: int = NGRAM):
+        self.text = text
+        self.n = n
+        tokens = _tokens(text)
+        self._words = [t[0] for t in tokens]
+        self._offsets = [(t[1], t[2]) for t in tokens]
+        self._postings: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+        for i in range(len(self._words) - n + 1):
+            self._postings[tuple(self._words[i:i + n])].append(i)
+
+    def match(self, quote: str) -> Dict[str, Any]:
+        """
+        Best fuzzy match of `quote`: `score` (0-1, share of quote words matched in
+        order), `start`/`end` character offsets in the transcript and the matched `text`.
+        Offsets are None when nothing matched.
+        """
+        words = [t[0] for t in _tokens(quote)]
+        best = {"score": 0.0, "start": None, "end": None, "text": None}
+        if not words:
+            return best
+
+        n = min(self.n, len(words))
+        votes: Counter = Counter()
+        if n == self.n:
+            for j in range(len(words) - n + 1):
+                postings = self._postings.get(tuple(words[j:j + n]))
+                if postings and len(postings) <= MAX_POSTINGS:
+                    for i in postings:
+                        votes[i - j] += 1
+        else:
+            # Quotes shorter than an n-gram: exact word sequence only
+            for i in range(len(self._words) - n + 1):
+                if self._words[i:i + n] == words:
+                    votes[i] += 1
+                    break
+
+        slack = max(2, len(words) // 5)
+        for start, _ in votes.most_common(CANDIDATES):
+            lo = max(0, start - slack)
+            window = self._words[lo:start + len(words) + slack]
+            blocks = [b for b in SequenceMatcher(None, words, window, autojunk=False).get_matching_blocks() if b.size]
+            if not blocks:
+                continue
+            score = sum(b.size for b in blocks) / len(words)
+            if score > best["score"]:
+                first, last = lo + blocks[0].b, lo + blocks[-1].b + blocks[-1].size - 1
+                char_start, char_end = self._offsets[first][0], self._offsets[last][1]
+                best = {"score": round(score, 3), "start": char_start, "end": char_end,
+                        "text": self.text[char_start:char_end]}
+        return best
+
+
+def _scripture_match(passage: str, day_index: int, guide: Guide) -> Optional[str]:
+    """Reference of the day's (or the memory verse's) fetched scripture that `passage` quotes, if any"""
+    day = guide.days[day_index]
+    for scripture in (day.scripture, guide.memory_verse):
+        if scripture.text and QuoteIndex(scripture.text).match(passage)["score"] >= VERIFIED_THRESHOLD:
+            return scripture.reference or ""
+    return None
+
+
+def verify_quotes(content: Union[Guide, Dict[str, Any]], transcript_text: str,
+                  index: Optional[QuoteIndex] = None) -> List[Dict[str, Any]]:
+    """
+    Checks every key quote, and every passage quoted inside a reflection, against the
+    transcript. Returns one entry per quote with its `field`, match span and score, and
+    `invented` set when the quote is not found closely enough. A reflection quoting the
+    day's scripture (when its text is already fetched) is not invented; its entry names
+    the reference under `scripture`.
+    """
+    index = index or QuoteIndex(transcript_text)
+    guide = Guide.coerce(content)
+    quotes = [(f"key_quotes[{i}]", q, None) for i, q in enumerate(guide.key_quotes) if isinstance(q, str)]
+    for i, day in enumerate(guide.days):
+        for passage in _QUOTED_RE.findall(day.reflection or ""):
+            if len(_tokens(passage)) >= 4:
+                quotes.append((f"days[{i}].reflection", passage, i))
+
+    results = []
+    for field, quote, day_index in quotes:
+        found = index.match(quote)
+        result = {"field": field, "quote": quote, **found, "invented": found["score"] < VERIFIED_THRESHOLD}
+        if result["invented"] and day_index is not None:
+            reference = _scripture_match(quote, day_index, guide)
+            if reference is not None:
+                result.update(invented=False, scripture=reference)
+        results.append(result)
+    return results
+
+
+def recheck_scripture_quotes(guide: Guide) -> List[Dict[str, Any]]:
+    """
+    Clears the `invented` flag of reflection quotes that turn out to quote the scripture
+    fetched since the check (quotes are verified before enrichment). Returns the entries
+    cleared; the guide gets new entries, so copies sharing the old list are unaffected.
+    """
+    cleared = []
+    results = []
+    for result in guide.quote_verification or []:
+        parts = _DAY_FIELD_RE.fullmatch(result.get("field", ""))
+        if result.get("invented") and parts and int(parts.group(1)) < len(guide.days):
+            reference = _scripture_match(result["quote"], int(parts.group(1)), guide)
+            if reference is not None:
+                result = dict(result, invented=False, scripture=reference)
+                cleared.append(result)
+        results.append(result)
+    if guide.quote_verification is not None:
+        guide.quote_verification = results
+    return cleared
@@ -1,19 +1,194 @@
+import glob
 import os
+import time
+import wave
 import yt_dlp
-from typing import Optional
+from yt_dlp.utils import parse_bytes
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
 from src.utils.logger import setup_logger
+from src.utils.tracing import span
+from src.utils.cassette import replayable, scalar_fields
+from src.utils.rate_limit import BandwidthCap
+from src.ingestion.stream import AudioStream, stream_fields
+from src.utils.youtube_urls import classify_url
+from src.utils.workspace import file_lock
+
+# Metadata kept when yt-dlp info dicts are recorded to a cassette
+INFO_FIELDS = ("id", "title", "duration", "ext", "filesize", "filesize_approx", "webpage_url",
+               "channel", "channel_id", "upload_date")
+
+# A channel lists newest first: after this many already-processed videos in a row the rest is old
+STOP_AFTER_KNOWN = 10
+# Nested playlists (a channel's Videos / Live tabs) are followed this deep
+MAX_LISTING_DEPTH = 2
+
+# yt-dlp retries a dropped connection this often, continuing the .part file each time
+DOWNLOAD_RETRIES = 10
+# Whole download attempts (each continuing the .part file) before giving up
+DOWNLOAD_ATTEMPTS = 3
+RETRY_DELAY_S = 5.0
+# A download may fall short of yt-dlp's approximate size by this share
+SIZE_TOLERANCE = 0.1
+# Measured (or, for compressed audio, bitrate-estimated) duration may differ from the metadata by this share
+DURATION_TOLERANCE = 0.2
 
 logger = setup_logger("audio_downloader")
 
+
+class IncompleteDownloadError(Exception):
+    """A downloaded file does not match the size or duration in its video metadata."""
+
+
+def parse_bandwidth(value: Union[str, float]) -> float:
+    """Bytes per second from a number or a string like "500K" / "2M"."""
+    rate = parse_bytes(str(value))
+    if not rate or rate <= 0:
+        raise ValueError(f"Invalid bandwidth limit: {value!r} (use e.g. 500K or 2M)")
+    return float(rate)
+
+
+def _measured_duration(path: str, size: int, bitrate_kbps: Optional[float]) -> Optional[float]:
+    try:
+        with wave.open(path, "rb") as w:
+            return w.getnframes() / float(w.getframerate())
+    except (wave.Error, EOFError):
+        pass
+    return size * 8 / (bitrate_kbps * 1000) if bitrate_kbps else None
+
+
+def _safe_title(title: str) -> str:
+    return "".join([c for c in title if c.isalnum() or c in (' ', '-', '_')]).strip()
+
+
 class AudioDownloader:
-    def __init__(self, output_dir: str = "audio"):
+    def __init__(self, output_dir: str = "audio", bandwidth_limit: Optional[Union[str, float]] = None):
         self.output_dir = output_dir
+        # Downloaded file -> video metadata (id, duration, ...)
+        self.downloads: Dict[str, Dict[str, Any]] = {}
+        # Bytes/s shared by all downloads of this downloader, e.g. parallel sync downloads
+        limit = bandwidth_limit or os.getenv("DOWNLOAD_BANDWIDTH_LIMIT")
+        self.bandwidth = BandwidthCap(parse_bandwidth(limit)) if limit else None
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
     def validate_youtube_url(self, url: str) -> bool:
-        """Simple validation of YouTube URL"""
-        return "youtube.com" in url or "youtu.be" in url
+        """True for a YouTube video URL"""
+        return classify_url(url) == "video"
+
+    def list_videos(self, url: str, known_ids: Optional[Set[str]] = None,
+                    stop_after_known: Optional[int] = STOP_AFTER_KNOWN) -> List[Dict[str, Any]]:
+        """
+        Flat listing of the videos in a playlist or channel, newest first, without their
+        known IDs. Pages are fetched lazily; listing stops once `stop_after_known` known
+        videos in a row have been seen (None walks the whole listing).
+        """
+        known_ids = known_ids or set()
+        new: List[Dict[str, Any]] = []
+        seen: Set[str] = set()
+        streak = 0
+        opts = {'quiet': True, 'no_warnings': True, 'extract_flat': 'in_playlist', 'lazy_playlist': True}
+        with span("download.list", url=url) as s, yt_dlp.YoutubeDL(opts) as ydl:
+            for entry in self._walk(ydl, url, 0):
+                video_id = entry.get("id")
+                if not video_id or video_id in seen:
+                    continue
+                seen.add(video_id)
+                if video_id in known_ids:
+                    streak += 1
+                    if stop_after_known and streak >= stop_after_known:
+                        break
+                    continue
+                streak = 0
+                new.append({
+                    "id": video_id,
+                    "url": f"https://www.youtube.com/watch?v={video_id}",
+                    "title": entry.get("title"),
+                    "duration": entry.get("duration"),
+                })
+            s.set_attributes(listed=len(seen), new=len(new))
+        logger.info(f"Listed {len(seen)} video(s) at {url}: {len(new)} new")
+        return new
+
+    def _throttle_hook(self, partials: Dict[str, int]) -> Callable[[Dict[str, Any]], None]:
+        """yt-dlp progress hook charging each new block to the shared bandwidth cap"""
+        counted = dict(partials)  # bytes already on disk are not charged again
+
+        def hook(d: Dict[str, Any]):
+            if d.get("status") != "downloading":
+                return
+            key = d.get("tmpfilename") or d.get("filename")
+            done = d.get("downloaded_bytes") or 0
+            last = counted.get(key, 0)
+            counted[key] = done
+            # Sleeping here stalls this download's reads, which slows the transfer itself
+            self.bandwidth.consume(done - last if done >= last else done)
+
+        return hook
+
+    def _verify(self, path: str, info: Dict[str, Any]) -> int:
+        """
+        Checks a finished download against the size and duration yt-dlp reported and
+        returns its size. A mismatching file is removed so the next attempt fetches it again.
+        """
+        download = (info.get("requested_downloads") or [info])[0]
+        size = os.path.getsize(path)
+        expected = download.get("filesize") or info.get("filesize")
+        approx = download.get("filesize_approx") or info.get("filesize_approx")
+        duration = info.get("duration")
+        problem = None
+        if size == 0:
+            problem = "file is empty"
+        elif expected and size != expected:
+            problem = f"{size} bytes, expected {expected}"
+        elif not expected and approx and size < approx * (1 - SIZE_TOLERANCE):
+            problem = f"{size} bytes, expected about {approx}"
+        elif duration:
+            bitrate = download.get("abr") or download.get("tbr") or info.get("abr") or info.get("tbr")
+            measured = _measured_duration(path, size, bitrate)
+            if measured is not None and abs(measured - duration) > duration * DURATION_TOLERANCE:
+                problem = f"{measured:.0f}s of audio, expected {duration:.0f}s"
+        if problem:
+            os.remove(path)
+            raise IncompleteDownloadError(f"{os.path.basename(path)}: {problem}")
+        return size
+
+    def _walk(self, ydl, url: str, depth: int) -> Iterable[Dict[str, Any]]:
+        # process=False keeps `entries` a lazy generator, so unread pages are never fetched
+        result = ydl.extract_info(url, download=False, process=False)
+        if result.get("_type") == "url" and depth < MAX_LISTING_DEPTH:
+            # Redirect, e.g. a channel root to its default tab
+            yield from self._walk(ydl, result["url"], depth + 1)
+            return
+        for entry in result.get("entries") or []:
+            if not entry:
+                continue
+            if entry.get("ie_key") == "YoutubeTab" or entry.get("_type") == "playlist":
+                if depth < MAX_LISTING_DEPTH and entry.get("url"):
+                    yield from self._walk(ydl, entry["url"], depth + 1)
+            else:
+                yield entry
+
+    def resolve_stream(self, url: str) -> AudioStream:
+        """
+        Resolves the direct media URL of a video's best audio format without downloading it.
+        The URL is short-lived and may be bound to this machine's IP address.
+        """
+        if not self.validate_youtube_url(url):
+            raise ValueError(f"Invalid YouTube URL: {url}")
+        with span("download.resolve", url=url) as s, yt_dlp.YoutubeDL({'format': 'bestaudio/best', 'quiet': True, 'no_warnings': True}) as ydl:
+            info = ydl.extract_info(url, download=False)
+            fields = stream_fields(info)
+            if not fields["url"]:
+                raise ValueError(f"No direct media URL for {url}")
+            s.set_attributes(filesize=fields["filesize"], ext=fields["ext"])
+        title = info.get("title") or "audio"
+        stream = AudioStream(
+            fields["url"], f"{_safe_title(title)}.{fields['ext']}", headers=fields["headers"],
+            filesize=fields["filesize"], duration=info.get("duration"), video_id=info.get("id"),
+            bandwidth=self.bandwidth,
+        )
+        logger.info(f"Resolved {url} to a {fields['ext']} stream ({(fields['filesize'] or 0) / 1e6:.1f} MB)")
+        return stream
 
     def download_audio(self, url: str, prefix: str = "") -> Optional[str]:
         """
@@ -26,9 +201,13 @@ class AudioDownloader:
                 raise ValueError("Invalid YouTube URL")
 
             # Get metadata first
-            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+            with span("download.metadata"), yt_dlp.YoutubeDL({'quiet': True}) as ydl:
                 try:
-                    info_dict = ydl.extract_info(url, download=False)
+                    info_dict = replayable(
+                        "ytdlp_info", {"url": url},
+                        lambda: ydl.extract_info(url, download=False),
+                        encode=lambda info: scalar_fields(info, INFO_FIELDS),
+                    )
                     video_title = info_dict.get('title', 'audio')
                     duration = info_dict.get('duration', 0)
                     logger.info(f"Video duration: {duration/60:.2f} minutes")
@@ -37,7 +216,7 @@ class AudioDownloader:
                     raise
 
             # Sanitized title
-            safe_title = "".join([c for c in video_title if c.isalnum() or c in (' ', '-', '_')]).strip()
+            safe_title = _safe_title(video_title)
             
             # Configure download options
             # Since ffmpeg is missing, we just download the best audio format
@@ -48,16 +227,40 @@ class AudioDownloader:
                 'outtmpl': out_tmpl,
                 'quiet': True,
                 'no_warnings': True,
+                # Partial data stays in a .part file and is continued on retry, or by the next run
+                'continuedl': True,
+                'retries': DOWNLOAD_RETRIES,
+                'fragment_retries': DOWNLOAD_RETRIES,
             }
-            
-            logger.info(f"Downloading: {video_title}")
+            # Parallel runs of the same video take turns: the second finds the file complete
+            # instead of writing the same .part file at the same time. The lock file goes
+            # once the download is done, so audio/ does not fill up with them.
+            lock_path = os.path.join(self.output_dir, "." + os.path.basename(out_tmpl).replace(".%(ext)s", ".lock"))
+            with file_lock(lock_path, remove=True):
+                partials = {path: os.path.getsize(path) for path in glob.glob(glob.escape(out_tmpl).replace("%(ext)s", "*") + ".part")}
+                for path, size in partials.items():
+                    logger.info(f"Resuming {path} from {size / 1e6:.1f} MB")
+                if self.bandwidth:
+                    ydl_opts['progress_hooks'] = [self._throttle_hook(partials)]
+
+                logger.info(f"Downloading: {video_title}")
+
+                for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+                    try:
+                        with span("download.fetch", duration_s=duration, attempt=attempt) as s, yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                            info = ydl.extract_info(url, download=True)
+                            # ydl.prepare_filename(info) gives the expected filename with the correct extension
+                            filename = ydl.prepare_filename(info)
+                            s.set_attribute("bytes", self._verify(filename, info))
+                        break
+                    except (yt_dlp.utils.DownloadError, IncompleteDownloadError, OSError) as e:
+                        if attempt == DOWNLOAD_ATTEMPTS:
+                            raise
+                        logger.warning(f"Download attempt {attempt} failed ({e}); retrying")
+                        time.sleep(RETRY_DELAY_S * attempt)
 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                # ydl.prepare_filename(info) gives the expected filename with the correct extension
-                filename = ydl.prepare_filename(info)
-                
             logger.info(f"Downloaded to: {filename}")
+            self.downloads[filename] = {"id": info_dict.get("id"), "title": video_title, "duration": duration}
             return filename
 
         except Exception as e:
@@ -0,0 +1,50 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+from src.ingestion.audio_downloader import AudioDownloader, STOP_AFTER_KNOWN
+from src.utils.logger import setup_logger
+from src.utils.tracing import span
+
+logger = setup_logger("channel_sync")
+
+# Parallel downloads during a sync; more mostly competes for the same uplink
+DEFAULT_SYNC_WORKERS = 3
+
+
+def sync_channel(url: str, known_ids: Set[str], downloader: Optional[AudioDownloader] = None,
+                 max_workers: int = DEFAULT_SYNC_WORKERS, limit: Optional[int] = None,
+                 full: bool = False) -> List[Dict[str, Any]]:
+    """
+    Downloads the videos of a playlist or channel that are not in `known_ids`, at most
+    `max_workers` at a time. `limit` keeps only the newest N; `full` walks the whole
+    listing instead of stopping at the first run of known videos.
+    Returns the downloaded items ({"id", "url", "title", "duration", "audio_path"}),
+    oldest first; videos that failed to download are logged and left for the next sync.
+    """
+    downloader = downloader or AudioDownloader()
+    entries = downloader.list_videos(url, known_ids, stop_after_known=None if full else STOP_AFTER_KNOWN)
+    if limit:
+        entries = entries[:limit]
+    if not entries:
+        return []
+
+    def download(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            # The video ID keeps files apart when every upload is titled "Sunday Service"
+            path = downloader.download_audio(entry["url"], prefix=entry["id"])
+        except Exception as e:
+            logger.warning(f"Skipping {entry['url']}: {e}")
+            return None
+        info = downloader.downloads.get(path, {})
+        return {**entry, "duration": info.get("duration") or entry.get("duration"), "audio_path": path}
+
+    with span("download.sync", new=len(entries), workers=max_workers) as s:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            # copy_context keeps each download's spans under the sync span
+            futures = [pool.submit(contextvars.copy_context().run, download, entry) for entry in entries]
+            items = [f.result() for f in futures]
+        downloaded = [item for item in reversed(items) if item]
+        s.set_attributes(downloaded=len(downloaded), failed=len(entries) - len(downloaded))
+    logger.info(f"Downloaded {len(downloaded)} of {len(entries)} new video(s) from {url}")
+    return downloaded
@@ -0,0 +1,273 @@
+"""
+Drop-folder ingestion: finds recordings copied into a directory tree and hands each new
+one to the pipeline once it has finished being written.
+
+Changes are picked up through inotify on Linux and by rescanning the tree elsewhere. A
+file is ready once its size and mtime have stayed unchanged for `settle_s` seconds, so a
+copy still in progress is not processed. Ready files are identified by content hash: a
+recording copied in again, under any name, is skipped.
+
+A `guide-defaults.json` in the drop folder or any subfolder sets the series, preacher,
+logo and Bible version for the recordings below it; the nearest folder's values win.
+"""
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from src.storage.archive import file_hash
+from src.utils.logger import setup_logger
+from src.utils.tracing import span
+
+logger = setup_logger("drop_folder")
+
+# Seconds between checks for new files (the longest an inotify wait blocks)
+POLL_INTERVAL_S = 2.0
+# Seconds a file's size and mtime must stay unchanged before it counts as fully written
+SETTLE_S = 10.0
+# Seconds between full rescans while inotify is active; network shares written from
+# another host produce no events on this one
+RESCAN_S = 300.0
+# Per-folder defaults, applied to the recordings in that folder and its subfolders
+FOLDER_DEFAULTS = "guide-defaults.json"
+DEFAULT_KEYS = ("series", "preacher", "logo", "bible_version")
+# Extensions treated as recordings; everything else in the folder is ignored
+AUDIO_EXTENSIONS = (".mp3", ".m4a", ".wav", ".flac", ".ogg", ".opus", ".aac", ".wma", ".webm", ".mp4")
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+# wd, mask, cookie, name length; the name follows, NUL padded
+_EVENT = struct.Struct("iIII")
+
+
+def is_recording(path: str) -> bool:
+    name = os.path.basename(path)
+    # Hidden and partial files: ".~lock", ".file.mp3.part", editor and sync-client temporaries
+    return not name.startswith(".") and name.lower().endswith(AUDIO_EXTENSIONS)
+
+
+def load_folder_defaults(root: str, directory: str) -> Dict[str, Any]:
+    """
+    Defaults for recordings in `directory`: every `guide-defaults.json` from `root` down
+    to it, merged so nearer folders override. A relative logo path is resolved against
+    the folder whose file names it.
+    """
+    defaults: Dict[str, Any] = {}
+    root = os.path.abspath(root)
+    relative = os.path.relpath(os.path.abspath(directory), root)
+    folders = [root]
+    if relative != os.curdir:
+        for part in relative.split(os.sep):
+            folders.append(os.path.join(folders[-1], part))
+    for folder in folders:
+        path = os.path.join(folder, FOLDER_DEFAULTS)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                values = json.load(f)
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring {path}: {e}")
+            continue
+        if not isinstance(values, dict):
+            logger.warning(f"Ignoring {path}: expected a JSON object")
+            continue
+        unknown = sorted(set(values) - set(DEFAULT_KEYS))
+        if unknown:
+            logger.warning(f"Ignoring unknown keys in {path}: {', '.join(unknown)}")
+        for key in DEFAULT_KEYS:
+            if values.get(key) is None:
+                continue
+            value = values[key]
+            if key == "logo":
+                value = os.path.join(folder, os.path.expanduser(value))
+            elif key == "bible_version":
+                value = [value] if isinstance(value, str) else list(value)
+            defaults[key] = value
+    return defaults
+
+
+class _Inotify:
+    """Change events for a set of directories, read from the Linux kernel through libc."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        # AttributeError on systems without inotify; the caller falls back to polling
+        self._add_watch = libc.inotify_add_watch
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._directories: Dict[int, str] = {}
+
+    def watch(self, directory: str):
+        if directory in self._directories.values():
+            return
+        wd = self._add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            # Typically fs.inotify.max_user_watches; the periodic rescan still covers the folder
+            errno = ctypes.get_errno()
+            logger.warning(f"Cannot watch {directory}: {os.strerror(errno)}")
+            return
+        self._directories[wd] = directory
+
+    def read(self, timeout: float) -> Optional[List[str]]:
+        """Paths changed within `timeout` seconds, or None if the kernel dropped events."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        paths, position, overflow = [], 0, False
+        while position + _EVENT.size <= len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, position)
+            name = data[position + _EVENT.size:position + _EVENT.size + length].rstrip(b"\0")
+            position += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+            elif name and wd in self._directories:
+                paths.append(os.path.join(self._directories[wd], os.fsdecode(name)))
+        return None if overflow else paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class DropFolderWatcher:
+    """
+    Yields recordings that appear under `root` once they are fully written and their
+    content is new. `is_known(hash)` lets the caller report audio processed before this
+    process started (e.g. found in the archive).
+    """
+
+    def __init__(self, root: str, is_known: Optional[Callable[[str], bool]] = None,
+                 settle_s: float = SETTLE_S, interval: float = POLL_INTERVAL_S, use_inotify: bool = True):
+        if not os.path.isdir(root):
+            raise NotADirectoryError(f"Drop folder {root} does not exist")
+        self.root = root
+        self.is_known = is_known or (lambda audio_hash: False)
+        self.settle_s = settle_s
+        self.interval = interval
+        # path -> (size, mtime_ns, monotonic time that size and mtime were first seen)
+        self._pending: Dict[str, Tuple[int, int, float]] = {}
+        # path -> (size, mtime_ns) when it was hashed; unchanged files are not hashed again
+        self._handled: Dict[str, Tuple[int, int]] = {}
+        self._hashes: Set[str] = set()
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (AttributeError, OSError) as e:
+                logger.info(f"inotify unavailable ({e}); polling {root} every {interval:.0f}s")
+        self.mode = "inotify" if self._inotify else "polling"
+        self._last_scan = 0.0
+
+    def scan(self):
+        """Walks the whole tree, noting every recording (and watching every directory)."""
+        for directory, subdirs, files in os.walk(self.root):
+            subdirs[:] = [d for d in subdirs if not d.startswith(".")]
+            if self._inotify:
+                self._inotify.watch(directory)
+            for name in files:
+                self._observe(os.path.join(directory, name))
+        self._last_scan = time.monotonic()
+
+    def _observe(self, path: str):
+        if not is_recording(path):
+            return
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._pending.pop(path, None)
+            return
+        state = (stat.st_size, stat.st_mtime_ns)
+        if self._handled.get(path) == state:
+            return
+        pending = self._pending.get(path)
+        if not pending or pending[:2] != state:
+            self._pending[path] = (*state, time.monotonic())
+
+    def poll(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Waits up to `timeout` seconds for changes; returns the recordings that became ready."""
+        timeout = self.interval if timeout is None else timeout
+        if self._inotify:
+            changed = self._inotify.read(timeout)
+            if changed is None or time.monotonic() - self._last_scan >= RESCAN_S:
+                self.scan()
+            else:
+                for path in changed:
+                    if os.path.isdir(path):
+                        # A new subfolder: watch it and pick up what was copied before the watch
+                        for directory, _, files in os.walk(path):
+                            self._inotify.watch(directory)
+                            for name in files:
+                                self._observe(os.path.join(directory, name))
+                    else:
+                        self._observe(path)
+        else:
+            time.sleep(timeout)
+            self.scan()
+        return self._collect()
+
+    def _collect(self) -> List[Dict[str, Any]]:
+        jobs = []
+        now = time.monotonic()
+        for path, (size, mtime_ns, since) in sorted(self._pending.items(), key=lambda item: item[1][2]):
+            # Re-checked here as well: inotify reports nothing for writes from other hosts
+            self._observe(path)
+            if self._pending.get(path) != (size, mtime_ns, since):
+                continue
+            if now - since < self.settle_s or time.time() - mtime_ns / 1e9 < self.settle_s:
+                continue
+            del self._pending[path]
+            job = self._identify(path, (size, mtime_ns))
+            if job:
+                jobs.append(job)
+        return jobs
+
+    def _identify(self, path: str, state: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+        with span("drop_folder.hash", path=path, size=state[0]) as s:
+            try:
+                audio_hash = file_hash(path)
+            except OSError as e:
+                logger.warning(f"Cannot read {path}: {e}")
+                return None
+            self._handled[path] = state
+            duplicate = audio_hash in self._hashes or self.is_known(audio_hash)
+            s.set_attributes(duplicate=duplicate)
+        if duplicate:
+            logger.info(f"Skipping {path}: same audio as a recording already processed")
+            return None
+        self._hashes.add(audio_hash)
+        return {"path": path, "audio_hash": audio_hash,
+                "defaults": load_folder_defaults(self.root, os.path.dirname(path))}
+
+    def jobs(self, stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Recordings in arrival order ({"path", "audio_hash", "defaults"}), until `stop` is
+        set. Files already in the folder are checked first.
+        """
+        stop = stop or threading.Event()
+        self.scan()
+        logger.info(f"Watching {self.root} for recordings ({self.mode})")
+        while not stop.is_set():
+            yield from self.poll()
+
+    def close(self):
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
@@ -0,0 +1,271 @@
+"""
+Acoustic fingerprints that recognise the same sermon across different recordings: the
+raw livestream, the edited upload, a copy from the sound desk.
+
+Audio is decoded to mono 8 kHz and cut into overlapping frames. For each frame, 32 bits
+record whether the energy difference between neighbouring frequency bands rose or fell
+since the previous frame (Haitsma & Kalker). That survives re-encoding, volume changes
+and different start points, and takes 4 bytes per 128 ms: about 110 KB for an hour.
+
+Two fingerprints are aligned by voting on the offsets at which their frames agree
+exactly, then compared in blocks of about half a minute. The share of the shorter
+recording found in the longer one is the match score, so an edited upload with parts
+cut out still matches the livestream it came from.
+
+NumPy does the signal processing. Audio is decoded with ffmpeg when it is on PATH. Without
+it, 16-bit WAV is read with the standard library a block at a time, low-passed below the
+new Nyquist frequency and then resampled, so long services never sit in memory at their
+source rate and content above 4 kHz does not alias into the analysed bands.
+"""
+import shutil
+import subprocess
+import wave
+from typing import Iterable, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # fingerprinting is skipped without it
+    np = None
+
+from src.utils.logger import setup_logger
+from src.utils.tracing import span
+
+logger = setup_logger("fingerprint")
+
+SAMPLE_RATE = 8000
+# Samples per analysed frame (512 ms) and between frame starts (128 ms)
+FRAME = 4096
+HOP = 1024
+# 33 bands between these frequencies give 32 bits per frame
+BANDS = 33
+MIN_HZ, MAX_HZ = 300.0, 2000.0
+# Frames per comparison block (about 33 s)
+BLOCK = 256
+# A block matches when fewer than this share of its bits differ (unrelated audio: ~0.5)
+MATCH_BER = 0.35
+# Share of the shorter recording that must be found in the longer one
+MIN_COVERAGE = 0.8
+# Shorter recordings (a clip, a trailer) are never taken for a whole sermon
+MIN_MATCH_S = 600
+# Offsets with the most exact frame matches that are checked block by block; an edited
+# upload has one per part kept between cuts
+CANDIDATE_OFFSETS = 10
+# Frame values occurring more often than this in a recording say nothing about the offset
+MAX_POSTINGS = 20
+# Frames processed at once; bounds memory for long services
+FRAMES_PER_CHUNK = 2048
+# Seconds of audio per fingerprint frame
+FRAME_S = HOP / SAMPLE_RATE
+# Seconds of WAV read at once when decoding without ffmpeg
+WAV_BLOCK_S = 10
+# The anti-alias filter passes everything below this and stops at SAMPLE_RATE / 2
+PASS_HZ = 3400.0
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _lowpass(rate: int) -> "np.ndarray":
+    """Windowed-sinc FIR (Blackman) for `rate` with its transition band from PASS_HZ to SAMPLE_RATE / 2"""
+    stop_hz = SAMPLE_RATE / 2
+    taps = int(5.5 * rate / (stop_hz - PASS_HZ)) | 1
+    t = np.arange(taps) - (taps - 1) / 2
+    h = np.sinc((PASS_HZ + stop_hz) / rate * t) * np.blackman(taps)
+    return (h / h.sum()).astype(np.float32)
+
+
+class _Resampler:
+    """Low-pass (when downsampling) and linear interpolation to SAMPLE_RATE, one block at a time"""
+
+    def __init__(self, rate: int):
+        self.step = rate / SAMPLE_RATE
+        self.taps = _lowpass(rate) if rate > SAMPLE_RATE else np.ones(1, dtype=np.float32)
+        self.delay = (len(self.taps) - 1) // 2
+        # Input the filter still needs; starts with zeros so output sample i lines up with input sample i
+        self.history = np.zeros(self.delay, dtype=np.float32)
+        self.filtered = 0  # filtered samples produced so far
+        self.last = None  # the last of them, the left neighbour for the next block's first output
+        self.next = 0  # index of the next output sample
+        self.spectra = {}  # FFT of the taps per transform size (blocks are all one size but the last)
+
+    def __call__(self, block: "np.ndarray") -> "np.ndarray":
+        x = np.concatenate((self.history, block))
+        n = len(self.taps)
+        if len(x) < n:
+            self.history = x
+            return np.zeros(0, dtype=np.float32)
+        # FFT convolution; the first n - 1 outputs wrap around and are dropped
+        size = 1 << (len(x) - 1).bit_length()
+        if size not in self.spectra:
+            self.spectra[size] = np.fft.rfft(self.taps, size)
+        y = np.fft.irfft(np.fft.rfft(x, size) * self.spectra[size], size)[n - 1:len(x)]
+        self.history = x[len(x) - (n - 1):]
+        return self._interpolate(y.astype(np.float32))
+
+    def flush(self) -> "np.ndarray":
+        """Output for the end of the input, still inside the filter"""
+        return self(np.zeros(self.delay, dtype=np.float32))
+
+    def _interpolate(self, y: "np.ndarray") -> "np.ndarray":
+        base = self.filtered
+        if self.last is not None:
+            y, base = np.concatenate(([self.last], y)), base - 1
+        end = self.filtered + len(y) - (1 if self.last is None else 2)
+        count = max(0, int(end // self.step) - self.next + 1)
+        positions = (self.next + np.arange(count)) * self.step
+        self.next += count
+        self.filtered, self.last = end + 1, y[-1]
+        return np.interp(positions - base, np.arange(len(y)), y).astype(np.float32)
+
+
+def _decode_wav(path: str) -> "np.ndarray":
+    with wave.open(path, "rb") as w:
+        channels, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        if width != 2:
+            raise ValueError(f"Only 16-bit WAV can be decoded without ffmpeg ({path} is {8 * width}-bit)")
+        resample = _Resampler(rate) if rate != SAMPLE_RATE else None
+        parts = []
+        while True:
+            raw = w.readframes(rate * WAV_BLOCK_S)
+            if not raw:
+                break
+            block = np.frombuffer(raw, dtype="<i2").astype(np.float32).reshape(-1, channels).mean(axis=1)
+            parts.append(resample(block) if resample else block)
+        if resample:
+            parts.append(resample.flush())
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+
+def _decode_ffmpeg(ffmpeg: str, path: str) -> "np.ndarray":
+    result = subprocess.run(
+        [ffmpeg, "-v", "error", "-nostdin", "-i", path, "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode {path}: {result.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(result.stdout, dtype="<i2").astype(np.float32)
+
+
+def decode_audio(path: str) -> "np.ndarray":
+    """Mono float32 samples at SAMPLE_RATE"""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        return _decode_ffmpeg(ffmpeg, path)
+    try:
+        return _decode_wav(path)
+    except (wave.Error, EOFError):
+        raise RuntimeError(f"Decoding {path} needs ffmpeg on PATH") from None
+
+
+def _band_edges() -> "np.ndarray":
+    edges_hz = np.geomspace(MIN_HZ, MAX_HZ, BANDS + 1)
+    return np.round(edges_hz * FRAME / SAMPLE_RATE).astype(np.intp)
+
+
+def fingerprint(samples: "np.ndarray") -> "np.ndarray":
+    """One uint32 per frame of `samples` (mono, SAMPLE_RATE)"""
+    count = 1 + (len(samples) - FRAME) // HOP if len(samples) >= FRAME else 0
+    if count < 2:
+        return np.zeros(0, dtype=np.uint32)
+    window = np.hanning(FRAME).astype(np.float32)
+    edges = _band_edges()
+    energies = np.empty((count, BANDS), dtype=np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME)[::HOP]
+    for start in range(0, count, FRAMES_PER_CHUNK):
+        power = np.abs(np.fft.rfft(frames[start:start + FRAMES_PER_CHUNK] * window, axis=1)) ** 2
+        # Energy per band: differences of the cumulative spectrum at the band edges
+        cumulative = np.cumsum(power, axis=1)
+        energies[start:start + FRAMES_PER_CHUNK] = cumulative[:, edges[1:] - 1] - cumulative[:, edges[:-1] - 1]
+    across = energies[:, :-1] - energies[:, 1:]
+    bits = (across[1:] - across[:-1]) > 0
+    return np.packbits(bits, axis=1, bitorder="little").view("<u4").ravel()
+
+
+def fingerprint_file(path: str) -> Optional["np.ndarray"]:
+    """Fingerprint of an audio file, or None when NumPy or a decoder is missing"""
+    if np is None:
+        logger.info("NumPy is not installed; skipping the audio fingerprint")
+        return None
+    with span("fingerprint.compute", path=path) as s:
+        try:
+            samples = decode_audio(path)
+        except (OSError, RuntimeError, ValueError) as e:
+            logger.warning(f"No audio fingerprint for {path}: {e}")
+            return None
+        prints = fingerprint(samples)
+        s.set_attributes(frames=len(prints), audio_s=round(len(samples) / SAMPLE_RATE, 1))
+    return prints
+
+
+def to_bytes(prints: "np.ndarray") -> bytes:
+    return prints.astype("<u4").tobytes()
+
+
+def from_bytes(data: bytes) -> "np.ndarray":
+    return np.frombuffer(data, dtype="<u4")
+
+
+def _popcount(values: "np.ndarray") -> "np.ndarray":
+    return np.unpackbits(values.astype("<u4").view(np.uint8).reshape(-1, 4), axis=1).sum(axis=1)
+
+
+def _candidate_offsets(short: "np.ndarray", long: "np.ndarray") -> "np.ndarray":
+    """Offsets of `short` within `long` at which the most frames agree exactly"""
+    order = np.argsort(long, kind="stable")
+    ordered = long[order]
+    # Silence and clipping give constant frames that agree everywhere
+    useful = (short != 0) & (short != 0xFFFFFFFF)
+    positions = np.flatnonzero(useful)
+    lo = np.searchsorted(ordered, short[positions], side="left")
+    hi = np.searchsorted(ordered, short[positions], side="right")
+    hits = hi - lo
+    hits[hits > MAX_POSTINGS] = 0
+    if not hits.sum():
+        return np.zeros(0, dtype=np.intp)
+    # Every (short position, long position) pair with equal values votes for their offset
+    starts = np.repeat(lo, hits)
+    within = np.arange(hits.sum()) - np.repeat(np.cumsum(hits) - hits, hits)
+    offsets = order[starts + within] - np.repeat(positions, hits)
+    values, votes = np.unique(offsets, return_counts=True)
+    return values[np.argsort(votes)[::-1][:CANDIDATE_OFFSETS]]
+
+
+def coverage(a: "np.ndarray", b: "np.ndarray") -> float:
+    """Share of the shorter fingerprint's blocks that match the longer one at some offset"""
+    short, long = (a, b) if len(a) <= len(b) else (b, a)
+    blocks = -(-len(short) // BLOCK)
+    if not blocks:
+        return 0.0
+    covered = np.zeros(blocks, dtype=bool)
+    for offset in _candidate_offsets(short, long):
+        first, last = max(0, -offset), min(len(short), len(long) - offset)
+        if last - first < BLOCK // 2:
+            continue
+        errors = _popcount(short[first:last] ^ long[first + offset:last + offset])
+        block = np.arange(first, last) // BLOCK
+        frames = np.bincount(block, minlength=blocks)
+        ber = np.bincount(block, weights=errors, minlength=blocks) / np.maximum(frames * 32, 1)
+        # Blocks only partly inside the overlap are judged at another offset, if at all
+        covered |= (ber < MATCH_BER) & (frames >= BLOCK // 2)
+    return float(covered.mean())
+
+
+def best_match(prints: "np.ndarray", candidates: Iterable[Tuple[int, bytes]],
+               min_match_s: float = MIN_MATCH_S) -> Optional[Tuple[int, float]]:
+    """
+    (id, coverage) of the archived fingerprint that `prints` matches or contains (or is
+    contained in) best, or None if none covers MIN_COVERAGE of the shorter recording.
+    """
+    min_frames = int(min_match_s / FRAME_S)
+    if len(prints) < min_frames:
+        return None
+    best = None
+    for candidate_id, data in candidates:
+        other = from_bytes(data)
+        if len(other) < min_frames:
+            continue
+        score = coverage(prints, other)
+        if score >= MIN_COVERAGE and (best is None or score > best[1]):
+            best = (candidate_id, score)
+    return best
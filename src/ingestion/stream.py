@@ -0,0 +1,114 @@
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+
+from src.utils.logger import setup_logger
+from src.utils.rate_limit import BandwidthCap
+
+logger = setup_logger("audio_stream")
+
+# Bytes read from the media server per chunk and handed on to the upload
+CHUNK_BYTES = 256 * 1024
+# Seconds to wait for the media server to connect / send the next chunk
+STREAM_TIMEOUT = (10, 60)
+
+
+class StreamError(Exception):
+    """The media server refused the stream or it ended before the advertised size."""
+
+
+class AudioStream:
+    """
+    The direct media URL of a video's audio, resolved by yt-dlp. `open()` reads it
+    over HTTP in chunks; the returned object is file-like and iterable, so it can be
+    given to an upload as the request body without the audio ever touching disk.
+    """
+
+    def __init__(self, url: str, name: str, headers: Optional[Dict[str, str]] = None,
+                 filesize: Optional[int] = None, duration: Optional[float] = None,
+                 video_id: Optional[str] = None, bandwidth: Optional[BandwidthCap] = None):
+        self.url = url
+        # File name the audio would have been downloaded under; names the transcript outputs
+        self.name = name
+        # yt-dlp's request headers (User-Agent, cookies); the media server may reject requests without them
+        self.headers = headers or {}
+        self.filesize = filesize
+        self.duration = duration
+        self.video_id = video_id
+        self.bandwidth = bandwidth
+        # Bytes read through the last open()
+        self.bytes_read = 0
+
+    def open(self) -> "_ChunkReader":
+        response = requests.get(self.url, headers=self.headers, stream=True, timeout=STREAM_TIMEOUT)
+        if response.status_code != 200:
+            response.close()
+            raise StreamError(f"Media server answered HTTP {response.status_code}")
+        self.bytes_read = 0
+        return _ChunkReader(self, response)
+
+    def __repr__(self) -> str:
+        return f"AudioStream({self.name!r}, {self.filesize or '?'} bytes)"
+
+
+class _ChunkReader:
+    """Body of an open stream: iterating yields chunks, read() serves buffered bytes."""
+
+    def __init__(self, stream: AudioStream, response: requests.Response):
+        self.stream = stream
+        self.response = response
+        self._chunks = self._iter_chunks()
+        self._buffer = b""
+
+    def _iter_chunks(self) -> Iterator[bytes]:
+        try:
+            for chunk in self.response.iter_content(CHUNK_BYTES):
+                if not chunk:
+                    continue
+                self.stream.bytes_read += len(chunk)
+                if self.stream.bandwidth:
+                    self.stream.bandwidth.consume(len(chunk))
+                yield chunk
+        finally:
+            self.response.close()
+        expected = self.stream.filesize
+        if expected and self.stream.bytes_read != expected:
+            # Fails the upload, so a truncated stream is never transcribed
+            raise StreamError(f"Stream ended after {self.stream.bytes_read} of {expected} bytes")
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self._buffer:
+            buffered, self._buffer = self._buffer, b""
+            yield buffered
+        yield from self._chunks
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def close(self):
+        self.response.close()
+
+    def __enter__(self) -> "_ChunkReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def stream_fields(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Media URL, headers and size of the format yt-dlp selected in `info`."""
+    selected = (info.get("requested_downloads") or info.get("requested_formats") or [info])[0]
+    return {
+        "url": selected.get("url") or info.get("url"),
+        "headers": selected.get("http_headers") or info.get("http_headers") or {},
+        "filesize": selected.get("filesize") or info.get("filesize"),
+        "ext": selected.get("ext") or info.get("ext") or "webm",
+    }
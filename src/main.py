@@ -2,96 +2,449 @@ import argparse
 import os
 import sys
 import json
+import sqlite3
+from contextlib import ExitStack
 from dotenv import load_dotenv
 
 # Ensure project root is in sys.path so 'src' imports work
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.ingestion.audio_downloader import AudioDownloader
-from src.transcription.transcriber import TranscriptionService
-from src.generation.content_generator import ContentGenerator
+from src.ingestion.audio_downloader import AudioDownloader, parse_bandwidth
+from src.ingestion.channel_sync import sync_channel, DEFAULT_SYNC_WORKERS
+from src.ingestion.drop_folder import DropFolderWatcher, SETTLE_S
+from src.ingestion.fingerprint import FRAME_S, MIN_MATCH_S, best_match, fingerprint_file, to_bytes
+from src.transcription.transcriber import TranscriptionService, STREAM_MODES
+from src.transcription.tiers import TIERS, TierPolicy
+from src.transcription.word_timings import WordTimings, link_quotes_to_audio
+from src.generation.content_generator import ContentGenerator, enrich_scriptures, save_content
+from src.providers.router import Router
 from src.design.pdf_designer import PDFDesigner
 from src.utils.logger import setup_logger
+from src.utils.tracing import METRICS_HOST, configure_tracer, serve_metrics
+from src.utils.cassette import use_cassette
+from src.utils.bible_fetcher import BibleFetcher
+from src.utils.scripture_refs import extract_references, MAX_CITED_REFERENCES
+from src.storage.archive import ArchiveStore, DEFAULT_ARCHIVE_PATH, file_hash
+from src.utils.youtube_urls import classify_url
+from src.utils.workspace import DEFAULT_OUTPUT_ROOT, RunWorkspace
 
 logger = setup_logger("main")
 
-def main():
-    load_dotenv()
-    
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Church Study Guide Generator")
-    parser.add_argument("--url", help="YouTube URL to download")
+    parser.add_argument("--url", help="YouTube video URL, or a playlist/channel URL to process every new video")
     parser.add_argument("--file", help="Local audio file path")
-    parser.add_argument("--provider", default="gemini", choices=["gemini", "openai", "groq"], help="LLM Provider")
+    parser.add_argument("--watch-folder", help="Run as a daemon: process every new recording copied into this folder "
+                                               "(guide-defaults.json in a folder overrides --series/--preacher/--logo/--bible-version)")
+    parser.add_argument("--settle", type=float, default=SETTLE_S,
+                        help="Seconds a dropped file must stay unchanged before it is processed")
+    parser.add_argument("--provider", default="gemini", choices=["gemini", "openai", "groq", "auto"],
+                        help="LLM Provider; 'auto' picks provider and model per request (LLM_ROUTES policy)")
     parser.add_argument("--logo", help="Path to church logo for PDF branding")
     parser.add_argument("--series", default="Sermon Series", help="Series Title")
     parser.add_argument("--preacher", default="", help="Name of the Preacher")
-    parser.add_argument("--bible-version", default="kjv", choices=["kjv", "web", "rvr"], help="Bible Version (default: kjv)")
-    
-    args = parser.parse_args()
-    
+    parser.add_argument("--bible-version", nargs="+", default=["kjv"], choices=["kjv", "web", "rvr"],
+                        help="One or more Bible versions; one PDF is written per version (default: kjv)")
+    parser.add_argument("--transcription-tier", choices=["auto"] + list(TIERS),
+                        help="Speech model tier; 'auto' picks by duration, language and deadline (default: TRANSCRIPTION_TIER or auto)")
+    parser.add_argument("--language", help="Sermon language code, e.g. 'en'; skips language detection (default: TRANSCRIPTION_LANGUAGE)")
+    parser.add_argument("--deadline", type=float, help="Seconds the transcription should take at most (default: TRANSCRIPTION_DEADLINE_S)")
+    parser.add_argument("--stream", choices=STREAM_MODES,
+                        help="Transcribe a video without downloading it: AssemblyAI fetches the media URL ('url'), "
+                             "the audio is piped through the upload ('pipe'), or the URL with the pipe as fallback ('auto'); "
+                             "a failed stream falls back to downloading the file")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE_PATH, help="SQLite archive that stores every run and its transcript")
+    parser.add_argument("--no-archive", action="store_true", help="Neither reuse archived transcripts nor archive this run")
+    parser.add_argument("--bandwidth-limit", type=parse_bandwidth,
+                        help="Download cap shared by all downloads, e.g. 2M bytes/s (default: DOWNLOAD_BANDWIDTH_LIMIT)")
+    parser.add_argument("--sync-workers", type=int, default=DEFAULT_SYNC_WORKERS, help="Parallel downloads when syncing a playlist/channel")
+    parser.add_argument("--sync-limit", type=int, help="Process at most the N newest unprocessed videos of a playlist/channel")
+    parser.add_argument("--sync-full", action="store_true", help="Walk the whole playlist/channel instead of stopping at already-processed videos")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_ROOT,
+                        help="Each run writes to <output-dir>/runs/<run id>/; <output-dir>/latest.json indexes the newest run per series")
+    parser.add_argument("--compact", action="store_true", help="Smaller PDF: compressed streams, subset fonts, downsampled logo")
+    parser.add_argument("--profile", action="store_true", help="Attach cProfile and tracemalloc snapshots to each stage span")
+    parser.add_argument("--trace-file", default=os.path.join("logs", "trace.jsonl"), help="JSON-lines file that receives the run's spans")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port while running")
+    parser.add_argument("--metrics-host", default=METRICS_HOST,
+                        help="Interface for --metrics-port; use 0.0.0.0 to expose metrics beyond this machine")
+    parser.add_argument("--cassette", help="Record/replay external calls to/from this .jsonl.gz cassette")
+    parser.add_argument("--cassette-mode", default="replay", choices=["record", "replay"], help="Cassette mode (default: replay)")
+    parser.add_argument("--cassette-speed", default="zero", choices=["zero", "recorded"], help="Replay with no delay or at recorded latency")
+    return parser
+
+def main():
+    load_dotenv()
+
+    args = build_parser().parse_args()
+
+    tracer = configure_tracer(profile=args.profile)
+    if args.metrics_port:
+        serve_metrics(args.metrics_port, args.metrics_host)
+
+    try:
+        with ExitStack() as stack:
+            if args.cassette:
+                stack.enter_context(use_cassette(args.cassette, args.cassette_mode, args.cassette_speed))
+            if args.watch_folder:
+                run_drop_folder(args, tracer)
+                return
+            with tracer.span("pipeline", provider=args.provider, bible_version=",".join(args.bible_version)):
+                if args.url and classify_url(args.url.strip("`'\" ")) in ("playlist", "channel"):
+                    run_sync(args, tracer)
+                else:
+                    run_pipeline(args, tracer)
+    finally:
+        tracer.export_jsonl(args.trace_file)
+
+def run_pipeline(args, tracer):
     # 1. Audio Ingestion
     audio_path = args.file
+    source = os.path.abspath(audio_path) if audio_path else None
+    duration_s = None
     if args.url:
         # Sanitize URL (remove quotes/backticks if user accidentally included them)
-        clean_url = args.url.strip("`'\" ")
-        logger.info(f"Downloading audio from {clean_url}...")
-        downloader = AudioDownloader()
-        try:
-            audio_path = downloader.download_audio(clean_url)
-        except Exception as e:
-            logger.error(f"Download failed: {e}")
-            sys.exit(1)
+        clean_url = source = args.url.strip("`'\" ")
+        downloader = AudioDownloader(bandwidth_limit=args.bandwidth_limit)
+        if args.stream:
+            try:
+                with tracer.stage("download", url=clean_url, stream=args.stream):
+                    stream = downloader.resolve_stream(clean_url)
+            except Exception as e:
+                logger.warning(f"Could not resolve a media stream ({e}); downloading instead")
+            else:
+                process_audio(args, tracer, None, source, stream.duration, stream=stream, downloader=downloader)
+                return
+        audio_path, duration_s = download(tracer, downloader, clean_url)
             
     if not audio_path or not os.path.exists(audio_path):
         logger.error("No valid audio file provided or found.")
         sys.exit(1)
-        
-    # 2. Transcription
-    logger.info("Transcribing audio...")
-    transcriber = TranscriptionService()
+
+    process_audio(args, tracer, audio_path, source, duration_s)
+
+def download(tracer, downloader, url):
+    """Downloads a video's audio; returns its path and duration, or exits"""
+    logger.info(f"Downloading audio from {url}...")
     try:
-        transcript_data = transcriber.transcribe_audio(audio_path)
-        transcript_text = transcript_data.get("text", "")
-        if not transcript_text:
-            raise ValueError("Empty transcript generated.")
+        with tracer.stage("download", url=url):
+            audio_path = downloader.download_audio(url)
     except Exception as e:
-        logger.error(f"Transcription failed: {e}")
+        logger.error(f"Download failed: {e}")
         sys.exit(1)
-        
-    # 3. Content Generation
+    return audio_path, downloader.downloads.get(audio_path, {}).get("duration")
+
+def run_sync(args, tracer):
+    """Downloads the playlist/channel videos not archived yet and runs the pipeline on each"""
+    if args.no_archive:
+        logger.error("Syncing a playlist or channel needs the archive to know which videos are done")
+        sys.exit(1)
+    url = args.url.strip("`'\" ")
+    with ArchiveStore(args.archive) as archive:
+        known_ids = archive.processed_video_ids()
+    try:
+        with tracer.stage("sync", url=url, known=len(known_ids)):
+            items = sync_channel(url, known_ids, downloader=AudioDownloader(bandwidth_limit=args.bandwidth_limit),
+                                 max_workers=args.sync_workers, limit=args.sync_limit, full=args.sync_full)
+    except Exception as e:
+        logger.error(f"Listing {url} failed: {e}")
+        sys.exit(1)
+    if not items:
+        print(f"\nNo new videos at {url}")
+        return
+
+    failed = []
+    for item in items:
+        logger.info(f"Processing {item['title'] or item['id']} ({item['url']})...")
+        try:
+            with tracer.span("sermon", video_id=item["id"]):
+                process_audio(args, tracer, item["audio_path"], item["url"], item["duration"])
+        except SystemExit:
+            # A failed step exits the single-video pipeline; here it only skips this video,
+            # which stays unarchived and is retried by the next sync
+            failed.append(item["url"])
+    print(f"\nSynced {len(items) - len(failed)} of {len(items)} new video(s) from {url}")
+    if failed:
+        logger.error(f"Failed: {', '.join(failed)}")
+        sys.exit(1)
+
+def run_drop_folder(args, tracer):
+    """Processes recordings as they are copied into the drop folder, until interrupted"""
+    archive = None if args.no_archive else ArchiveStore(args.archive)
+
+    def is_known(audio_hash):
+        # Audio archived by earlier runs (or an earlier daemon) is not processed again
+        try:
+            return archive.find_sermon(audio_hash=audio_hash) is not None
+        except sqlite3.Error as e:
+            # The run itself looks the hash up again, so a busy archive only costs that lookup
+            logger.warning(f"Archive lookup failed: {e}")
+            return False
+
+    try:
+        watcher = DropFolderWatcher(args.watch_folder, is_known if archive else None, settle_s=args.settle)
+    except OSError as e:
+        logger.error(str(e))
+        if archive:
+            archive.close()
+        sys.exit(1)
+    try:
+        for job in watcher.jobs():
+            # The folder's defaults take precedence over the daemon's command line
+            job_args = argparse.Namespace(**{**vars(args), **job["defaults"]})
+            logger.info(f"Processing {job['path']}...")
+            try:
+                with tracer.span("pipeline", provider=args.provider, source=job["path"],
+                                 bible_version=",".join(job_args.bible_version)):
+                    process_audio(job_args, tracer, job["path"], os.path.abspath(job["path"]), archive=archive)
+            except SystemExit:
+                # Only this recording failed; it is retried when the file changes or the daemon restarts
+                logger.error(f"Failed: {job['path']}")
+            except Exception as e:
+                # E.g. the file was moved away after it settled, or the archive was locked; same as above
+                logger.error(f"Failed: {job['path']}: {e}")
+            # Each recording's spans are written as soon as it is done
+            tracer.export_jsonl(args.trace_file)
+    except KeyboardInterrupt:
+        logger.info("Drop folder watch stopped")
+    finally:
+        watcher.close()
+        if archive:
+            archive.close()
+
+def generate_guides(args, tracer, transcript_text, transcript_data, workspace):
+    """Generates the guide once with the LLM and enriches it per Bible version; exits on failure"""
     logger.info(f"Generating devotional content using {args.provider}...")
-    generator = ContentGenerator()
+    # Verses the preacher cites are fetched in the background while the LLM works
+    bible_fetcher = BibleFetcher()
+    cited_references = extract_references(transcript_text, limit=MAX_CITED_REFERENCES)
+    if cited_references:
+        bible_fetcher.prefetch(cited_references, args.bible_version)
+    router = None
+    if args.provider == "auto":
+        try:
+            router = Router.from_env()
+        except Exception as e:
+            logger.error(f"Routing policy could not be loaded: {e}")
+            sys.exit(1)
+        # Latency and error rates of earlier runs inform this run's choice
+        router.load_trace(args.trace_file)
+    generator = ContentGenerator(bible_fetcher=bible_fetcher, router=router, output_dir=workspace.directory)
     # Force provider if needed, though ContentGenerator uses factory internally based on env or args.
     # Current ContentGenerator implementation loads from factory but doesn't take provider arg in init.
     # We might want to pass it or rely on env. For now, assuming factory handles it or we update ContentGenerator.
     # *Correction*: ContentGenerator uses `get_llm_client` which checks env. 
     # To support CLI arg override, we'd need to modify ContentGenerator or set env var.
     # Let's set the env var for the session to ensure factory picks it up.
-    os.environ["LLM_PROVIDER"] = args.provider
+    if router is None:
+        os.environ["LLM_PROVIDER"] = args.provider
     
     try:
-        content_json = generator.generate_content(transcript_text, bible_version=args.bible_version)
+        with tracer.stage("generation", transcript_chars=len(transcript_text)):
+            base_content = generator.generate_base_content(transcript_text, cited_references)
+        if transcript_data.get("timings_path"):
+            # Verified quotes get the audio position they were spoken at
+            try:
+                with WordTimings(transcript_data["timings_path"]) as timings:
+                    linked = link_quotes_to_audio(base_content.quote_verification or [], timings)
+                logger.info(f"Linked {linked} quote(s) to their audio offsets")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Word timing unavailable: {e}")
         # Override series title if provided in CLI and not just default
-        if args.series != "Sermon Series" or "series_title" not in content_json:
-            content_json["series_title"] = args.series
+        if args.series != "Sermon Series" or not base_content.series_title:
+            base_content.series_title = args.series
         # Add preacher name to content json
-        content_json["preacher_name"] = args.preacher
+        base_content.preacher_name = args.preacher
+
+        # One generation, enriched once per requested Bible version
+        with tracer.stage("enrichment", versions=len(args.bible_version)):
+            versions = generator.enrich_for_versions(base_content, args.bible_version)
     except Exception as e:
         logger.error(f"Content generation failed: {e}")
         sys.exit(1)
+    return versions
+
+def reuse_guides(args, archived_guides):
+    """
+    The archived guides for the requested Bible versions, with this run's series and
+    preacher. A version that was not archived is enriched from another version's guide.
+    """
+    template = next(iter(archived_guides.values()))
+    versions = {}
+    bible_fetcher = None
+    for version in dict.fromkeys(args.bible_version):
+        guide = archived_guides.get(version)
+        if guide is None:
+            bible_fetcher = bible_fetcher or BibleFetcher()
+            guide = template.copy()
+            enrich_scriptures(guide, version, bible_fetcher)
+        if args.series != "Sermon Series":
+            guide.series_title = args.series
+        if args.preacher:
+            guide.preacher_name = args.preacher
+        versions[version] = guide
+    return versions
+
+def match_fingerprint(tracer, archive, audio_path):
+    """
+    Fingerprints the audio and looks for an archived sermon it matches or contains.
+    Returns the fingerprint (None if it could not be computed) and the sermon, if any.
+    """
+    with tracer.stage("fingerprint", audio_path=audio_path) as s:
+        prints = fingerprint_file(audio_path)
+        if prints is None:
+            return None, None
+        match = best_match(prints, archive.fingerprints(min_frames=int(MIN_MATCH_S / FRAME_S)))
+        s.set_attributes(frames=len(prints), matched=match is not None)
+    if not match:
+        return prints, None
+    sermon = archive.get_sermon(match[0])
+    logger.info(f"Same sermon as archived sermon #{match[0]} ({match[1]:.0%} of the shorter recording matches)")
+    return prints, sermon
+
+def find_archived(tracer, archive, audio_path, audio_hash, source):
+    """
+    The archived sermon this run's audio was already transcribed for: the same file (by
+    hash), the same streamed URL, or a different recording of it (by fingerprint).
+    Returns the sermon, this audio's fingerprint and, for a fingerprint match, the
+    archived guides to reuse.
+    """
+    if not archive:
+        return None, None, None
+    if audio_hash:
+        archived = archive.find_sermon(audio_hash=audio_hash)
+    elif source:
+        # Streamed audio has no file to hash; the same video URL identifies it
+        archived = archive.find_sermon(source=source)
+    else:
+        archived = None
+    if archived or not audio_path:
+        return archived, None, None
+    # A different recording of an archived sermon (the livestream and the edited upload) is recognised by its sound
+    fingerprint, archived = match_fingerprint(tracer, archive, audio_path)
+    return archived, fingerprint, archive.get_guides(archived["id"]) if archived else None
+
+def archived_transcript(archived, reused_guides):
+    """Transcript text and transcription data of an archived sermon"""
+    logger.info(f"Reusing transcript of archived sermon #{archived['id']}")
+    transcript_data = {"raw_path": archived["transcript_path"], "structured_data": {"id": archived["transcript_id"]}}
+    # The word timing sidecar sits next to the transcript it was written with (and only fits that recording)
+    timings_path = (archived["transcript_path"] or "").replace("_transcript.txt", "_words.bin")
+    if not reused_guides and timings_path.endswith("_words.bin") and os.path.exists(timings_path):
+        transcript_data["timings_path"] = timings_path
+    return archived["transcript"], transcript_data
+
+def process_audio(args, tracer, audio_path, source, duration_s=None, stream=None, downloader=None, archive=None):
+    """
+    Transcription through PDF and archive for one downloaded or local audio file, or for
+    a resolved `stream` that is transcribed without touching disk (`downloader` fetches
+    the file if streaming fails). An open `archive` (the daemon's) is used as it is;
+    otherwise the run opens its own and closes it however it ends, exits included.
+    """
+    if archive is not None or args.no_archive:
+        _process_audio(args, tracer, archive, audio_path, source, duration_s, stream, downloader)
+        return
+    with ArchiveStore(args.archive) as archive:
+        _process_audio(args, tracer, archive, audio_path, source, duration_s, stream, downloader)
+
+def _process_audio(args, tracer, archive, audio_path, source, duration_s, stream, downloader):
+    # Private directory per run: parallel runs of the same series never write the same file
+    workspace = RunWorkspace(args.output_dir)
+    logger.info(f"Run {workspace.run_id} writes to {workspace.directory}")
+
+    # 2. Transcription
+    audio_hash = file_hash(audio_path) if archive and audio_path else None
+    if archive and stream is not None:
+        logger.info("Streamed audio is not fingerprinted (a file downloaded after a failed stream is); only the same video URL finds an archived run")
+    archived, fingerprint, reused_guides = find_archived(tracer, archive, audio_path, audio_hash, source)
+    transcript_data = {}
+    if not archived:
+        logger.info("Transcribing audio...")
+        try:
+            # Turnaround of earlier runs per tier informs this run's choice
+            policy = TierPolicy()
+            policy.load_trace(args.trace_file)
+            transcriber = TranscriptionService(args.transcription_tier, args.language, args.deadline, policy,
+                                               output_dir=workspace.directory)
+            if stream is not None:
+                try:
+                    with tracer.stage("transcription", stream=stream.name, mode=args.stream):
+                        transcript_data = transcriber.transcribe_stream(stream, args.stream)
+                except Exception as e:
+                    logger.warning(f"Streamed transcription failed ({e}); downloading the file instead")
+                    audio_path, duration_s = download(tracer, downloader, source)
+                    audio_hash = file_hash(audio_path) if archive else None
+                    # The downloaded file is hashed and fingerprinted like any other before it is transcribed
+                    archived, fingerprint, reused_guides = find_archived(tracer, archive, audio_path, audio_hash, None)
+            if not archived:
+                if not transcript_data:
+                    with tracer.stage("transcription", audio_path=audio_path):
+                        transcript_data = transcriber.transcribe_audio(audio_path, duration_s)
+                transcript_text = transcript_data.get("text", "")
+                if not transcript_text:
+                    raise ValueError("Empty transcript generated.")
+        except Exception as e:
+            logger.error(f"Transcription failed: {e}")
+            sys.exit(1)
+    if archived:
+        transcript_text, transcript_data = archived_transcript(archived, reused_guides)
+
+    # 3. Content Generation
+    if reused_guides:
+        # A different recording of an archived sermon: its guides are reused as they are
+        logger.info(f"Reusing the guides of archived sermon #{archived['id']}")
+        with tracer.stage("enrichment", versions=len(args.bible_version), reused=True):
+            versions = reuse_guides(args, reused_guides)
+    else:
+        versions = generate_guides(args, tracer, transcript_text, transcript_data, workspace)
+    base_content = next(iter(versions.values()))
+    multi = len(versions) > 1
+    artifacts = {}
+    try:
+        for version, guide in versions.items():
+            content_path = save_content(guide, workspace.directory, suffix=f"_{version}" if multi else "")
+            artifacts[version] = {"content_path": content_path}
+    except OSError as e:
+        logger.error(f"Saving the content failed: {e}")
+        sys.exit(1)
         
     # 4. PDF Design
-    logger.info("Generating PDF...")
-    designer = PDFDesigner()
-    output_pdf = f"output/{content_json.get('series_title', 'study_guide').replace(' ', '_')}.pdf"
-    
+    series_key = (base_content.series_title or 'study_guide').replace(' ', '_')
+    base_name = workspace.path(series_key)
+    for version, guide in versions.items():
+        logger.info(f"Generating PDF ({version.upper()})...")
+        designer = PDFDesigner(compact=args.compact)
+        output_pdf = f"{base_name}_{version}.pdf" if multi else f"{base_name}.pdf"
+        artifacts[version]["pdf_path"] = output_pdf
+
+        try:
+            with tracer.stage("pdf_render", bible_version=version):
+                designer.create_pdf(guide, output_pdf, args.logo)
+            logger.info(f"Process Complete! Study Guide available at: {output_pdf}")
+            print(f"\nSUCCESS: Study Guide generated at {output_pdf} ({designer.output_size / 1024:.1f} KB)")
+        except Exception as e:
+            logger.error(f"PDF generation failed: {e}")
+            sys.exit(1)
+
+    # The finished run becomes the series' entry in the latest index
     try:
-        designer.create_pdf(content_json, output_pdf, args.logo)
-        logger.info(f"Process Complete! Study Guide available at: {output_pdf}")
-        print(f"\nSUCCESS: Study Guide generated at {output_pdf}")
-    except Exception as e:
-        logger.error(f"PDF generation failed: {e}")
-        sys.exit(1)
+        workspace.publish(series_key, artifacts, source=source)
+    except OSError as e:
+        logger.warning(f"Updating the latest index failed: {e}")
+
+    # 5. Archive
+    if archive:
+        try:
+            sermon_id = archive.ingest(
+                transcript_text, versions, source=source, audio_hash=audio_hash,
+                transcript_id=(transcript_data.get("structured_data") or {}).get("id"),
+                transcript_path=transcript_data.get("raw_path"), artifacts=artifacts,
+            )
+            if fingerprint is not None:
+                archive.add_fingerprint(sermon_id, to_bytes(fingerprint))
+        except Exception as e:
+            # The guide is already written; a failed archive write must not fail the run
+            logger.warning(f"Archiving failed: {e}")
 
 if __name__ == "__main__":
     main()
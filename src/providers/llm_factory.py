@@ -3,10 +3,10 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_llm_client():
-    provider = os.getenv('LLM_PROVIDER', 'gemini')
-    api_key = os.getenv('LLM_API_KEY')
-    model = os.getenv('LLM_MODEL')
+def get_llm_client(provider=None, api_key=None):
+    """Client for `provider` (default LLM_PROVIDER) authenticated with `api_key` (default LLM_API_KEY)."""
+    provider = provider or os.getenv('LLM_PROVIDER', 'gemini')
+    api_key = api_key or os.getenv('LLM_API_KEY')
 
     if provider == 'gemini':
         from google import genai
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger("prompt_cache")
+
+# Lifetime of an explicit cache; each run within it reuses the cached system prompt
+DEFAULT_TTL_S = 3600
+# A cache this close to expiring is replaced instead of being handed to a request
+EXPIRY_MARGIN_S = 60
+# HTTP statuses with which Gemini refuses a cache for good: the prompt is below the
+# model's minimum cacheable size (400) or the model does not support caching (400, 404).
+# Anything else (429, 5xx, network errors) is retried on the next request.
+REFUSED_STATUSES = (400, 404)
+
+
+def caching_enabled() -> bool:
+    """LLM_PROMPT_CACHE=0 turns explicit caching off (automatic prefix caching still applies)."""
+    return os.getenv("LLM_PROMPT_CACHE", "1").lower() not in ("0", "false", "off", "no")
+
+
+class GeminiPromptCache:
+    """
+    Explicit Gemini context caches holding a system instruction, one per client and model.
+    A cache is created on first use and replaced when it expires. Models that refuse
+    caching (e.g. the prompt is below their minimum cacheable size) are remembered, so
+    later requests go out uncached without trying again; after a transient failure the
+    request goes out uncached and the next one tries to create the cache again.
+    """
+
+    def __init__(self, ttl_s: Optional[float] = None):
+        self.ttl_s = ttl_s or float(os.getenv("LLM_PROMPT_CACHE_TTL_S", DEFAULT_TTL_S))
+        # Guards the dicts below only; never held across a request to Gemini
+        self._lock = threading.Lock()
+        # (client id, model, prompt hash) -> (cache name, expiry on the monotonic clock, client)
+        self._caches: Dict[Tuple[int, str, int], Tuple[str, float, Any]] = {}
+        self._unsupported: Set[Tuple[int, str, int]] = set()
+        # One lock per key, held while its cache is created, so concurrent requests for the
+        # same prompt create it once and requests for other prompts or models do not wait
+        self._creating: Dict[Tuple[int, str, int], threading.Lock] = {}
+
+    def _known(self, key: Tuple[int, str, int]) -> Tuple[bool, Optional[str]]:
+        """(decided, cache name): a live cache, or a refusal, makes creating one unnecessary"""
+        with self._lock:
+            entry = self._caches.get(key)
+            if entry and entry[1] - EXPIRY_MARGIN_S > time.monotonic():
+                return True, entry[0]
+            return key in self._unsupported, None
+
+    def get(self, client: Any, model: str, system_prompt: str) -> Optional[str]:
+        """Name of a live cache holding `system_prompt` for `model`, or None to send it uncached."""
+        key = (id(client), model, hash(system_prompt))
+        decided, name = self._known(key)
+        if decided:
+            return name
+        with self._lock:
+            creating = self._creating.setdefault(key, threading.Lock())
+        with creating:
+            # Another request may have created (or been refused) the cache while this one waited
+            decided, name = self._known(key)
+            if decided:
+                return name
+            from google.genai import types
+            try:
+                cache = client.caches.create(model=model, config=types.CreateCachedContentConfig(
+                    system_instruction=system_prompt, ttl=f"{int(self.ttl_s)}s", display_name="devotional-system-prompt",
+                ))
+            except Exception as e:
+                if getattr(e, "code", None) in REFUSED_STATUSES:
+                    logger.info(f"Context caching unavailable for {model} ({e}); sending the system prompt uncached")
+                    with self._lock:
+                        self._unsupported.add(key)
+                else:
+                    logger.warning(f"Creating a context cache for {model} failed ({e}); "
+                                   f"sending the system prompt uncached and retrying next time")
+                return None
+            if not isinstance(getattr(cache, "name", None), str):
+                logger.info(f"Context caching for {model} returned no cache name; sending the system prompt uncached")
+                with self._lock:
+                    self._unsupported.add(key)
+                return None
+            with self._lock:
+                # The client is kept so its id is not reused by another client while the entry lives
+                self._caches[key] = (cache.name, time.monotonic() + self.ttl_s, client)
+            logger.info(f"Cached the system prompt for {model} as {cache.name} for {self.ttl_s:.0f}s")
+            return cache.name
+
+    def invalidate(self, client: Any, model: str, system_prompt: str):
+        """Forgets the cache, e.g. after the provider no longer knows its name."""
+        with self._lock:
+            self._caches.pop((id(client), model, hash(system_prompt)), None)
+
+
+_gemini_cache = GeminiPromptCache()
+
+
+def get_gemini_cache() -> GeminiPromptCache:
+    """Process-wide caches, so every sermon of a sync or batch run shares them"""
+    return _gemini_cache
@@ -0,0 +1,177 @@
+import json
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger("llm_router")
+
+# Outcomes remembered per route
+WINDOW = 20
+# Latency assumed for a route that has no observations yet
+DEFAULT_EXPECTED_LATENCY_S = 30.0
+# Routes failing more often than this are skipped while a healthier route is eligible
+MAX_ERROR_RATE = 0.5
+# Bytes read from the end of the trace file to seed the rolling statistics
+TRACE_TAIL_BYTES = 512 * 1024
+
+
+class Route:
+    """One provider/model choice and the limits it is eligible under."""
+
+    def __init__(self, provider: str, model: str, context_window: int = 128_000, cost_per_mtok: float = 0.0,
+                 min_tokens: int = 0, max_tokens: Optional[int] = None, expected_latency_s: Optional[float] = None,
+                 api_key_env: Optional[str] = None):
+        self.provider = provider
+        self.model = model
+        self.context_window = context_window
+        self.cost_per_mtok = cost_per_mtok
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self.expected_latency_s = expected_latency_s or DEFAULT_EXPECTED_LATENCY_S
+        self.api_key_env = api_key_env
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.provider, self.model
+
+    def api_key(self) -> Optional[str]:
+        """Key from `api_key_env`, else <PROVIDER>_API_KEY, else the shared LLM_API_KEY."""
+        for name in (self.api_key_env, f"{self.provider.upper()}_API_KEY", "LLM_API_KEY"):
+            if name and os.getenv(name):
+                return os.getenv(name)
+        return None
+
+    def __repr__(self) -> str:
+        return f"{self.provider}/{self.model}"
+
+
+class RouteDecision:
+    """Routes ranked best first, with the score breakdown that was logged."""
+
+    def __init__(self, ranked: List[Route], scores: Dict[Tuple[str, str], Dict[str, float]], prompt_tokens: int):
+        self.ranked = ranked
+        self.scores = scores
+        self.prompt_tokens = prompt_tokens
+
+    @property
+    def route(self) -> Route:
+        return self.ranked[0]
+
+
+class Router:
+    """
+    Picks the provider and model for a request from its token count, each route's
+    context window and token range, and the rolling latency and error rate observed
+    per route. Among eligible routes the lowest
+    `latency_weight * latency / fastest + cost_weight * cost / cheapest` wins, so the
+    weights trade latency against cost.
+    """
+
+    def __init__(self, routes: List[Route], latency_weight: float = 1.0, cost_weight: float = 1.0,
+                 output_tokens: int = 2500):
+        if not routes:
+            raise ValueError("Router needs at least one route")
+        self.routes = routes
+        self.latency_weight = latency_weight
+        self.cost_weight = cost_weight
+        self.output_tokens = output_tokens
+        self._lock = threading.Lock()
+        self._outcomes: Dict[Tuple[str, str], Deque[Tuple[float, bool]]] = {r.key: deque(maxlen=WINDOW) for r in routes}
+
+    @classmethod
+    def from_config(cls, path: str) -> "Router":
+        """
+        Loads a JSON policy: {"latency_weight": 1, "cost_weight": 1, "routes": [{"provider":
+        "groq", "model": "...", "context_window": 128000, "cost_per_mtok": 0.59, "max_tokens": 8000}, ...]}
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        routes = [Route(**route) for route in config.get("routes", [])]
+        return cls(routes, config.get("latency_weight", 1.0), config.get("cost_weight", 1.0),
+                   config.get("output_tokens", 2500))
+
+    @classmethod
+    def from_env(cls) -> "Router":
+        """The policy file named by LLM_ROUTES, or a single route from LLM_PROVIDER / LLM_MODEL."""
+        path = os.getenv("LLM_ROUTES")
+        if path:
+            return cls.from_config(path)
+        model = os.getenv("LLM_MODEL")
+        if not model:
+            raise ValueError("Set LLM_ROUTES to a routing policy file, or LLM_MODEL for a single route")
+        return cls([Route(os.getenv("LLM_PROVIDER", "gemini"), model, context_window=1_000_000)])
+
+    def record(self, provider: str, model: str, latency_s: float, ok: bool):
+        with self._lock:
+            outcomes = self._outcomes.get((provider, model))
+            if outcomes is not None:
+                outcomes.append((latency_s, ok))
+
+    def load_trace(self, path: str) -> int:
+        """Seeds the rolling statistics from `llm.call` spans in a trace JSON-lines file."""
+        if not os.path.exists(path):
+            return 0
+        offset = max(0, os.path.getsize(path) - TRACE_TAIL_BYTES)
+        with open(path, "rb") as f:
+            f.seek(offset)
+            lines = f.read().decode("utf-8", errors="replace").splitlines()
+        if offset:
+            lines = lines[1:]  # starts mid-line
+        seeded = 0
+        for line in lines:
+            if '"llm.call"' not in line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            attrs = record.get("attributes", {})
+            if record.get("name") == "llm.call" and record.get("duration_s") is not None:
+                self.record(attrs.get("provider"), attrs.get("model"), record["duration_s"], record.get("status") == "ok")
+                seeded += 1
+        return seeded
+
+    def stats(self, route: Route) -> Tuple[float, float, int]:
+        """(expected latency s, error rate, observations) for a route."""
+        with self._lock:
+            outcomes = list(self._outcomes[route.key])
+        latencies = sorted(latency for latency, ok in outcomes if ok)
+        latency = latencies[len(latencies) // 2] if latencies else route.expected_latency_s
+        errors = sum(1 for _, ok in outcomes if not ok) / len(outcomes) if outcomes else 0.0
+        return latency, errors, len(outcomes)
+
+    def choose(self, prompt_tokens: int) -> RouteDecision:
+        """Ranks the routes for a prompt of `prompt_tokens` and logs the decision."""
+        required = prompt_tokens + self.output_tokens
+        fits = [r for r in self.routes
+                if r.context_window >= required and prompt_tokens >= r.min_tokens
+                and (r.max_tokens is None or prompt_tokens <= r.max_tokens)]
+        if not fits:
+            # Nothing is sized for this request; the largest context window is the best bet
+            fits = [max(self.routes, key=lambda r: r.context_window)]
+            logger.warning(f"No route is configured for {prompt_tokens} prompt tokens; falling back to {fits[0]}")
+
+        stats = {r.key: self.stats(r) for r in fits}
+        healthy = [r for r in fits if stats[r.key][1] <= MAX_ERROR_RATE] or fits
+        fastest = min(stats[r.key][0] for r in healthy) or 1e-9
+        costs = {r.key: required * r.cost_per_mtok / 1e6 for r in healthy}
+        cheapest, priciest = min(costs.values()), max(costs.values())
+
+        scores = {}
+        for r in healthy:
+            latency, error_rate, observed = stats[r.key]
+            # With a free route in the running, cost is scaled to 1..2 instead of divided by zero
+            cost_ratio = costs[r.key] / cheapest if cheapest else 1 + (costs[r.key] / priciest if priciest else 0)
+            score = self.latency_weight * latency / fastest + self.cost_weight * cost_ratio + error_rate
+            scores[r.key] = {"score": round(score, 3), "latency_s": round(latency, 2), "error_rate": round(error_rate, 2),
+                             "cost_usd": round(costs[r.key], 5), "observed": observed}
+        ranked = sorted(healthy, key=lambda r: scores[r.key]["score"])
+        ranked += [r for r in fits if r not in healthy]
+
+        decision = RouteDecision(ranked, scores, prompt_tokens)
+        candidates = ", ".join(f"{r}={scores[r.key]['score']}" for r in ranked if r.key in scores)
+        logger.info(f"Routing {prompt_tokens} prompt tokens to {decision.route} (scores: {candidates})")
+        return decision
@@ -0,0 +1,375 @@
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from src.generation.models import Guide
+from src.utils.logger import setup_logger
+from src.utils.scripture_refs import extract_references, normalize_reference
+from src.utils.youtube_urls import video_id as youtube_video_id
+
+logger = setup_logger("archive")
+
+DEFAULT_ARCHIVE_PATH = os.path.join("output", "archive.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sermons (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    source TEXT,
+    audio_hash TEXT,
+    transcript_id TEXT,
+    preacher TEXT,
+    series_title TEXT,
+    transcript TEXT NOT NULL,
+    transcript_path TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sermons_created_at ON sermons(created_at);
+CREATE INDEX IF NOT EXISTS idx_sermons_preacher ON sermons(preacher COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_sermons_series ON sermons(series_title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_sermons_source ON sermons(source);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sermons_audio_hash ON sermons(audio_hash);
+
+CREATE TABLE IF NOT EXISTS guides (
+    sermon_id INTEGER NOT NULL REFERENCES sermons(id) ON DELETE CASCADE,
+    bible_version TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    content TEXT NOT NULL,
+    content_path TEXT,
+    pdf_path TEXT,
+    PRIMARY KEY (sermon_id, bible_version)
+);
+
+CREATE TABLE IF NOT EXISTS scripture_refs (
+    sermon_id INTEGER NOT NULL REFERENCES sermons(id) ON DELETE CASCADE,
+    reference TEXT NOT NULL,
+    book TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    -- First and last verse of the passage (equal for one verse); NULL for a whole chapter
+    verse_start INTEGER,
+    verse_end INTEGER,
+    origin TEXT NOT NULL,
+    PRIMARY KEY (sermon_id, reference, origin)
+);
+CREATE INDEX IF NOT EXISTS idx_refs_book_chapter ON scripture_refs(book, chapter, verse_start);
+
+-- YouTube videos turned into guides; channel syncs skip these
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    sermon_id INTEGER NOT NULL REFERENCES sermons(id) ON DELETE CASCADE,
+    processed_at TEXT NOT NULL
+);
+
+-- Acoustic fingerprint of each sermon's audio (src/ingestion/fingerprint.py), little-endian uint32 per frame
+CREATE TABLE IF NOT EXISTS fingerprints (
+    sermon_id INTEGER PRIMARY KEY REFERENCES sermons(id) ON DELETE CASCADE,
+    frames INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+
+-- rowid = sermons.id
+CREATE VIRTUAL TABLE IF NOT EXISTS sermon_text USING fts5(
+    series_title, transcript, reflections, tokenize = 'porter unicode61'
+);
+"""
+
+_REFERENCE_PARTS = re.compile(r"^(?P<book>.+?) (?P<chapter>\d+)(?::(?P<verse>\d+)(?:-(?P<end>\d+))?)?")
+
+
+def _verse_range(parts: "re.Match") -> Tuple[Optional[int], Optional[int]]:
+    if not parts["verse"]:
+        return None, None
+    return int(parts["verse"]), int(parts["end"] or parts["verse"])
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's bytes, the key used to recognise audio that was already processed."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _fts_query(text: str) -> str:
+    # Every word as a quoted term: implicit AND, and no FTS5 syntax errors on ":" or "-"
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class ArchiveStore:
+    """
+    SQLite archive of every run: transcript, generated guides (one per Bible version),
+    scripture references and artifact paths. Transcripts and reflections are full-text
+    indexed (FTS5); date, preacher, series and references have ordinary indexes.
+    """
+
+    def __init__(self, path: str = DEFAULT_ARCHIVE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        # Archives created before verse ranges were indexed stored only the first verse
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(scripture_refs)")}
+        if "verse_end" in columns:
+            return
+        with self.conn:
+            self.conn.execute("ALTER TABLE scripture_refs RENAME COLUMN verse TO verse_start")
+            self.conn.execute("ALTER TABLE scripture_refs ADD COLUMN verse_end INTEGER")
+            for row in self.conn.execute("SELECT rowid, reference FROM scripture_refs").fetchall():
+                parts = _REFERENCE_PARTS.match(row["reference"])
+                if parts:
+                    self.conn.execute("UPDATE scripture_refs SET verse_end = ? WHERE rowid = ?",
+                                      (_verse_range(parts)[1], row["rowid"]))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> "ArchiveStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ingest(self, transcript_text: str, guides: Dict[str, Union[Guide, Dict[str, Any]]], source: Optional[str] = None,
+               audio_hash: Optional[str] = None, transcript_id: Optional[str] = None,
+               transcript_path: Optional[str] = None, artifacts: Optional[Dict[str, Dict[str, str]]] = None,
+               video_id: Optional[str] = None) -> int:
+        """
+        Stores one run and returns the sermon id. `guides` maps Bible version to content;
+        `artifacts` maps version to {"content_path", "pdf_path"}. A sermon archived before is
+        updated in place, and guides of the same version replaced: the same audio by hash or,
+        for runs without audio to hash (streamed, batch), the same source or video.
+        `video_id` (the YouTube ID, taken from `source` when not given) marks the video processed.
+        """
+        artifacts = artifacts or {}
+        video_id = video_id or youtube_video_id(source or "")
+        guides = {version: Guide.coerce(content) for version, content in guides.items()}
+        first = next(iter(guides.values()), Guide())
+        preacher = first.preacher_name or None
+        series = first.series_title or None
+
+        with self.conn:
+            if audio_hash:
+                existing = self.find_sermon(audio_hash=audio_hash)
+            else:
+                existing = self.find_sermon(source=source) if source else None
+                if not existing and video_id:
+                    existing = self._find_video(video_id)
+            if existing:
+                sermon_id = existing["id"]
+                # sermon_text below gets the same transcript, so search and the sermon never disagree
+                self.conn.execute(
+                    "UPDATE sermons SET source = COALESCE(?, source), transcript_id = COALESCE(?, transcript_id), "
+                    "preacher = ?, series_title = ?, transcript = ?, transcript_path = COALESCE(?, transcript_path) "
+                    "WHERE id = ?",
+                    (source, transcript_id, preacher, series, transcript_text, transcript_path, sermon_id),
+                )
+            else:
+                sermon_id = self.conn.execute(
+                    "INSERT INTO sermons (created_at, source, audio_hash, transcript_id, preacher, series_title, "
+                    "transcript, transcript_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (_now(), source, audio_hash, transcript_id, preacher, series, transcript_text, transcript_path),
+                ).lastrowid
+
+            for version, content in guides.items():
+                paths = artifacts.get(version, {})
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO guides (sermon_id, bible_version, created_at, content, content_path, pdf_path) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (sermon_id, version, _now(), content.to_json().decode("utf-8"),
+                     paths.get("content_path"), paths.get("pdf_path")),
+                )
+
+            guide_refs = [first.memory_verse.reference] + [day.scripture.reference for day in first.days]
+            self.conn.execute("DELETE FROM scripture_refs WHERE sermon_id = ?", (sermon_id,))
+            for origin, refs in (("guide", guide_refs), ("transcript", extract_references(transcript_text))):
+                for ref in refs:
+                    self._add_reference(sermon_id, ref, origin)
+
+            if video_id:
+                self.conn.execute("INSERT OR REPLACE INTO videos (video_id, sermon_id, processed_at) VALUES (?, ?, ?)",
+                                  (video_id, sermon_id, _now()))
+
+            reflections = "\n\n".join(day.reflection for day in first.days)
+            self.conn.execute("DELETE FROM sermon_text WHERE rowid = ?", (sermon_id,))
+            self.conn.execute(
+                "INSERT INTO sermon_text (rowid, series_title, transcript, reflections) VALUES (?, ?, ?, ?)",
+                (sermon_id, series or "", transcript_text, reflections),
+            )
+
+        logger.info(f"Archived sermon #{sermon_id} ({len(guides)} guide(s)) in {self.path}")
+        return sermon_id
+
+    def _add_reference(self, sermon_id: int, reference: Optional[str], origin: str):
+        canonical = normalize_reference(reference or "")
+        parts = _REFERENCE_PARTS.match(canonical or "")
+        if not parts:
+            return
+        self.conn.execute(
+            "INSERT OR IGNORE INTO scripture_refs (sermon_id, reference, book, chapter, verse_start, verse_end, origin) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (sermon_id, canonical, parts["book"], int(parts["chapter"]), *_verse_range(parts), origin),
+        )
+
+    def find_sermon(self, source: Optional[str] = None, audio_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Most recent archived sermon with this audio hash or source URL/path, if any."""
+        if audio_hash:
+            row = self.conn.execute("SELECT * FROM sermons WHERE audio_hash = ?", (audio_hash,)).fetchone()
+        elif source:
+            row = self.conn.execute("SELECT * FROM sermons WHERE source = ? ORDER BY id DESC LIMIT 1", (source,)).fetchone()
+        else:
+            row = None
+        return dict(row) if row else None
+
+    def _find_video(self, video_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT sermons.* FROM videos JOIN sermons ON sermons.id = videos.sermon_id WHERE videos.video_id = ?",
+            (video_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def add_fingerprint(self, sermon_id: int, data: bytes):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO fingerprints (sermon_id, frames, data) VALUES (?, ?, ?)",
+                              (sermon_id, len(data) // 4, data))
+
+    def fingerprints(self, min_frames: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """(sermon id, fingerprint) of every fingerprinted sermon with at least `min_frames` frames"""
+        for row in self.conn.execute("SELECT sermon_id, data FROM fingerprints WHERE frames >= ?", (min_frames,)):
+            yield row["sermon_id"], row["data"]
+
+    def get_sermon(self, sermon_id: int) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT * FROM sermons WHERE id = ?", (sermon_id,)).fetchone()
+        return dict(row) if row else None
+
+    def processed_video_ids(self) -> Set[str]:
+        """IDs of every YouTube video archived, including runs archived before video IDs were recorded."""
+        ids = {row[0] for row in self.conn.execute("SELECT video_id FROM videos")}
+        for (source,) in self.conn.execute("SELECT source FROM sermons WHERE source LIKE '%youtu%'"):
+            video_id = youtube_video_id(source)
+            if video_id:
+                ids.add(video_id)
+        return ids
+
+    def get_guides(self, sermon_id: int) -> Dict[str, Guide]:
+        rows = self.conn.execute(
+            "SELECT bible_version, content FROM guides WHERE sermon_id = ? ORDER BY bible_version", (sermon_id,)
+        ).fetchall()
+        return {row["bible_version"]: Guide.from_json(row["content"]) for row in rows}
+
+    def search(self, text: Optional[str] = None, preacher: Optional[str] = None, series: Optional[str] = None,
+               reference: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+               limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Sermons matching every given filter. `text` is a full-text search over
+        transcripts, reflections and series titles (best matches first, with a snippet);
+        `reference` matches a chapter ("Philippians 4"), a verse ("Phil 4:13", also found in
+        a sermon citing "Philippians 4:10-13") or a range (any overlapping passage);
+        `since`/`until` are ISO dates compared against the archive date.
+        """
+        columns = "s.id, s.created_at, s.source, s.preacher, s.series_title"
+        joins, clauses, params = "", [], []
+        order = "s.created_at DESC, s.id DESC"
+
+        if text:
+            columns += ", snippet(sermon_text, -1, '[', ']', '...', 12) AS snippet"
+            joins = " JOIN sermon_text ON sermon_text.rowid = s.id"
+            clauses.append("sermon_text MATCH ?")
+            params.append(_fts_query(text))
+            order = "bm25(sermon_text)"
+        if preacher:
+            clauses.append("s.preacher = ? COLLATE NOCASE")
+            params.append(preacher)
+        if series:
+            clauses.append("s.series_title = ? COLLATE NOCASE")
+            params.append(series)
+        if reference:
+            parts = _REFERENCE_PARTS.match(normalize_reference(reference) or "")
+            if not parts:
+                raise ValueError(f"Unrecognised scripture reference: {reference}")
+            ref_clause = "SELECT sermon_id FROM scripture_refs WHERE book = ? AND chapter = ?"
+            params += [parts["book"], int(parts["chapter"])]
+            if parts["verse"]:
+                start, end = _verse_range(parts)
+                ref_clause += " AND (verse_start IS NULL OR (verse_start <= ? AND verse_end >= ?))"
+                params += [end, start]
+            clauses.append(f"s.id IN ({ref_clause})")
+        if since:
+            clauses.append("s.created_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("s.created_at < ?")
+            params.append(until)
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.conn.execute(
+            f"SELECT {columns} FROM sermons s{joins}{where} ORDER BY {order} LIMIT ?", (*params, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the archive of transcripts and study guides")
+    parser.add_argument("--db", default=DEFAULT_ARCHIVE_PATH, help="Archive database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query = commands.add_parser("query", help="Search archived sermons")
+    query.add_argument("text", nargs="?", help="Words to find in transcripts, reflections and series titles")
+    query.add_argument("--preacher")
+    query.add_argument("--series")
+    query.add_argument("--reference", help='Scripture cited, e.g. "Philippians 4" or "Phil 4:13"')
+    query.add_argument("--since", help="ISO date, e.g. 2026-01-01")
+    query.add_argument("--until", help="ISO date (exclusive)")
+    query.add_argument("--limit", type=int, default=20)
+
+    show = commands.add_parser("show", help="Print an archived guide as JSON")
+    show.add_argument("sermon_id", type=int)
+    show.add_argument("--bible-version", help="Guide version (default: first archived)")
+
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"No archive at {args.db}", file=sys.stderr)
+        sys.exit(1)
+
+    with ArchiveStore(args.db) as store:
+        if args.command == "query":
+            try:
+                rows = store.search(args.text, args.preacher, args.series, args.reference, args.since, args.until, args.limit)
+            except ValueError as e:
+                print(e, file=sys.stderr)
+                sys.exit(2)
+            for row in rows:
+                line = f"#{row['id']:<5} {row['created_at'][:10]}  {row['series_title'] or '-'}  ({row['preacher'] or 'unknown'})"
+                print(line)
+                if row.get("snippet"):
+                    print(f"       {row['snippet']}")
+            print(f"\n{len(rows)} sermon(s)")
+        else:
+            guides = store.get_guides(args.sermon_id)
+            if not guides:
+                print(f"No guides archived for sermon #{args.sermon_id}", file=sys.stderr)
+                sys.exit(1)
+            version = args.bible_version or next(iter(guides))
+            if version not in guides:
+                print(f"Sermon #{args.sermon_id} has no {version} guide (archived: {', '.join(guides)})", file=sys.stderr)
+                sys.exit(1)
+            print(guides[version].to_json(indent=True).decode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+import wave
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import assemblyai as aai
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger("transcription_tiers")
+
+# Turnarounds remembered per tier
+WINDOW = 20
+# Duration assumed when an audio file's length cannot be determined (a typical sermon)
+DEFAULT_DURATION_S = 45 * 60
+# Turnaround the automatic policy aims for when no deadline is given (Sunday-evening turnaround)
+DEFAULT_DEADLINE_S = 15 * 60
+# Longest audio in a configured language that goes to the cheapest tier: a known language
+# needs no detection, and a single preacher of ordinary length is transcribed well enough by it
+FAST_MAX_DURATION_S = 90 * 60
+# Bitrate used to estimate the duration of compressed audio from its size (YouTube's bestaudio is ~128 kbps)
+ESTIMATE_BITRATE_BPS = 128_000
+# Bytes read from the end of the trace file to seed the turnaround statistics
+TRACE_TAIL_BYTES = 512 * 1024
+
+
+class Tier:
+    """An AssemblyAI speech model with its rank and expected turnaround."""
+
+    def __init__(self, name: str, speech_model: aai.SpeechModel, quality: int, realtime_factor: float,
+                 overhead_s: float = 15.0, languages: Optional[Tuple[str, ...]] = None, auto: bool = True):
+        self.name = name
+        self.speech_model = speech_model
+        self.quality = quality
+        # Turnaround seconds per second of audio, until runs have been observed
+        self.realtime_factor = realtime_factor
+        self.overhead_s = overhead_s
+        # None = every language, with automatic language detection
+        self.languages = languages
+        # Whether the automatic policy may pick this tier (or only an explicit --transcription-tier)
+        self.auto = auto
+
+    def supports(self, language: Optional[str]) -> bool:
+        if self.languages is None:
+            return True
+        return language is not None and language.split("_")[0].lower() in self.languages
+
+    def __repr__(self) -> str:
+        return f"{self.name} ({self.speech_model.value})"
+
+
+TIERS: Dict[str, Tier] = {
+    "fast": Tier("fast", aai.SpeechModel.nano, quality=1, realtime_factor=0.02),
+    "standard": Tier("standard", aai.SpeechModel.best, quality=2, realtime_factor=0.05),
+    # English-only and billed higher; used when asked for by name
+    "premium": Tier("premium", aai.SpeechModel.slam_1, quality=3, realtime_factor=0.08, languages=("en",), auto=False),
+}
+
+
+def audio_duration(path: str) -> Optional[float]:
+    """Length of an audio file in seconds: exact for WAV, estimated from the size otherwise."""
+    try:
+        with wave.open(path, "rb") as w:
+            return w.getnframes() / float(w.getframerate())
+    except (wave.Error, EOFError):
+        pass
+    except OSError:
+        return None
+    return os.path.getsize(path) * 8 / ESTIMATE_BITRATE_BPS
+
+
+class TierPolicy:
+    """
+    Picks the transcription tier for a file: the first automatic tier whose predicted
+    turnaround (from the recent runs of that tier, per second of audio) meets the deadline
+    (DEFAULT_DEADLINE_S if none is given), else the fastest. Tiers are tried cheapest first
+    when the language is configured and the audio is at most `fast_max_s` long, otherwise
+    best first. Tiers that cannot handle the configured language are skipped.
+    """
+
+    def __init__(self, tiers: Optional[Dict[str, Tier]] = None, fast_max_s: Optional[float] = None):
+        self.tiers = tiers or TIERS
+        if fast_max_s is None:
+            fast_max_s = float(os.getenv("TRANSCRIPTION_FAST_MAX_S") or FAST_MAX_DURATION_S)
+        self.fast_max_s = fast_max_s
+        self._lock = threading.Lock()
+        self._factors: Dict[str, Deque[float]] = {name: deque(maxlen=WINDOW) for name in self.tiers}
+
+    def record(self, tier: str, audio_s: float, turnaround_s: float):
+        """Adds one observed run (turnaround includes the upload)."""
+        if tier not in self._factors or not audio_s:
+            return
+        with self._lock:
+            self._factors[tier].append(max(0.0, turnaround_s - self.tiers[tier].overhead_s) / audio_s)
+
+    def load_trace(self, path: str) -> int:
+        """Seeds turnaround statistics from `transcription.poll` spans in a trace JSON-lines file."""
+        if not os.path.exists(path):
+            return 0
+        offset = max(0, os.path.getsize(path) - TRACE_TAIL_BYTES)
+        with open(path, "rb") as f:
+            f.seek(offset)
+            lines = f.read().decode("utf-8", errors="replace").splitlines()
+        if offset:
+            lines = lines[1:]  # starts mid-line
+        seeded = 0
+        for line in lines:
+            if '"transcription.poll"' not in line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            attrs = record.get("attributes", {})
+            if record.get("status") == "ok" and attrs.get("tier") and attrs.get("turnaround_s") is not None:
+                self.record(attrs["tier"], attrs.get("audio_duration_s") or 0, attrs["turnaround_s"])
+                seeded += 1
+        return seeded
+
+    def predict(self, tier: Tier, duration_s: float) -> float:
+        """Expected turnaround in seconds for `duration_s` of audio."""
+        with self._lock:
+            factors = sorted(self._factors[tier.name])
+        factor = factors[len(factors) // 2] if factors else tier.realtime_factor
+        return tier.overhead_s + factor * duration_s
+
+    def choose(self, duration_s: Optional[float] = None, language: Optional[str] = None,
+               deadline_s: Optional[float] = None, requested: str = "auto") -> Tier:
+        if requested != "auto":
+            tier = self.tiers[requested]
+            if tier.supports(language):
+                return tier
+            fallback = self.tiers["standard"]
+            logger.warning(f"Tier {tier} does not support language '{language or 'auto-detect'}'; using {fallback}")
+            return fallback
+
+        duration = duration_s or DEFAULT_DURATION_S
+        deadline = deadline_s if deadline_s is not None else DEFAULT_DEADLINE_S
+        cheapest_first = language is not None and duration <= self.fast_max_s
+        candidates: List[Tier] = sorted(
+            (t for t in self.tiers.values() if t.auto and t.supports(language)),
+            key=lambda t: t.quality if cheapest_first else -t.quality,
+        )
+        predictions = {t.name: round(self.predict(t, duration), 1) for t in candidates}
+        fitting = [t for t in candidates if predictions[t.name] <= deadline]
+        tier = fitting[0] if fitting else min(candidates, key=lambda t: predictions[t.name])
+        if not fitting:
+            logger.warning(f"No tier is expected to meet the {deadline:.0f}s deadline; using the fastest, {tier}")
+        logger.info(f"Transcription tier for {duration / 60:.1f} min of audio"
+                    f"{f' in {language!r}' if language else ''}: {tier} "
+                    f"(predicted turnaround: {predictions}, deadline: {deadline:.0f}s"
+                    f"{', cheapest first' if cheapest_first else ''})")
+        return tier
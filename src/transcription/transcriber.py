@@ -1,13 +1,27 @@
 import assemblyai as aai
 import os
 import json
-from typing import Dict, Any
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, Any, Optional, Union
 from src.utils.logger import setup_logger
+from src.ingestion.stream import AudioStream
+from src.transcription.tiers import TIERS, TierPolicy, audio_duration
+from src.transcription.word_timings import write_word_timings
+from src.utils.tracing import span
+from src.utils.cassette import replayable, scalar_fields
+from src.utils.rate_limit import governed
+from src.utils.workspace import DEFAULT_OUTPUT_ROOT, atomic_write
 
 logger = setup_logger("transcription_service")
 
+# How a stream reaches AssemblyAI: its media URL, piped through an upload, or the URL with the pipe as fallback
+STREAM_MODES = ("auto", "url", "pipe")
+
 class TranscriptionService:
-    def __init__(self):
+    def __init__(self, tier: Optional[str] = None, language: Optional[str] = None,
+                 deadline_s: Optional[float] = None, policy: Optional[TierPolicy] = None,
+                 output_dir: str = DEFAULT_OUTPUT_ROOT):
         api_key = os.getenv("ASSEMBLYAI_API_KEY")
         if not api_key:
             logger.warning("ASSEMBLYAI_API_KEY not found in environment variables.")
@@ -15,46 +29,125 @@ class TranscriptionService:
             aai.settings.api_key = api_key
         
         self.transcriber = aai.Transcriber()
+        # Tier "auto" lets the policy choose per file; a configured language skips language detection
+        self.tier = tier or os.getenv("TRANSCRIPTION_TIER", "auto")
+        if self.tier != "auto" and self.tier not in TIERS:
+            raise ValueError(f"Unknown transcription tier: {self.tier}")
+        self.language = language or os.getenv("TRANSCRIPTION_LANGUAGE") or None
+        deadline = deadline_s if deadline_s is not None else os.getenv("TRANSCRIPTION_DEADLINE_S")
+        self.deadline_s = float(deadline) if deadline else None
+        self.policy = policy or TierPolicy()
+        # Transcript files go here, e.g. a run's workspace directory
+        self.output_dir = output_dir
 
-    def transcribe_audio(self, audio_path: str) -> Dict[str, Any]:
+    def transcribe_audio(self, audio_path: str, duration_s: Optional[float] = None) -> Dict[str, Any]:
         """
         Transcribes audio file using AssemblyAI.
+        `duration_s` (e.g. from the video metadata) informs the tier choice; it is
+        measured or estimated from the file when not given.
         Returns a dictionary containing:
         - text: Raw text
         - json_path: Path to saved JSON structure
         - raw_path: Path to saved raw text
         - structured_data: The full structured data dict
+        - timings_path: Word timing sidecar (None when the transcript has no words)
+        - tier / turnaround_s: Tier used and seconds from upload to finished transcript
         """
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
         logger.info(f"Starting transcription for: {audio_path}")
 
-        # Configuration matching requirements
-        # Note: speech_model=aai.SpeechModel.best maps to Universal-1
-        config = aai.TranscriptionConfig(
-            speech_model=aai.SpeechModel.best, 
-            speaker_labels=False,  # Disabled per user request
-            language_detection=True,
+        # Cassette key: the audio file's identity, not the per-run upload URL
+        audio_bytes = os.path.getsize(audio_path)
+        audio_key = {"name": os.path.basename(audio_path), "size": audio_bytes}
+        return self._transcribe(
+            os.path.basename(audio_path), audio_key, duration_s or audio_duration(audio_path), "file",
+            upload=lambda: self.transcriber.upload_file(audio_path), audio_bytes=audio_bytes,
+        )
+
+    def transcribe_stream(self, stream: AudioStream, mode: str = "auto") -> Dict[str, Any]:
+        """
+        Transcribes a resolved media stream without writing it to disk. Mode "url" has
+        AssemblyAI fetch the media URL itself; "pipe" reads the stream here and forwards
+        it chunk by chunk as the upload body; "auto" tries the URL first and pipes when
+        AssemblyAI cannot fetch it (YouTube media URLs are often bound to the resolving IP).
+        Returns the same dictionary as transcribe_audio.
+        """
+        if mode not in STREAM_MODES:
+            raise ValueError(f"Unknown stream mode: {mode}")
+        logger.info(f"Starting streamed transcription for: {stream.name}")
+        # Cassette key: the video and how it reached AssemblyAI, so a replay takes the same path
+        audio_key = {"name": stream.name, "size": stream.filesize, "video_id": stream.video_id}
+
+        if mode in ("url", "auto"):
+            try:
+                return self._transcribe(stream.name, {**audio_key, "via": "url"}, stream.duration, "url",
+                                        audio_url=stream.url)
+            except Exception as e:
+                if mode == "url":
+                    raise
+                logger.warning(f"AssemblyAI could not fetch the media URL ({e}); piping the stream instead")
+
+        def upload() -> str:
+            with stream.open() as body:
+                return self.transcriber.upload_file(body)
+
+        return self._transcribe(stream.name, {**audio_key, "via": "pipe"}, stream.duration, "pipe", upload=upload,
+                                audio_bytes=lambda: stream.bytes_read)
+
+    def _transcribe(self, name: str, audio_key: Dict[str, Any], duration_s: Optional[float], via: str,
+                    upload: Optional[Callable[[], str]] = None, audio_url: Optional[str] = None,
+                    audio_bytes: Union[int, Callable[[], int], None] = None) -> Dict[str, Any]:
+        """Uploads with `upload` (or hands AssemblyAI `audio_url`), transcribes and saves the outputs."""
+        tier = self.policy.choose(duration_s, self.language, self.deadline_s, self.tier)
+
+        # speaker_labels disabled per user request
+        settings = dict(
+            speech_model=tier.speech_model,
+            speaker_labels=False,
+            language_detection=self.language is None,
             punctuate=True,
             format_text=True
         )
+        if self.language:
+            settings["language_code"] = self.language
+        config = aai.TranscriptionConfig(**settings)
 
         try:
-            transcript = self.transcriber.transcribe(audio_path, config=config)
+            started = time.perf_counter()
+            # Upload and polling are separate spans so the trace shows where the time goes
+            if upload is not None:
+                with span("transcription.upload", via=via) as s:
+                    audio_url = replayable(
+                        "assemblyai_upload", audio_key,
+                        lambda: governed("assemblyai", upload),
+                    )
+                    s.set_attribute("audio_bytes", audio_bytes() if callable(audio_bytes) else audio_bytes)
+
+            with span("transcription.poll", tier=tier.name, speech_model=tier.speech_model.value, via=via) as s:
+                transcript = replayable(
+                    "assemblyai_transcribe", {"audio": audio_key, "settings": settings},
+                    lambda: governed("assemblyai", lambda: self.transcriber.transcribe(audio_url, config=config)),
+                    encode=self._encode_transcript, decode=self._decode_transcript,
+                )
+                s.set_attribute("transcript_id", transcript.id)
+                # Turnaround per tier feeds the tier policy of later runs (see TierPolicy.load_trace)
+                turnaround_s = time.perf_counter() - started
+                reported = getattr(transcript, "audio_duration", None)
+                audio_s = reported if isinstance(reported, (int, float)) and reported else duration_s
+                s.set_attributes(turnaround_s=round(turnaround_s, 3), audio_duration_s=audio_s)
+                self.policy.record(tier.name, audio_s, turnaround_s)
             
             if transcript.status == aai.TranscriptStatus.error:
                 raise Exception(f"Transcription failed: {transcript.error}")
 
             # Prepare outputs
-            base_name = os.path.splitext(os.path.basename(audio_path))[0]
-            output_dir = "output"
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+            base_name = os.path.splitext(name)[0]
             
             # Save Raw Text
-            raw_text_path = os.path.join(output_dir, f"{base_name}_transcript.txt")
-            with open(raw_text_path, "w", encoding="utf-8") as f:
+            raw_text_path = os.path.join(self.output_dir, f"{base_name}_transcript.txt")
+            with atomic_write(raw_text_path) as f:
                 f.write(transcript.text)
                 
             # Prepare Structured JSON (Simplified per user request)
@@ -63,21 +156,54 @@ class TranscriptionService:
                 "status": transcript.status,
                 "text": transcript.text
             }
+
+            # Word timing goes to a binary sidecar instead of the JSON (see word_timings)
+            timings_path = None
+            words = list(getattr(transcript, "words", None) or [])
+            if words:
+                timings_path = os.path.join(self.output_dir, f"{base_name}_words.bin")
+                write_word_timings(timings_path, words, transcript.text)
+                structured_data["word_timings"] = os.path.basename(timings_path)
             
             # Save JSON
-            json_path = os.path.join(output_dir, f"{base_name}_transcript.json")
-            with open(json_path, "w", encoding="utf-8") as f:
+            json_path = os.path.join(self.output_dir, f"{base_name}_transcript.json")
+            with atomic_write(json_path) as f:
                 json.dump(structured_data, f, indent=2)
 
-            logger.info(f"Transcription completed. Saved to {raw_text_path} and {json_path}")
+            logger.info(f"Transcription completed on tier {tier.name} in {turnaround_s:.1f}s. "
+                        f"Saved to {raw_text_path} and {json_path}")
             
             return {
                 "text": transcript.text,
                 "json_path": json_path,
                 "raw_path": raw_text_path,
-                "structured_data": structured_data
+                "structured_data": structured_data,
+                "timings_path": timings_path,
+                "tier": tier.name,
+                "turnaround_s": turnaround_s,
             }
 
         except Exception as e:
             logger.error(f"Transcription error: {e}")
             raise
+
+    @staticmethod
+    def _encode_transcript(transcript) -> Dict[str, Any]:
+        payload = scalar_fields(transcript, ("id", "text", "error", "audio_duration"))
+        payload["status"] = getattr(transcript.status, "value", transcript.status)
+        # Compact rows, so replays can write the word timing sidecar too
+        payload["words"] = [[getattr(w, "text", None), getattr(w, "start", None), getattr(w, "end", None),
+                             getattr(w, "confidence", None)] for w in (getattr(transcript, "words", None) or [])]
+        return payload
+
+    @staticmethod
+    def _decode_transcript(payload: Dict[str, Any]):
+        return SimpleNamespace(
+            id=payload.get("id"),
+            status=aai.TranscriptStatus(payload["status"]),
+            text=payload.get("text"),
+            error=payload.get("error"),
+            audio_duration=payload.get("audio_duration"),
+            words=[SimpleNamespace(text=t, start=start, end=end, confidence=c)
+                   for t, start, end, c in payload.get("words") or []],
+        )
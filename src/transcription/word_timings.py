@@ -0,0 +1,165 @@
+"""
+Word-level timing of a transcript in a compact binary sidecar (`*_words.bin`).
+
+Columns, one entry per word, stored back to back after a fixed header:
+- start, end: int32 milliseconds into the audio
+- offset: uint32 character offset of the word in the transcript text
+- length: uint16 characters of the word in the text (0 if it could not be located)
+- confidence: float16
+
+That is 16 bytes per word, about 150 KB for an hour-long service. The file is
+memory-mapped on open, so columns are read from disk only as they are accessed.
+"""
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.utils.workspace import atomic_write
+
+MAGIC = b"CSGW"
+FORMAT_VERSION = 1
+# magic, format version, byte order (0 little / 1 big), word count, transcript length in characters
+_HEADER = struct.Struct("<4sHHII")
+MAX_WORD_LENGTH = 0xFFFF
+
+
+def _field(word: Any, name: str) -> Any:
+    return word.get(name) if isinstance(word, dict) else getattr(word, name, None)
+
+
+def _pad(n: int) -> int:
+    return (4 - n % 4) % 4
+
+
+def _layout(count: int) -> Dict[str, Tuple[int, int]]:
+    """Byte offset and size of each column for `count` words; every column starts 4-byte aligned"""
+    layout, position = {}, _HEADER.size
+    for name, itemsize in (("start", 4), ("end", 4), ("offset", 4), ("length", 2), ("confidence", 2)):
+        layout[name] = (position, count * itemsize)
+        position += count * itemsize + _pad(count * itemsize)
+    return layout
+
+
+def write_word_timings(path: str, words: Iterable[Any], text: str) -> int:
+    """
+    Writes the timing of `words` (AssemblyAI Word objects or dicts with text, start,
+    end and confidence) to `path`, locating each word in `text` in order.
+    Returns the number of words written.
+    """
+    starts, ends, offsets, lengths = array("i"), array("i"), array("I"), array("H")
+    confidences: List[float] = []
+    cursor = 0
+    for word in words:
+        word_text = _field(word, "text") or ""
+        found = text.find(word_text, cursor) if word_text else -1
+        if found < 0:
+            # Formatting differs from the word list here; keep the column sorted
+            offsets.append(cursor)
+            lengths.append(0)
+        else:
+            offsets.append(found)
+            lengths.append(min(len(word_text), MAX_WORD_LENGTH))
+            cursor = found + len(word_text)
+        starts.append(int(_field(word, "start") or 0))
+        ends.append(int(_field(word, "end") or 0))
+        confidences.append(float(_field(word, "confidence") or 0.0))
+
+    count = len(starts)
+    with atomic_write(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0 if sys.byteorder == "little" else 1, count, len(text)))
+        for column in (starts, ends, offsets, lengths):
+            data = column.tobytes()
+            f.write(data + b"\0" * _pad(len(data)))
+        data = struct.pack(f"={count}e", *confidences)
+        f.write(data + b"\0" * _pad(len(data)))
+    return count
+
+
+class WordTimings:
+    """Read-only, memory-mapped view of a `*_words.bin` sidecar."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"{path} is not a word timing file")
+        magic, version, byte_order, self.count, self.text_length = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a word timing file (version {FORMAT_VERSION})")
+        self._native = byte_order == (0 if sys.byteorder == "little" else 1)
+        self._layout = _layout(self.count)
+        view = memoryview(self._map)
+        columns = {}
+        for name, code in (("start", "i"), ("end", "i"), ("offset", "I"), ("length", "H")):
+            position, size = self._layout[name]
+            if self._native:
+                columns[name] = view[position:position + size].cast(code)
+            else:
+                # Written on a machine of the other byte order: load and swap instead of mapping
+                columns[name] = array(code, view[position:position + size].tobytes())
+                columns[name].byteswap()
+        self.starts, self.ends, self.offsets, self.lengths = (columns[n] for n in ("start", "end", "offset", "length"))
+        self._confidence_format = "<e" if byte_order == 0 else ">e"
+
+    def __len__(self) -> int:
+        return self.count
+
+    def confidence(self, i: int) -> float:
+        position = self._layout["confidence"][0]
+        return struct.unpack_from(self._confidence_format, self._map, position + 2 * i)[0]
+
+    def word(self, i: int, text: Optional[str] = None) -> Dict[str, Any]:
+        """Timing of word `i`; with the transcript `text`, also the word itself"""
+        entry = {"start": self.starts[i], "end": self.ends[i], "confidence": round(self.confidence(i), 3),
+                 "offset": self.offsets[i]}
+        if text is not None:
+            entry["text"] = text[self.offsets[i]:self.offsets[i] + self.lengths[i]]
+        return entry
+
+    def time_span(self, char_start: int, char_end: int) -> Optional[Tuple[int, int]]:
+        """Audio milliseconds (start of the first word, end of the last) covering a text range"""
+        if not self.count or char_end <= char_start:
+            return None
+        first = max(0, bisect_right(self.offsets, char_start) - 1)
+        if self.offsets[first] + self.lengths[first] <= char_start and first + 1 < self.count:
+            first += 1  # the range starts after this word, e.g. in the space that follows it
+        last = max(first, bisect_left(self.offsets, char_end) - 1)
+        return self.starts[first], self.ends[last]
+
+    def close(self):
+        for name in ("starts", "ends", "offsets", "lengths"):
+            column = getattr(self, name, None)
+            if isinstance(column, memoryview):
+                column.release()
+        if getattr(self, "_map", None) is not None and not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "WordTimings":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def link_quotes_to_audio(results: List[Dict[str, Any]], timings: WordTimings) -> int:
+    """
+    Adds `audio_start_ms` / `audio_end_ms` to quote verification results that were
+    matched in the transcript. Returns how many were linked.
+    """
+    linked = 0
+    for result in results:
+        if result.get("start") is None or result.get("end") is None:
+            continue
+        span = timings.time_span(result["start"], result["end"])
+        if span:
+            result["audio_start_ms"], result["audio_end_ms"] = span
+            linked += 1
+    return linked
@@ -1,12 +1,31 @@
+import contextvars
+import threading
 import requests
-from typing import Optional, Dict, Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
 from src.utils.logger import setup_logger
+from src.utils.tracing import span
+from src.utils.cassette import RecordedResponse, replayable
+from src.utils.scripture_refs import normalize_reference
+from src.utils.rate_limit import get_governor, governed
 
 logger = setup_logger("bible_fetcher")
 
+# Concurrent requests used to warm the cache; bible-api.com is a small free service
+PREFETCH_WORKERS = 4
+# Seconds of the Bible API's request quota one prefetch may spend: about one LLM
+# generation, so the verses the guide does use are not queued behind guesses
+PREFETCH_WINDOW_S = 30
+
 class BibleFetcher:
     BASE_URL = "https://bible-api.com/"
 
+    def __init__(self):
+        # (canonical reference, version) -> Future of the verse text. A reference that is
+        # being fetched (e.g. by prefetch) is awaited rather than requested twice.
+        self._cache: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
     def get_scripture(self, reference: str, version: str = "kjv") -> Optional[str]:
         """
         Fetches the text of a scripture reference from bible-api.com.
@@ -37,21 +56,73 @@ class BibleFetcher:
 
         return self._fetch_single_ref(clean_ref, version)
 
+    def prefetch(self, references: List[str], versions: List[str], budget: Optional[int] = None) -> List[Future]:
+        """
+        Warms the cache for references in every version on background threads and
+        returns immediately. Later `get_scripture` calls reuse (or wait for) these fetches.
+        At most `budget` requests are made (default: what the Bible API quota allows in
+        PREFETCH_WINDOW_S), taking references in the order given.
+        """
+        if budget is None:
+            limits = get_governor().limits("bible_api")
+            budget = int(limits.rpm * PREFETCH_WINDOW_S / 60) if limits and limits.rpm else None
+        if budget is not None and len(references) * len(versions) > budget:
+            references = references[:budget // max(1, len(versions))]
+        logger.info(f"Prefetching {len(references)} scripture reference(s) in {len(versions)} version(s)")
+        if not references:
+            return []
+        pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="scripture-prefetch")
+        # copy_context keeps the fetch spans under the caller's span
+        futures = [pool.submit(contextvars.copy_context().run, self._fetch_single_ref, ref, version)
+                   for version in versions for ref in references]
+        pool.shutdown(wait=False)
+        return futures
+
     def _fetch_single_ref(self, reference: str, version: str) -> Optional[str]:
+        # Spellings of the same passage share a slot; anything the canonical form would
+        # shorten ("John 3:16-17, 19", "Genesis 1:1-2:3") keeps its own
+        key = (normalize_reference(reference, exact=True) or reference, version.lower())
+        with self._lock:
+            pending = self._cache.get(key)
+            if pending is None:
+                future = self._cache[key] = Future()
+        if pending is not None:
+            return pending.result()
+
+        text = None
+        try:
+            text = self._request_single_ref(reference, version)
+        finally:
+            if text is None:
+                # Failures are not cached so the next call retries
+                with self._lock:
+                    self._cache.pop(key, None)
+            future.set_result(text)
+        return text
+
+    def _request_single_ref(self, reference: str, version: str) -> Optional[str]:
         # Construct URL
         # API format: https://bible-api.com/John 3:16?translation=kjv
         url = f"{self.BASE_URL}{reference}"
         params = {"translation": version}
 
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                # The API returns 'text' which combines all verses. Remove newlines for flow.
-                return data.get("text", "").replace('\n', ' ').strip()
-            else:
-                logger.warning(f"Failed to fetch scripture {reference}: Status {response.status_code}")
+        with span("scripture.fetch", reference=reference, version=version) as s:
+            try:
+                response = replayable(
+                    "bible_api", {"url": url, "params": params},
+                    lambda: governed("bible_api", lambda: requests.get(url, params=params, timeout=10)),
+                    encode=RecordedResponse.encode, decode=RecordedResponse.decode,
+                )
+                s.set_attribute("status_code", response.status_code)
+                if response.status_code == 200:
+                    data = response.json()
+                    # The API returns 'text' which combines all verses. Remove newlines for flow.
+                    return data.get("text", "").replace('\n', ' ').strip()
+                else:
+                    logger.warning(f"Failed to fetch scripture {reference}: Status {response.status_code}")
+                    return None
+            except Exception as e:
+                s.status = "error"
+                s.error = str(e)
+                logger.error(f"Error fetching scripture {reference}: {e}")
                 return None
-        except Exception as e:
-            logger.error(f"Error fetching scripture {reference}: {e}")
-            return None
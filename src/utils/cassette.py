@@ -0,0 +1,182 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger("cassette")
+
+MODES = ("record", "replay")
+SPEEDS = ("zero", "recorded")
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when no interaction was recorded for a request."""
+
+
+class ReplayedError(Exception):
+    """An exception that was raised by the real call while recording, raised again on replay."""
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    """Stable short hash identifying one external request."""
+    blob = json.dumps({"kind": kind, "request": request}, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:20]
+
+
+class Cassette:
+    """
+    Records external interactions (payload + latency) into a gzip-compressed JSON-lines
+    file and replays them offline.
+
+    Identical requests are replayed in the order they were recorded; once the recorded
+    sequence for a key is exhausted its last interaction is repeated.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", speed: str = "zero"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if speed not in SPEEDS:
+            raise ValueError(f"Unknown cassette speed: {speed}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._recorded: List[Dict[str, Any]] = []
+        self._tapes: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._positions: Dict[str, int] = defaultdict(int)
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._tapes[entry["key"]].append(entry)
+        logger.info(f"Loaded {sum(len(t) for t in self._tapes.values())} interactions from {self.path}")
+
+    def record(self, kind: str, key: str, payload: Any = None, latency: float = 0.0, error: Optional[str] = None):
+        entry = {"kind": kind, "key": key, "latency": round(latency, 4)}
+        if error is not None:
+            entry["error"] = error
+        else:
+            entry["payload"] = payload
+        with self._lock:
+            self._recorded.append(entry)
+
+    def play(self, kind: str, key: str) -> Any:
+        with self._lock:
+            tape = self._tapes.get(key)
+            if not tape:
+                raise CassetteMiss(f"No recorded {kind} interaction for key {key} in {self.path}")
+            position = self._positions[key]
+            entry = tape[min(position, len(tape) - 1)]
+            self._positions[key] = position + 1
+        if self.speed == "recorded" and entry.get("latency"):
+            time.sleep(entry["latency"])
+        if "error" in entry:
+            raise ReplayedError(entry["error"])
+        return entry["payload"]
+
+    def save(self):
+        """Writes recorded interactions (record mode only). The file is replaced atomically."""
+        if self.mode != "record":
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            entries = list(self._recorded)
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+        os.replace(tmp_path, self.path)
+        logger.info(f"Saved {len(entries)} interactions to {self.path}")
+
+
+# The active cassette is process-wide (not per-thread) so worker threads share it.
+_active: Optional[Cassette] = None
+
+
+def active_cassette() -> Optional[Cassette]:
+    return _active
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = "replay", speed: str = "zero") -> Iterator[Cassette]:
+    """Activates a cassette for the duration of the block and saves it on exit when recording."""
+    global _active
+    cassette = Cassette(path, mode, speed)
+    previous, _active = _active, cassette
+    try:
+        yield cassette
+    finally:
+        _active = previous
+        cassette.save()
+
+
+def replayable(kind: str, request: Dict[str, Any], call: Callable[[], Any],
+               encode: Callable[[Any], Any] = lambda r: r,
+               decode: Callable[[Any], Any] = lambda p: p) -> Any:
+    """
+    Runs `call` through the active cassette.
+
+    - No cassette: `call()` is returned untouched.
+    - Record: the real call runs, `encode(result)` and its latency are stored.
+    - Replay: the stored payload is returned through `decode` without calling out.
+    """
+    cassette = _active
+    if cassette is None:
+        return call()
+
+    key = request_key(kind, request)
+    if cassette.mode == "replay":
+        return decode(cassette.play(kind, key))
+
+    started = time.perf_counter()
+    try:
+        result = call()
+    except Exception as e:
+        cassette.record(kind, key, latency=time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+        raise
+    cassette.record(kind, key, encode(result), time.perf_counter() - started)
+    return result
+
+
+class RecordedResponse:
+    """Minimal stand-in for `requests.Response` rebuilt from a cassette payload."""
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    @staticmethod
+    def encode(response) -> Dict[str, Any]:
+        return {"status_code": response.status_code, "text": response.text}
+
+    @classmethod
+    def decode(cls, payload: Dict[str, Any]) -> "RecordedResponse":
+        return cls(payload["status_code"], payload["text"])
+
+
+def scalar_fields(obj: Any, fields) -> Dict[str, Any]:
+    """Picks JSON-safe scalar attributes (SDK objects and mocks alike)."""
+    out = {}
+    for field in fields:
+        value = obj.get(field) if isinstance(obj, dict) else getattr(obj, field, None)
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            out[field] = value
+    return out
@@ -1,37 +1,186 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import multiprocessing
 import os
+import queue
 import sys
+import threading
+from typing import Optional
 
-def setup_logger(name: str = "church_study_guide") -> logging.Logger:
+# Single process-wide configuration: every module logger feeds one QueueHandler on the
+# root logger and a background QueueListener does the (blocking) file and console I/O.
+_lock = threading.RLock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+# Child processes never rotate the shared app.log (see configure_logging)
+_in_child = False
+# Queue that worker processes log into, drained by the parent (see worker_log_queue)
+_worker_queue = None
+_worker_listener: Optional[logging.handlers.QueueListener] = None
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+            "process": record.process,
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _log_level() -> int:
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    return getattr(logging, level, logging.INFO) if not level.isdigit() else int(level)
+
+
+def configure_logging(force: bool = False) -> Optional[logging.handlers.QueueListener]:
     """
-    Configure and return a logger instance.
-    Logs are written to both console and file (logs/app.log).
+    Installs the shared logging pipeline once per process.
+
+    Environment:
+    - LOG_LEVEL: level for project loggers (default INFO)
+    - LOG_FORMAT: 'text' (default) or 'json'
+    - LOG_DIR: directory for app.log (default 'logs')
+    - LOG_MAX_BYTES / LOG_BACKUP_COUNT: rotation settings (default 10 MB x 5)
+
+    Only the main process rotates app.log. A forked or spawned child writes to its own
+    app.<pid>.log (created on its first record) until configure_worker_logging hands its
+    records to the parent, so two processes never rename the file under each other.
     """
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    global _listener, _queue_handler
+    with _lock:
+        if (_listener is not None or _queue_handler is not None) and not force:
+            return _listener
+        if _listener is not None:
+            shutdown_logging()
+
+        log_dir = os.getenv("LOG_DIR", "logs")
+        os.makedirs(log_dir, exist_ok=True)
+
+        if os.getenv("LOG_FORMAT", "text").lower() == "json":
+            formatter: logging.Formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(TEXT_FORMAT)
+
+        if _in_child or multiprocessing.parent_process() is not None:
+            file_handler: logging.Handler = logging.FileHandler(
+                os.path.join(log_dir, f"app.{os.getpid()}.log"), encoding="utf-8", delay=True
+            )
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(
+                os.path.join(log_dir, "app.log"),
+                maxBytes=int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+                backupCount=int(os.getenv("LOG_BACKUP_COUNT", 5)),
+                encoding="utf-8",
+            )
+        file_handler.setFormatter(formatter)
+
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _queue_handler = logging.handlers.QueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler)
+        _listener.start()
 
-    # Check if handlers are already configured to avoid duplicate logs
-    if logger.hasHandlers():
-        return logger
+        root = logging.getLogger()
+        root.addHandler(_queue_handler)
+        # Third-party libraries stay at WARNING; project loggers get LOG_LEVEL in setup_logger
+        if root.level == logging.NOTSET or root.level > logging.WARNING:
+            root.setLevel(logging.WARNING)
+        return _listener
 
-    # Create logs directory if it doesn't exist
-    log_dir = "logs"
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
 
-    # Formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+class _Forward(logging.Handler):
+    """Hands a worker's record to the parent logger of the same name, and so to its pipeline"""
 
-    # File Handler
-    file_handler = logging.FileHandler(os.path.join(log_dir, "app.log"))
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    def emit(self, record: logging.LogRecord):
+        logging.getLogger(record.name).handle(record)
 
-    # Console Handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
 
+def worker_log_queue():
+    """
+    Queue for worker processes to log into (pass it to configure_worker_logging in the
+    pool initializer). This process drains it into its own pipeline until shutdown.
+    """
+    global _worker_queue, _worker_listener
+    with _lock:
+        configure_logging()
+        if _worker_queue is None:
+            _worker_queue = multiprocessing.get_context("spawn").Queue()
+        if _worker_listener is None:
+            _worker_listener = logging.handlers.QueueListener(_worker_queue, _Forward())
+            _worker_listener.start()
+        return _worker_queue
+
+
+def configure_worker_logging(log_queue):
+    """Sends this worker process's records to the parent's pipeline through `log_queue`."""
+    global _queue_handler
+    with _lock:
+        shutdown_logging()
+        _queue_handler = logging.handlers.QueueHandler(log_queue)
+        root = logging.getLogger()
+        root.addHandler(_queue_handler)
+        if root.level == logging.NOTSET or root.level > logging.WARNING:
+            root.setLevel(logging.WARNING)
+
+
+def shutdown_logging():
+    """Drains the queue and closes the handlers. Safe to call more than once."""
+    global _listener, _queue_handler, _worker_listener
+    with _lock:
+        if _worker_listener is not None:
+            # Records workers sent before exiting go out through the pipeline still in place
+            _worker_listener.stop()
+            _worker_listener = None
+        if _queue_handler is not None:
+            logging.getLogger().removeHandler(_queue_handler)
+            _queue_handler = None
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+def _reinit_after_fork():
+    # The listener threads do not survive fork; give the child its own pipeline
+    global _listener, _queue_handler, _lock, _in_child, _worker_queue, _worker_listener
+    _lock = threading.RLock()
+    _in_child = True
+    _worker_queue, _worker_listener = None, None
+    if _queue_handler is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
+    configure_logging()
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+def setup_logger(name: str = "church_study_guide") -> logging.Logger:
+    """
+    Return a logger instance wired into the shared queue-based configuration.
+    Logs are written to both console and file (logs/app.log) without blocking the caller.
+    """
+    configure_logging()
+    logger = logging.getLogger(name)
+    logger.setLevel(_log_level())
     return logger
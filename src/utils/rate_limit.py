@@ -0,0 +1,330 @@
+import itertools
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from src.utils.logger import setup_logger
+from src.utils.tracing import current_span
+
+logger = setup_logger("rate_limit")
+
+# A bucket holds this share of a minute's quota, so a burst can never spend a whole minute at once
+BURST_FRACTION = 0.25
+# Throttled calls are retried this many times before the error is raised
+MAX_RETRIES = 3
+# Backoff used when a 429 carries no Retry-After header: 2, 4, 8... seconds, capped
+BACKOFF_BASE_S = 2.0
+BACKOFF_MAX_S = 60.0
+# On a 429 the provider's rates are halved (down to this floor) and then recover per success
+MIN_RATE_SCALE = 0.1
+RECOVERY_STEP = 0.05
+
+
+class Limits:
+    """Requests per minute, tokens per minute and concurrent calls (None = unlimited)."""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None, concurrency: Optional[int] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.concurrency = concurrency
+
+    def __repr__(self) -> str:
+        return f"Limits(rpm={self.rpm}, tpm={self.tpm}, concurrency={self.concurrency})"
+
+
+# Conservative defaults; override per provider with RATE_LIMIT_<PROVIDER>, e.g.
+# RATE_LIMIT_GROQ="rpm=30,tpm=12000,concurrency=2" (or "off").
+DEFAULT_LIMITS: Dict[str, Limits] = {
+    "gemini": Limits(rpm=60, tpm=1_000_000, concurrency=8),
+    "openai": Limits(rpm=500, tpm=200_000, concurrency=8),
+    "openrouter": Limits(rpm=60, concurrency=8),
+    "groq": Limits(rpm=30, tpm=12_000, concurrency=4),
+    "assemblyai": Limits(rpm=60, concurrency=5),
+    # bible-api.com allows 15 requests per 30 seconds per IP; this is its published limit,
+    # not a guess, so speculative fetches are budgeted instead (see BibleFetcher.prefetch)
+    "bible_api": Limits(rpm=30, concurrency=4),
+}
+
+
+def limits_from_env(provider: str) -> Optional[Limits]:
+    """
+    Limits for `provider`: RATE_LIMIT_<PROVIDER> if set, else the default (None = unlimited).
+    A malformed setting is logged and the default used, rather than failing the run.
+    """
+    name = f"RATE_LIMIT_{provider.upper()}"
+    raw = os.getenv(name)
+    if raw is None:
+        return DEFAULT_LIMITS.get(provider)
+    if raw.strip().lower() in ("", "off", "none"):
+        return None
+    values: Dict[str, Any] = {}
+    try:
+        for part in raw.split(","):
+            key, _, value = part.partition("=")
+            key = key.strip().lower()
+            if key not in ("rpm", "tpm", "concurrency"):
+                raise ValueError(f"unknown key '{key}'")
+            values[key] = int(value) if key == "concurrency" else float(value)
+    except ValueError as e:
+        logger.warning(f"Ignoring {name}={raw!r} ({e}); using defaults")
+        return DEFAULT_LIMITS.get(provider)
+    return Limits(**values)
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute`; not thread-safe on its own (the governor locks)."""
+
+    def __init__(self, per_minute: float, burst_fraction: float = BURST_FRACTION):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, per_minute * burst_fraction)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float, scale: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate * scale)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float, scale: float = 1.0) -> float:
+        """Seconds until `amount` can be taken (amounts above capacity wait for a full bucket)."""
+        self._refill(now, scale)
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / (self.rate * scale)
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Charges (or refunds, when negative) tokens after the fact; the level may go into debt."""
+        self.level = min(self.capacity, self.level - delta)
+
+    def drain(self):
+        self.level = min(self.level, 0.0)
+
+
+class BandwidthCap:
+    """Bytes per second shared by every transfer that reports to it (e.g. parallel downloads)."""
+
+    def __init__(self, bytes_per_s: float):
+        self.bytes_per_s = bytes_per_s
+        # One second of transfer may go out in a burst
+        self._bucket = TokenBucket(bytes_per_s * 60, burst_fraction=1 / 60)
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes: int) -> float:
+        """Charges `nbytes` already transferred and sleeps until the shared rate is back under the cap."""
+        if nbytes <= 0:
+            return 0.0
+        with self._lock:
+            self._bucket.wait_time(0, time.monotonic())  # refill up to now
+            self._bucket.adjust(nbytes)
+            delay = max(0.0, -self._bucket.level) / self._bucket.rate
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+class _Waiter:
+    __slots__ = ("job", "seq")
+
+    def __init__(self, job: str, seq: int):
+        self.job = job
+        self.seq = seq
+
+
+class _ProviderState:
+    def __init__(self, limits: Limits):
+        self.limits = limits
+        self.requests = TokenBucket(limits.rpm) if limits.rpm else None
+        self.tokens = TokenBucket(limits.tpm) if limits.tpm else None
+        self.in_flight = 0
+        self.waiting: List[_Waiter] = []
+        self.served: Counter = Counter()
+        self.blocked_until = 0.0
+        self.scale = 1.0
+        self.throttled = 0
+
+    def wait_time(self, tokens: float, now: float) -> Optional[float]:
+        """0 when a call may start now, seconds to wait, or None when blocked on concurrency."""
+        if self.limits.concurrency and self.in_flight >= self.limits.concurrency:
+            return None
+        wait = max(0.0, self.blocked_until - now)
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now, self.scale))
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now, self.scale))
+        return wait
+
+
+def _job_key() -> str:
+    # One pipeline run = one trace; threads it starts copy the context and stay in the same job
+    s = current_span()
+    return s.trace_id if s is not None else f"thread-{threading.get_ident()}"
+
+
+def retry_after(result: Any) -> Optional[float]:
+    """
+    None unless `result` (a response or an exception) is an HTTP 429; otherwise the
+    Retry-After delay in seconds (0.0 when the header is missing or unparsable).
+    """
+    response = getattr(result, "response", None)
+    status = getattr(result, "status_code", None)
+    if status is None:
+        status = getattr(result, "code", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    if status != 429:
+        return None
+
+    headers = getattr(result, "headers", None) or getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return max(0.0, float(value)) if value is not None else 0.0
+    except (TypeError, ValueError, AttributeError):
+        return 0.0
+
+
+class Governor:
+    """
+    Process-wide gate for outbound calls. Each provider has token buckets for requests
+    and tokens per minute plus a concurrency cap. Waiting calls are granted fairly
+    across jobs (the job with the fewest grants so far goes first), and a provider's
+    rates back off on 429 / Retry-After and recover gradually on success.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Optional[Limits]]] = None):
+        self._overrides = limits
+        self._states: Dict[str, Optional[_ProviderState]] = {}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+
+    def _state(self, provider: str) -> Optional[_ProviderState]:
+        if provider not in self._states:
+            if self._overrides is not None and provider in self._overrides:
+                limits = self._overrides[provider]
+            else:
+                limits = limits_from_env(provider)
+            self._states[provider] = _ProviderState(limits) if limits else None
+        return self._states[provider]
+
+    def limits(self, provider: str) -> Optional[Limits]:
+        """Limits in force for `provider` (None = unlimited)."""
+        with self._cond:
+            state = self._state(provider)
+            return state.limits if state else None
+
+    def acquire(self, provider: str, tokens: float = 0) -> float:
+        """Blocks until a call may start; returns the seconds spent waiting."""
+        started = time.monotonic()
+        with self._cond:
+            state = self._state(provider)
+            if state is None:
+                return 0.0
+            me = _Waiter(_job_key(), next(self._seq))
+            state.waiting.append(me)
+            try:
+                while True:
+                    head = min(state.waiting, key=lambda w: (state.served[w.job], w.seq))
+                    wait = state.wait_time(tokens, time.monotonic()) if head is me else None
+                    if wait == 0.0:
+                        break
+                    self._cond.wait(timeout=wait)
+            finally:
+                state.waiting.remove(me)
+
+            if state.requests:
+                state.requests.take(1)
+            if state.tokens and tokens:
+                state.tokens.take(tokens)
+            state.in_flight += 1
+            state.served[me.job] += 1
+            if not state.waiting:
+                # No contention left; start the next round of fairness from scratch
+                state.served.clear()
+            self._cond.notify_all()
+        return time.monotonic() - started
+
+    def release(self, provider: str, throttle_delay: Optional[float] = None, attempt: int = 0):
+        """Ends a call. `throttle_delay` (from `retry_after`) marks it as rejected with 429."""
+        with self._cond:
+            state = self._state(provider)
+            if state is None:
+                return
+            state.in_flight -= 1
+            if throttle_delay is None:
+                state.scale = min(1.0, state.scale + RECOVERY_STEP)
+            else:
+                delay = throttle_delay or min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** attempt)
+                state.scale = max(MIN_RATE_SCALE, state.scale * 0.5)
+                state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+                state.throttled += 1
+                for bucket in (state.requests, state.tokens):
+                    if bucket:
+                        bucket.drain()
+                logger.warning(f"{provider} rate limited; pausing {delay:.1f}s and slowing to {state.scale:.0%} of quota")
+            self._cond.notify_all()
+
+    def settle(self, provider: str, estimated: float, actual: float):
+        """Corrects the token bucket once a call's real token usage is known."""
+        with self._cond:
+            state = self._state(provider)
+            if state is not None and state.tokens:
+                state.tokens.adjust(actual - estimated)
+
+    def call(self, provider: str, fn: Callable[[], Any], tokens: float = 0,
+             actual_tokens: Optional[Callable[[Any], Optional[int]]] = None) -> Any:
+        """
+        Runs `fn` under the provider's limits, retrying it after the Retry-After delay
+        when it raises or returns a 429 (up to MAX_RETRIES times). `tokens` is charged
+        up front; `actual_tokens(result)`, when given, corrects it afterwards.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            waited = self.acquire(provider, tokens)
+            if waited:
+                s = current_span()
+                if s is not None:
+                    s.set_attribute("rate_limit_wait_s", round(s.attributes.get("rate_limit_wait_s", 0) + waited, 4))
+            try:
+                result = fn()
+            except Exception as e:
+                delay = retry_after(e)
+                self.release(provider, delay, attempt)
+                if delay is None or attempt == MAX_RETRIES:
+                    raise
+                continue
+            delay = retry_after(result)
+            self.release(provider, delay, attempt)
+            if delay is None or attempt == MAX_RETRIES:
+                used = actual_tokens(result) if actual_tokens and delay is None else None
+                if used:
+                    self.settle(provider, tokens, used)
+                return result
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            return {
+                name: {"in_flight": s.in_flight, "waiting": len(s.waiting), "rate_scale": round(s.scale, 3),
+                       "throttled": s.throttled}
+                for name, s in self._states.items() if s is not None
+            }
+
+
+_governor = Governor()
+
+
+def get_governor() -> Governor:
+    return _governor
+
+
+def configure_governor(limits: Optional[Dict[str, Optional[Limits]]] = None) -> Governor:
+    """Replaces the process-wide governor (limits for unlisted providers still come from the environment)."""
+    global _governor
+    _governor = Governor(limits)
+    return _governor
+
+
+def governed(provider: str, fn: Callable[[], Any], tokens: float = 0,
+             actual_tokens: Optional[Callable[[Any], Optional[int]]] = None) -> Any:
+    """Runs `fn` through the process-wide governor."""
+    return _governor.call(provider, fn, tokens, actual_tokens)
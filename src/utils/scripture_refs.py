@@ -0,0 +1,122 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Cap on references hinted to the LLM and prefetched per sermon
+MAX_CITED_REFERENCES = 30
+
+# (canonical name, chapter count, aliases). Abbreviations that are also common English
+# words ("Is" for Isaiah, "Am" for Amos) are left out on purpose.
+_BOOKS: List[Tuple[str, int, Tuple[str, ...]]] = [
+    ("Genesis", 50, ("Gen", "Gn")), ("Exodus", 40, ("Exod", "Ex")), ("Leviticus", 27, ("Lev",)),
+    ("Numbers", 36, ("Num",)), ("Deuteronomy", 34, ("Deut", "Dt")), ("Joshua", 24, ("Josh",)),
+    ("Judges", 21, ("Judg",)), ("Ruth", 4, ()), ("Ezra", 10, ()), ("Nehemiah", 13, ("Neh",)),
+    ("Esther", 10, ("Esth",)), ("Job", 42, ()), ("Psalms", 150, ("Psalm", "Ps", "Psa")),
+    ("Proverbs", 31, ("Proverb", "Prov", "Pr")), ("Ecclesiastes", 12, ("Eccl", "Eccles")),
+    ("Song of Solomon", 8, ("Song of Songs", "Song")), ("Isaiah", 66, ("Isa",)),
+    ("Jeremiah", 52, ("Jer",)), ("Lamentations", 5, ("Lam",)), ("Ezekiel", 48, ("Ezek",)),
+    ("Daniel", 12, ("Dan",)), ("Hosea", 14, ("Hos",)), ("Joel", 3, ()), ("Amos", 9, ()),
+    ("Obadiah", 1, ("Obad",)), ("Jonah", 4, ("Jon",)), ("Micah", 7, ("Mic",)), ("Nahum", 3, ("Nah",)),
+    ("Habakkuk", 3, ("Hab",)), ("Zephaniah", 3, ("Zeph",)), ("Haggai", 2, ("Hag",)),
+    ("Zechariah", 14, ("Zech",)), ("Malachi", 4, ("Mal",)),
+    ("Matthew", 28, ("Matt", "Mt")), ("Mark", 16, ("Mk",)), ("Luke", 24, ("Lk",)), ("John", 21, ("Jn",)),
+    ("Acts", 28, ()), ("Romans", 16, ("Rom",)), ("Galatians", 6, ("Gal",)), ("Ephesians", 6, ("Eph",)),
+    ("Philippians", 4, ("Phil",)), ("Colossians", 4, ("Col",)), ("Titus", 3, ()), ("Philemon", 1, ("Phlm",)),
+    ("Hebrews", 13, ("Heb",)), ("James", 5, ("Jas",)), ("Jude", 1, ()), ("Revelation", 22, ("Revelations", "Rev")),
+]
+
+# Numbered books: stem aliases -> {number: (canonical name, chapter count)}
+_NUMBERED: List[Tuple[Tuple[str, ...], Dict[int, Tuple[str, int]]]] = [
+    (("Samuel", "Sam"), {1: ("1 Samuel", 31), 2: ("2 Samuel", 24)}),
+    (("Kings", "Kgs"), {1: ("1 Kings", 22), 2: ("2 Kings", 25)}),
+    (("Chronicles", "Chron", "Chr"), {1: ("1 Chronicles", 29), 2: ("2 Chronicles", 36)}),
+    (("Corinthians", "Cor"), {1: ("1 Corinthians", 16), 2: ("2 Corinthians", 13)}),
+    (("Thessalonians", "Thess"), {1: ("1 Thessalonians", 5), 2: ("2 Thessalonians", 3)}),
+    (("Timothy", "Tim"), {1: ("1 Timothy", 6), 2: ("2 Timothy", 4)}),
+    (("Peter", "Pet"), {1: ("1 Peter", 5), 2: ("2 Peter", 3)}),
+    (("John", "Jn"), {1: ("1 John", 5), 2: ("2 John", 1), 3: ("3 John", 1)}),
+]
+
+# Book names that are also everyday words or first names ("Mark 2 services", "Job 3 times",
+# "Dan 4 years"): in running text they count as references only with a verse
+# ("Mark 2:17") or the spoken "chapter" ("Job chapter 3")
+_AMBIGUOUS = frozenset(name.lower() for name in (
+    "Mark", "Job", "Dan", "Song", "Acts", "Ruth", "Joel", "Amos", "James", "Jude", "Titus", "John",
+    "Numbers", "Jon", "Mal", "Mic", "Phil", "Col", "Rev", "Ex", "Pr",
+))
+
+_ORDINALS = {"1": 1, "1st": 1, "first": 1, "2": 2, "2nd": 2, "second": 2, "3": 3, "3rd": 3, "third": 3}
+
+
+def _alternation(names) -> str:
+    # Longest first so "Song of Songs" wins over "Song" and "Psalms" over "Psalm"
+    return "|".join(re.escape(n).replace(r"\ ", r"\s+") for n in sorted(set(names), key=len, reverse=True))
+
+
+_BOOK_LOOKUP = {alias.lower(): (name, chapters) for name, chapters, aliases in _BOOKS for alias in (name,) + aliases}
+_STEM_LOOKUP = {alias.lower(): numbers for aliases, numbers in _NUMBERED for alias in aliases}
+
+# One compiled pattern over every book name and abbreviation. Book names are matched
+# case-sensitively (transcripts capitalize them), which keeps "mark" or "acts" in
+# running speech from matching; the connecting words are case-insensitive.
+_REFERENCE_RE = re.compile(
+    r"\b(?:(?P<ordinal>(?i:first|second|third|1st|2nd|3rd)|[123])\s*(?P<stem>"
+    + _alternation([a for aliases, _ in _NUMBERED for a in aliases]) + r")"
+    r"|(?P<book>" + _alternation([a for name, _, aliases in _BOOKS for a in (name,) + aliases]) + r"))"
+    r"\.?\s+(?P<spoken>(?i:chapter\s+))?(?P<chapter>\d{1,3})\b"
+    r"(?:(?::|\.(?=\d)|,?\s+(?i:verses?)\s+)(?P<verse>\d{1,3})"
+    r"(?:(?:\s*[-–]\s*|\s+(?i:to|through)\s+)(?P<end>\d{1,3}))?)?"
+)
+
+
+def _canonical(match: "re.Match", in_text: bool = False) -> Optional[str]:
+    if match.group("stem"):
+        numbers = _STEM_LOOKUP[re.sub(r"\s+", " ", match.group("stem")).lower()]
+        book = numbers.get(_ORDINALS[match.group("ordinal").lower()])
+    else:
+        alias = re.sub(r"\s+", " ", match.group("book")).lower()
+        if in_text and alias in _AMBIGUOUS and not (match.group("verse") or match.group("spoken")):
+            return None
+        book = _BOOK_LOOKUP.get(alias)
+    if book is None:
+        return None
+
+    name, chapters = book
+    chapter = int(match.group("chapter"))
+    if not 1 <= chapter <= chapters:
+        return None
+    reference = f"{name} {chapter}"
+    verse = match.group("verse")
+    if verse:
+        reference += f":{int(verse)}"
+        end = match.group("end")
+        if end and int(end) > int(verse):
+            reference += f"-{int(end)}"
+    return reference
+
+
+def extract_references(text: str, limit: Optional[int] = None) -> List[str]:
+    """
+    Returns the Bible references cited in `text` in canonical form ("Romans 8:28",
+    "1 John 1:9", "Psalms 23"), deduplicated in order of first mention. Accepts
+    abbreviations ("Rom. 8:28") and spoken forms ("Romans chapter 8 verse 28"). Book
+    names that are also common words ("Mark", "Job") need a verse or "chapter".
+    """
+    found: Dict[str, None] = {}
+    for match in _REFERENCE_RE.finditer(text or ""):
+        reference = _canonical(match, in_text=True)
+        if reference and reference not in found:
+            found[reference] = None
+            if limit and len(found) >= limit:
+                break
+    return list(found)
+
+
+def normalize_reference(reference: str, exact: bool = False) -> Optional[str]:
+    """
+    Canonical form of a single reference, or None when it is not recognised. By default
+    only the start has to be a reference ("John 3:16-17, 19" gives "John 3:16-17"); with
+    `exact` the whole string must be one, so the result stands for the same passage.
+    """
+    reference = (reference or "").strip()
+    match = _REFERENCE_RE.fullmatch(reference) if exact else _REFERENCE_RE.match(reference)
+    return _canonical(match) if match else None
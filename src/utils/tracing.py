@@ -0,0 +1,265 @@
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.utils.logger import setup_logger
+from src.utils.workspace import file_lock
+
+logger = setup_logger("tracing")
+
+# Interface the metrics endpoint listens on unless told otherwise: this machine only
+METRICS_HOST = "127.0.0.1"
+
+# The span that is currently open in this thread / task. Child spans pick it up as parent.
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A single timed unit of work, optionally nested under a parent span."""
+
+    def __init__(self, name: str, trace_id: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_s": round(self.duration, 6) if self.duration is not None else None,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Collects spans for one process and aggregates them into metrics.
+
+    Finished spans are kept in memory until `export_jsonl` is called. Aggregated
+    metrics (count, total duration, errors, token counters) live for the whole
+    process so they can be scraped through `render_prometheus`.
+    """
+
+    def __init__(self, profile: bool = False, profile_top: int = 15):
+        self.profile = profile
+        self.profile_top = profile_top
+        self.trace_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._finished: List[Span] = []
+        self._durations: Dict[str, List[float]] = {}  # name -> [count, sum]
+        self._errors: Dict[str, int] = {}
+        self._counters: Dict[tuple, float] = {}  # (metric, span, attr) -> value
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Opens a child span of the current span (or a root span)."""
+        parent = _current_span.get()
+        span = Span(name, parent.trace_id if parent else self.trace_id, parent, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = str(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish()
+            self._record(span)
+
+    @contextmanager
+    def stage(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """
+        Opens a pipeline stage span. When profiling is enabled the stage is run
+        under cProfile and tracemalloc and the results are attached to the span.
+        """
+        with self.span(name, stage=True, **attributes) as span:
+            if not self.profile:
+                yield span
+                return
+
+            profiler = cProfile.Profile()
+            started_tracemalloc = not tracemalloc.is_tracing()
+            if started_tracemalloc:
+                tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            profiler.enable()
+            try:
+                yield span
+            finally:
+                profiler.disable()
+                after = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                if started_tracemalloc:
+                    tracemalloc.stop()
+                span.set_attribute("profile_top", self._profile_summary(profiler))
+                span.set_attribute("memory_peak_bytes", peak)
+                span.set_attribute("memory_top", self._memory_summary(before, after))
+
+    def _profile_summary(self, profiler: cProfile.Profile) -> List[Dict[str, Any]]:
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({
+                "function": f"{os.path.basename(filename)}:{line}({func})",
+                "calls": ncalls,
+                "tottime_s": round(tottime, 6),
+                "cumtime_s": round(cumtime, 6),
+            })
+        rows.sort(key=lambda r: r["cumtime_s"], reverse=True)
+        return rows[:self.profile_top]
+
+    def _memory_summary(self, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        diffs = after.compare_to(before, "lineno")
+        return [
+            {"location": str(d.traceback), "size_diff_bytes": d.size_diff, "count_diff": d.count_diff}
+            for d in diffs[:self.profile_top]
+        ]
+
+    def _record(self, span: Span):
+        with self._lock:
+            self._finished.append(span)
+            agg = self._durations.setdefault(span.name, [0, 0.0])
+            agg[0] += 1
+            agg[1] += span.duration or 0.0
+            if span.status == "error":
+                self._errors[span.name] = self._errors.get(span.name, 0) + 1
+            # Numeric *_tokens attributes (LLM usage) are exposed as counters
+            for key, value in span.attributes.items():
+                if key.endswith("_tokens") and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    counter_key = ("tokens_total", span.name, key[:-len("_tokens")])
+                    self._counters[counter_key] = self._counters.get(counter_key, 0) + value
+
+    def finished_spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._finished)
+
+    def export_jsonl(self, path: str) -> int:
+        """Appends all finished spans to a JSON-lines file and clears them. Returns the count written."""
+        with self._lock:
+            spans, self._finished = self._finished, []
+        if not spans:
+            return 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Runs sharing a trace file append one at a time, so their lines never interleave
+        with file_lock(path + ".lock"), open(path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+        logger.info(f"Exported {len(spans)} spans to {path}")
+        return len(spans)
+
+    def render_prometheus(self) -> str:
+        """Renders aggregated span metrics in the Prometheus text exposition format."""
+        with self._lock:
+            durations = dict((k, list(v)) for k, v in self._durations.items())
+            errors = dict(self._errors)
+            counters = dict(self._counters)
+
+        lines = [
+            "# HELP study_guide_span_duration_seconds Time spent in each pipeline span.",
+            "# TYPE study_guide_span_duration_seconds summary",
+        ]
+        for name in sorted(durations):
+            count, total = durations[name]
+            lines.append(f'study_guide_span_duration_seconds_sum{{span="{_escape(name)}"}} {total:.6f}')
+            lines.append(f'study_guide_span_duration_seconds_count{{span="{_escape(name)}"}} {count}')
+        lines.append("# HELP study_guide_span_errors_total Spans that finished with an error.")
+        lines.append("# TYPE study_guide_span_errors_total counter")
+        for name in sorted(errors):
+            lines.append(f'study_guide_span_errors_total{{span="{_escape(name)}"}} {errors[name]}')
+        lines.append("# HELP study_guide_tokens_total LLM tokens reported by provider responses.")
+        lines.append("# TYPE study_guide_tokens_total counter")
+        for (_, name, kind) in sorted(counters):
+            value = counters[("tokens_total", name, kind)]
+            lines.append(f'study_guide_tokens_total{{span="{_escape(name)}",kind="{_escape(kind)}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def configure_tracer(profile: bool = False) -> Tracer:
+    """Replaces the process-wide tracer (used by the CLI to switch on profiling)."""
+    global _tracer
+    _tracer = Tracer(profile=profile)
+    return _tracer
+
+
+def span(name: str, **attributes: Any):
+    """Shortcut for `get_tracer().span(...)` used by the pipeline modules."""
+    return get_tracer().span(name, **attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_tracer().render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def serve_metrics(port: int, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+    """
+    Starts a background HTTP server exposing `/metrics` in Prometheus text format.
+    Listens on loopback unless another `host` is given, e.g. "0.0.0.0" for a scraper on
+    another machine. Returns the server so callers can `shutdown()` it.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
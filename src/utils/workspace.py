@@ -0,0 +1,161 @@
+import json
+import os
+import secrets
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, IO, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger("workspace")
+
+# Root of the generated files; each run writes into <root>/runs/<run id>/
+DEFAULT_OUTPUT_ROOT = "output"
+RUNS_DIR = "runs"
+# Index of the newest run per series, next to the run directories
+LATEST_INDEX = "latest.json"
+# Manifest each run leaves in its directory
+RUN_MANIFEST = "run.json"
+# Permissions of files created by atomic_write (replaced files keep theirs)
+NEW_FILE_MODE = 0o644
+# Seconds between attempts while waiting for a lock on Windows (msvcrt has no blocking lock)
+LOCK_RETRY_S = 0.05
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w", encoding: Optional[str] = "utf-8") -> Iterator[IO]:
+    """
+    Opens a temporary file next to `path` for writing; on success it is flushed to disk
+    and renamed over `path`, so readers see either the old or the complete new file,
+    never a partial one. On error the temporary file is removed and `path` is untouched.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file owner-only; keep the permissions a plain open() would give
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, NEW_FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def file_lock(path: str, remove: bool = False) -> Iterator[None]:
+    """
+    Exclusive advisory lock on `path` (created if missing), held for the block. It only
+    excludes other holders of the same lock, across threads and processes on this host.
+    With `remove` the lock file is deleted on release (POSIX only; Windows keeps it), so
+    locks taken once per file do not pile up.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    while True:
+        f = open(path, "a+b")
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(LOCK_RETRY_S)
+        if not (remove and fcntl) or _is_current(f, path):
+            break
+        # The previous holder removed the file while this one waited: lock the new one
+        f.close()
+    try:
+        yield
+    finally:
+        if remove and fcntl:
+            # Removed while still held, so a waiter that wakes up sees it is gone
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        f.close()
+
+
+def _is_current(f: IO, path: str) -> bool:
+    """Whether the open file `f` is still the file at `path`"""
+    try:
+        return os.path.samestat(os.fstat(f.fileno()), os.stat(path))
+    except FileNotFoundError:
+        return False
+
+
+def new_run_id() -> str:
+    """Sortable and unique across concurrent runs: UTC timestamp plus random suffix."""
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+
+
+def read_latest(root: str = DEFAULT_OUTPUT_ROOT) -> Dict[str, Dict[str, Any]]:
+    """The latest index: series key -> newest published run (run_id, directory, artifacts...)."""
+    try:
+        with open(os.path.join(root, LATEST_INDEX), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class RunWorkspace:
+    """
+    Private directory for one pipeline run, so concurrent runs (even of the same series)
+    never write the same file. `publish` records the finished run in the shared latest index.
+    """
+
+    def __init__(self, root: str = DEFAULT_OUTPUT_ROOT, run_id: Optional[str] = None):
+        self.root = root
+        self.run_id = run_id or new_run_id()
+        self.directory = os.path.join(root, RUNS_DIR, self.run_id)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def publish(self, key: str, artifacts: Dict[str, Any], **info: Any) -> Dict[str, Any]:
+        """
+        Writes the run manifest and points `key` in the latest index at this run. The index
+        is read, updated and replaced under a lock, so parallel publishes are not lost.
+        """
+        entry = {
+            "run_id": self.run_id,
+            "directory": self.directory,
+            "published_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "artifacts": artifacts,
+            **info,
+        }
+        with atomic_write(self.path(RUN_MANIFEST)) as f:
+            json.dump({"key": key, **entry}, f, indent=2, ensure_ascii=False)
+        index_path = os.path.join(self.root, LATEST_INDEX)
+        with file_lock(index_path + ".lock"):
+            index = read_latest(self.root)
+            index[key] = entry
+            with atomic_write(index_path) as f:
+                json.dump(index, f, indent=2, ensure_ascii=False)
+        logger.info(f"Published run {self.run_id} as the latest '{key}'")
+        return entry
@@ -0,0 +1,56 @@
+import re
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+_HOSTS = {"youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com"}
+_SHORT_HOSTS = {"youtu.be", "www.youtu.be"}
+_ID = r"[A-Za-z0-9_-]+"
+# /shorts/<id>, /live/<id>, /embed/<id>
+_VIDEO_PATH = re.compile(rf"^/(?:shorts|live|embed|v)/(?P<id>{_ID})/?$")
+# /@handle, /channel/UC..., /c/name, /user/name, optionally followed by a tab (/videos, /streams...)
+_CHANNEL_PATH = re.compile(rf"^/(?:@[^/]+|channel/{_ID}|c/[^/]+|user/[^/]+)(?:/[a-z]+)?/?$")
+
+
+def _parse(url: str):
+    parsed = urlparse((url or "").strip())
+    if parsed.scheme not in ("http", "https", ""):
+        return None
+    if not parsed.netloc and parsed.path.split("/")[0] in _HOSTS | _SHORT_HOSTS:
+        # Scheme-less "youtube.com/watch?v=..."
+        parsed = urlparse("https://" + url.strip())
+    return parsed
+
+
+def classify_url(url: str) -> Optional[str]:
+    """"video", "playlist" or "channel" for a YouTube URL, else None."""
+    parsed = _parse(url)
+    if parsed is None:
+        return None
+    host = parsed.netloc.lower().split(":")[0]
+    if host in _SHORT_HOSTS:
+        return "video" if re.fullmatch(rf"/{_ID}/?", parsed.path) else None
+    if host not in _HOSTS:
+        return None
+    query = parse_qs(parsed.query)
+    # A watch URL inside a playlist (?v=...&list=...) still names one video
+    if parsed.path.rstrip("/") == "/watch":
+        return "video" if query.get("v") else None
+    if _VIDEO_PATH.match(parsed.path):
+        return "video"
+    if parsed.path.rstrip("/") == "/playlist":
+        return "playlist" if query.get("list") else None
+    if _CHANNEL_PATH.match(parsed.path):
+        return "channel"
+    return None
+
+
+def video_id(url: str) -> Optional[str]:
+    """The video ID in a YouTube video URL, else None."""
+    if classify_url(url) != "video":
+        return None
+    parsed = _parse(url)
+    if parsed.netloc.lower().split(":")[0] in _SHORT_HOSTS:
+        return parsed.path.strip("/")
+    if parsed.path.rstrip("/") == "/watch":
+        return parse_qs(parsed.query)["v"][0]
+    return _VIDEO_PATH.match(parsed.path).group("id")
@@ -0,0 +1,10 @@
+import pytest
+from src.utils.rate_limit import configure_governor
+
+
+@pytest.fixture(autouse=True)
+def fresh_governor():
+    """Every test starts with full rate-limit buckets instead of what earlier tests spent."""
+    configure_governor()
+    yield
+    configure_governor()
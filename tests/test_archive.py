@@ -0,0 +1,109 @@
+import json
+import pytest
+from src.storage.archive import ArchiveStore, file_hash, main
+
+
+def _guide(series="Renewed Minds", preacher="Pastor Jane Doe", reflection="We must renew our minds daily."):
+    return {
+        "series_title": series,
+        "preacher_name": preacher,
+        "memory_verse_reference": "Romans 12:2",
+        "days": [
+            {"day": 1, "title": "T", "scripture_reference": "Philippians 4:8", "reflection": reflection, "question": "Q", "prayer": "P"},
+        ],
+        "key_quotes": [],
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ArchiveStore(str(tmp_path / "archive.db")) as store:
+        yield store
+
+
+class TestArchiveStore:
+
+    def test_search_by_text_reference_and_columns(self, store):
+        first = store.ingest("Turn with me to Philippians 4:13. Contentment is learned.", {"kjv": _guide()},
+                             source="https://youtu.be/a", audio_hash="aaa")
+        second = store.ingest("Today we study grace in Ephesians 2:8.", {"kjv": _guide("Grace Alone", "Pastor John")},
+                              source="https://youtu.be/b", audio_hash="bbb")
+
+        assert [r["id"] for r in store.search("contentment")] == [first]
+        assert "[Contentment]" in store.search("contentment")[0]["snippet"]
+        # Newest first; both guides cite Philippians 4:8
+        assert [r["id"] for r in store.search(reference="Philippians 4")] == [second, first]
+        assert [r["id"] for r in store.search(reference="Philippians 4:13")] == [first]
+        assert [r["id"] for r in store.search(reference="Eph 2:8")] == [second]
+        assert [r["id"] for r in store.search(preacher="pastor john")] == [second]
+        assert [r["id"] for r in store.search("renew", series="Renewed Minds")] == [first]
+        assert store.search(until="2000-01-01") == []
+        with pytest.raises(ValueError):
+            store.search(reference="Hezekiah 1")
+
+    def test_search_by_verse_within_a_range(self, store):
+        sermon_id = store.ingest("Read Philippians 4:10-13 with me.", {"kjv": _guide()}, audio_hash="aaa")
+
+        assert [r["id"] for r in store.search(reference="Phil 4:13")] == [sermon_id]
+        assert [r["id"] for r in store.search(reference="Philippians 4:12-19")] == [sermon_id]
+        assert store.search(reference="Philippians 4:14") == []
+
+    def test_archive_without_verse_ranges_is_migrated(self, tmp_path):
+        db = str(tmp_path / "archive.db")
+        with ArchiveStore(db) as store:
+            sermon_id = store.ingest("Read Philippians 4:10-13 with me.", {"kjv": _guide()}, audio_hash="aaa")
+            # The layout before ranges: one `verse` column holding the first verse
+            store.conn.execute("ALTER TABLE scripture_refs DROP COLUMN verse_end")
+            store.conn.execute("ALTER TABLE scripture_refs RENAME COLUMN verse_start TO verse")
+            store.conn.commit()
+
+        with ArchiveStore(db) as store:
+            assert [r["id"] for r in store.search(reference="Phil 4:13")] == [sermon_id]
+
+    def test_same_audio_updates_sermon_and_replaces_guides(self, store):
+        sermon_id = store.ingest("Transcript", {"kjv": _guide()}, audio_hash="aaa")
+        again = store.ingest("Transcript", {"kjv": _guide(reflection="New"), "web": _guide()}, audio_hash="aaa")
+
+        assert again == sermon_id
+        guides = store.get_guides(sermon_id)
+        assert sorted(guides) == ["kjv", "web"]
+        assert guides["kjv"].days[0].reflection == "New"
+        assert store.find_sermon(audio_hash="aaa")["transcript"] == "Transcript"
+        assert store.find_sermon(audio_hash="zzz") is None
+
+    def test_runs_without_audio_hash_update_the_same_sermon(self, store):
+        url = "https://www.youtube.com/watch?v=abc123def45"
+        first = store.ingest("first transcript", {"kjv": _guide("Grace")}, source=url)
+        # The same stream run again, then the same video under its short URL
+        assert store.ingest("second transcript", {"kjv": _guide("Grace")}, source=url) == first
+        assert store.ingest("third transcript", {"kjv": _guide("Grace")}, source="https://youtu.be/abc123def45") == first
+        assert store.conn.execute("SELECT COUNT(*) FROM sermons").fetchone()[0] == 1
+        # The sermon and its search text carry the latest transcript
+        assert store.get_sermon(first)["transcript"] == "third transcript"
+        assert [hit["id"] for hit in store.search(text="third")] == [first]
+        assert store.search(text="first") == []
+
+    def test_processed_video_ids(self, store):
+        store.ingest("Sermon one.", {"kjv": _guide()}, source="https://www.youtube.com/watch?v=vid1", audio_hash="a")
+        store.ingest("Sermon two.", {"kjv": _guide()}, source="/audio/two.mp3", audio_hash="b", video_id="vid2")
+        store.ingest("Sermon three.", {"kjv": _guide()}, source="/audio/three.mp3", audio_hash="c")
+        # Archived before video IDs were recorded: only the source URL is known
+        store.conn.execute("DELETE FROM videos WHERE video_id = 'vid1'")
+        assert store.processed_video_ids() == {"vid1", "vid2"}
+
+    def test_file_hash(self, tmp_path):
+        a, b = tmp_path / "a.wav", tmp_path / "b.wav"
+        a.write_bytes(b"audio")
+        b.write_bytes(b"audio")
+        assert file_hash(str(a)) == file_hash(str(b))
+
+    def test_cli_query_and_show(self, tmp_path, capsys):
+        db = str(tmp_path / "archive.db")
+        with ArchiveStore(db) as store:
+            sermon_id = store.ingest("Philippians 4:13 says we can do all things.", {"kjv": _guide()})
+
+        main(["--db", db, "query", "--reference", "Philippians 4"])
+        assert f"#{sermon_id}" in capsys.readouterr().out
+
+        main(["--db", db, "show", str(sermon_id)])
+        assert json.loads(capsys.readouterr().out)["series_title"] == "Renewed Minds"
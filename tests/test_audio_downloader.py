@@ -1,7 +1,9 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from src.ingestion.audio_downloader import AudioDownloader
+from src.ingestion.audio_downloader import AudioDownloader, IncompleteDownloadError, parse_bandwidth
 import os
+from types import SimpleNamespace
+import yt_dlp
 
 class TestAudioDownloader:
     
@@ -25,6 +27,9 @@ class TestAudioDownloader:
         mock_ytdl.return_value.__enter__.return_value = mock_ytdl_instance
         
         expected_path = str(tmp_path / "Test_Sermon.mp3")
+        # The download is verified before it is handed on, so the mock must produce a file
+        with open(expected_path, "wb") as f:
+            f.write(b"\0" * 1024)
         
         # Mock extract_info to return dict
         mock_ytdl_instance.extract_info.return_value = {
@@ -55,3 +60,122 @@ class TestAudioDownloader:
         
         with pytest.raises(Exception, match="Download failed"):
             downloader.download_audio("https://youtube.com/watch?v=test")
+
+
+class FlakyYDL:
+    """Serves a 4000-byte file in 500-byte blocks; the first fetch drops after 1500 bytes."""
+
+    size = 4000
+    reported_size = 4000
+    fetches = 0
+
+    def __init__(self, params=None):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def prepare_filename(self, info):
+        return self.params.get("outtmpl", "%(title)s.%(ext)s") % {"ext": "m4a", "title": info["title"]}
+
+    def extract_info(self, url, download=True):
+        info = {"id": "abc", "title": "Sermon", "duration": 1.0, "ext": "m4a", "filesize": self.reported_size, "abr": 32}
+        if not download:
+            return info
+        FlakyYDL.fetches += 1
+        target = self.prepare_filename(info)
+        part = target + ".part"
+        assert self.params["continuedl"]
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        stop = 1500 if FlakyYDL.fetches == 1 else self.size
+        with open(part, "ab") as f:
+            for done in range(offset + 500, stop + 1, 500):
+                f.write(b"\0" * 500)
+                for hook in self.params.get("progress_hooks", []):
+                    hook({"status": "downloading", "downloaded_bytes": done, "tmpfilename": part, "filename": target})
+        if stop < self.size:
+            raise yt_dlp.utils.DownloadError("Connection reset by peer")
+        os.replace(part, target)
+        return info
+
+
+@pytest.fixture
+def flaky(monkeypatch):
+    FlakyYDL.fetches = 0
+    FlakyYDL.reported_size = 4000
+    monkeypatch.setattr("src.ingestion.audio_downloader.yt_dlp.YoutubeDL", FlakyYDL)
+    sleeps = []
+    monkeypatch.setattr("src.ingestion.audio_downloader.time", SimpleNamespace(sleep=sleeps.append))
+    return sleeps
+
+
+def test_dropped_download_resumes_from_part_file(tmp_path, flaky):
+    downloader = AudioDownloader(output_dir=str(tmp_path))
+    path = downloader.download_audio("https://www.youtube.com/watch?v=abc")
+
+    assert FlakyYDL.fetches == 2 and flaky == [5.0]
+    assert os.path.getsize(path) == 4000
+    # Neither the partial data nor the download's lock file is left behind
+    assert os.listdir(tmp_path) == ["Sermon.m4a"]
+
+
+def test_download_not_matching_metadata_is_rejected(tmp_path, flaky):
+    FlakyYDL.reported_size = 5000
+    downloader = AudioDownloader(output_dir=str(tmp_path))
+    with pytest.raises(IncompleteDownloadError, match="4000 bytes, expected 5000"):
+        downloader.download_audio("https://www.youtube.com/watch?v=abc")
+    # Each attempt starts over instead of trusting the bad file
+    assert FlakyYDL.fetches == 3 and os.listdir(tmp_path) == []
+
+
+def test_duration_is_checked_against_bitrate(tmp_path):
+    path = tmp_path / "a.m4a"
+    path.write_bytes(b"\0" * 4000)
+    downloader = AudioDownloader(output_dir=str(tmp_path))
+    # 4000 bytes at 32 kbps = 1 s
+    assert downloader._verify(str(path), {"duration": 1.0, "abr": 32}) == 4000
+    with pytest.raises(IncompleteDownloadError, match="expected 60s"):
+        downloader._verify(str(path), {"duration": 60.0, "abr": 32})
+    assert not path.exists()
+
+
+def test_bandwidth_cap_throttles_through_progress_hook(tmp_path, flaky, monkeypatch):
+    clock = SimpleNamespace(now=0.0, slept=0.0)
+
+    def sleep(seconds):
+        clock.now += seconds
+        clock.slept += seconds
+
+    monkeypatch.setattr("src.utils.rate_limit.time", SimpleNamespace(monotonic=lambda: clock.now, sleep=sleep))
+    downloader = AudioDownloader(output_dir=str(tmp_path), bandwidth_limit="1K")
+    downloader.download_audio("https://www.youtube.com/watch?v=abc")
+
+    # 4000 bytes at 1024 B/s, one second of which may burst: (4000 - 1024) / 1024 s of waiting.
+    # The resumed attempt does not charge the 1500 bytes already on disk a second time.
+    assert clock.slept == pytest.approx((4000 - 1024) / 1024, abs=0.01)
+
+
+def test_parse_bandwidth():
+    assert parse_bandwidth("2M") == 2 * 1024 * 1024
+    assert parse_bandwidth(1500) == 1500
+    with pytest.raises(ValueError):
+        parse_bandwidth("fast")
+
+
+@patch('src.ingestion.audio_downloader.yt_dlp.YoutubeDL')
+def test_resolve_stream_returns_media_url_without_downloading(mock_ytdl, tmp_path):
+    ydl = mock_ytdl.return_value.__enter__.return_value
+    ydl.extract_info.return_value = {
+        "id": "abc", "title": "Sunday: Service!", "duration": 1800, "ext": "webm", "filesize": 2048,
+        "url": "https://media.example/audio", "http_headers": {"User-Agent": "yt-dlp"},
+    }
+    stream = AudioDownloader(output_dir=str(tmp_path)).resolve_stream("https://youtube.com/watch?v=abc")
+
+    assert ydl.extract_info.call_args.kwargs["download"] is False
+    assert (stream.url, stream.name, stream.filesize, stream.duration) == \
+        ("https://media.example/audio", "Sunday Service.webm", 2048, 1800)
+    assert stream.headers == {"User-Agent": "yt-dlp"}
+    assert os.listdir(tmp_path) == []
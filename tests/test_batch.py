@@ -0,0 +1,142 @@
+import json
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from benchmarks.fakes import FakeBatchServer
+from src.generation.batch import (BatchStore, COLLECTED, DONE, SUBMITTED, SUCCEEDED, GeminiBatchBackend,
+                                  get_backend, resume, submit)
+from src.utils.workspace import read_latest
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Runs in a scratch directory with two transcripts and an offline Bible fetcher."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LLM_API_KEY", "test-key")
+    paths = []
+    for n in range(2):
+        path = tmp_path / f"sermon{n}_transcript.txt"
+        path.write_text(f"Sermon {n}. Turn with me to Romans 12:2. Renew your mind daily.", encoding="utf-8")
+        paths.append(str(path))
+    fetcher = MagicMock()
+    fetcher.get_scripture.return_value = "Be not conformed to this world."
+    return paths, fetcher
+
+
+def _entries(paths, series=None):
+    return [{"transcript_path": path, "series": series, "preacher": "Pastor"} for path in paths]
+
+
+@pytest.mark.parametrize("provider", ["gemini", "openai", "groq"])
+def test_job_survives_restart_and_writes_guides(workspace, monkeypatch, provider):
+    paths, fetcher = workspace
+    with FakeBatchServer(polls_to_complete=2) as server:
+        monkeypatch.setenv("LLM_BATCH_BASE_URL", server.base_url)
+        job = submit(_entries(paths), provider, "test-model", ["kjv", "web"], BatchStore("batches"))
+        assert job["state"] == SUBMITTED
+        assert resume(job, BatchStore("batches"), bible_fetcher=fetcher)["state"] == SUBMITTED
+
+        # A new process only has the job file to go on
+        store = BatchStore("batches")
+        [reloaded] = store.unfinished()
+        assert reloaded["remote_id"] == job["remote_id"]
+        finished = resume(reloaded, store, bible_fetcher=fetcher)
+
+    assert finished["state"] == DONE and store.unfinished() == []
+    assert [item["status"] for item in finished["items"]] == ["done", "done"]
+    pdfs = [a["pdf_path"] for item in finished["items"] for a in item["artifacts"].values()]
+    # Both guides are titled "Benchmark Series"; each is a run of its own and neither overwrites the other
+    assert len(set(pdfs)) == 4 and all(os.path.exists(p) for p in pdfs)
+    assert len({os.path.dirname(p) for p in pdfs}) == 2
+    assert read_latest()["Benchmark_Series"]["artifacts"] == finished["items"][1]["artifacts"]
+    content_path = finished["items"][0]["artifacts"]["web"]["content_path"]
+    with open(content_path, encoding="utf-8") as f:
+        content = json.load(f)
+    assert content["preacher_name"] == "Pastor"
+    assert "(WEB)" in content["memory_verse"]
+    assert "quote_verification" in content
+
+
+def test_openai_batch_input_matches_chat_requests(workspace):
+    paths, _ = workspace
+    with FakeBatchServer() as server:
+        submit(_entries(paths[:1]), "openai", "gpt-4o-mini", ["kjv"], BatchStore("batches"),
+               backend=get_backend("openai", base_url=server.base_url))
+        [batch] = server.jobs.values()
+    assert batch["params"]["endpoint"] == "/v1/chat/completions"
+    assert batch["params"]["completion_window"] == "24h"
+    [line] = batch["lines"]
+    assert line["custom_id"] == "item-0"
+    assert line["body"]["model"] == "gpt-4o-mini"
+    assert [m["role"] for m in line["body"]["messages"]] == ["system", "user"]
+    # Cited references are passed as hints, as in the synchronous path
+    assert "Romans 12:2" in line["body"]["messages"][1]["content"]
+
+
+@pytest.mark.parametrize("provider", ["gemini", "openai"])
+def test_failed_requests_do_not_fail_the_job(workspace, provider):
+    paths, fetcher = workspace
+    store = BatchStore("batches")
+    with FakeBatchServer(fail_ids={"item-1"}) as server:
+        backend = get_backend(provider, base_url=server.base_url)
+        job = submit(_entries(paths, series="Renewed"), provider, "test-model", ["kjv"], store, backend=backend)
+        job = resume(job, store, backend=backend, bible_fetcher=fetcher)
+
+    assert job["state"] == DONE
+    done, failed = job["items"]
+    assert done["status"] == "done" and os.path.exists(done["artifacts"]["kjv"]["pdf_path"])
+    assert done["artifacts"]["kjv"]["pdf_path"] == os.path.join(read_latest()["Renewed"]["directory"], "Renewed.pdf")
+    assert failed["status"] == "failed" and "Injected failure" in failed["error"]
+
+
+def test_partially_succeeded_gemini_job_is_finished():
+    backend = GeminiBatchBackend.__new__(GeminiBatchBackend)
+    backend.client = MagicMock()
+    backend.client.batches.get.return_value = SimpleNamespace(
+        state=SimpleNamespace(name="JOB_STATE_PARTIALLY_SUCCEEDED"),
+        dest=SimpleNamespace(inlined_responses=[
+            SimpleNamespace(metadata={"key": "item-0"}, error=None, response=SimpleNamespace(text="{}")),
+            SimpleNamespace(metadata={"key": "item-1"}, error=SimpleNamespace(message="Quota"), response=None),
+        ]),
+    )
+    state, results = backend.poll("batches/1")
+    assert state == SUCCEEDED
+    assert results == {"item-0": {"text": "{}"}, "item-1": {"error": "Quota"}}
+
+
+def test_expired_job_marks_items_failed(workspace):
+    paths, fetcher = workspace
+    store = BatchStore("batches")
+    with FakeBatchServer(job_state="expired") as server:
+        backend = get_backend("gemini", base_url=server.base_url)
+        job = submit(_entries(paths), "gemini", "test-model", ["kjv"], store, backend=backend)
+        job = resume(job, store, backend=backend, bible_fetcher=fetcher)
+
+    assert job["remote_state"] == "failed"
+    assert all(item["status"] == "failed" and "No result" in item["error"] for item in job["items"])
+
+
+def test_collected_job_resumes_without_polling(workspace):
+    paths, fetcher = workspace
+    store = BatchStore("batches")
+    with FakeBatchServer() as server:
+        backend = get_backend("gemini", base_url=server.base_url)
+        job = submit(_entries(paths), "gemini", "test-model", ["kjv"], store, backend=backend)
+
+        # Simulate a crash after the results were downloaded and the first guide written
+        job["state"] = COLLECTED
+        job["items"][0]["status"] = "done"
+        job["items"][1]["response"] = server._guide("item-1", 1)
+        store.save(job)
+        polls = len(server.requests)
+
+        backend = MagicMock()
+        job = resume(store.load(job["id"]), store, backend=backend, bible_fetcher=fetcher)
+        assert len(server.requests) == polls
+
+    backend.poll.assert_not_called()
+    assert job["items"][0]["artifacts"] == {}  # not redone
+    assert job["items"][1]["status"] == "done"
@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import patch
+from benchmarks.fakes import FakeBibleServer, FakeLLMClient, InjectedFailure, LatencyProfile
+from benchmarks.run import compare_to_baseline, percentile
+from benchmarks.synthetic import make_transcript
+from src.utils.bible_fetcher import BibleFetcher
+
+
+def test_percentile_nearest_rank():
+    values = [0.1 * i for i in range(1, 21)]
+    assert percentile(values, 50) == pytest.approx(1.0)
+    assert percentile(values, 95) == pytest.approx(1.9)
+    assert percentile([], 95) == 0.0
+
+
+def test_compare_to_baseline_flags_slow_median():
+    baseline = {"single/short/gemini": {"throughput_per_min": 100, "metrics": {
+        "llm.call": {"p50": 0.100, "p95": 0.120},
+        "end_to_end": {"p50": 0.500, "p95": 0.600},
+    }}}
+    current = {"single/short/gemini": {"throughput_per_min": 95, "metrics": {
+        "llm.call": {"p50": 0.300, "p95": 0.400},
+        "end_to_end": {"p50": 0.520, "p95": 0.610},
+    }}}
+    regressions = compare_to_baseline(current, baseline, tolerance=0.5)
+    assert len(regressions) == 1
+    assert "llm.call p50" in regressions[0]
+
+
+def test_compare_to_baseline_flags_new_failures():
+    baseline = {"batch8x4/short/gemini": {"failures": 0, "metrics": {}}}
+    current = {"batch8x4/short/gemini": {"runs": 8, "failures": 1, "throughput_per_min": 0, "metrics": {}}}
+    regressions = compare_to_baseline(current, baseline, tolerance=0.5)
+    assert regressions == ["batch8x4/short/gemini failures: 1 of 8 runs vs baseline 0"]
+    current["batch8x4/short/gemini"]["failures"] = 0
+    assert not compare_to_baseline(current, baseline, tolerance=0.5)
+
+
+def test_synthetic_transcript_is_deterministic():
+    text = make_transcript(600, seed=3)
+    assert text == make_transcript(600, seed=3)
+    assert "Turn with me to" in text
+
+
+def test_bible_fetcher_against_fake_server():
+    with FakeBibleServer(LatencyProfile()) as server:
+        with patch.object(BibleFetcher, "BASE_URL", server.base_url):
+            text = BibleFetcher().get_scripture("John 3:16", "kjv")
+    assert text.startswith("John 3:16:")
+    assert server.requests == 1
+
+
+def test_fake_bible_server_failure_injection():
+    with FakeBibleServer(LatencyProfile(failure_rate=1.0)) as server:
+        with patch.object(BibleFetcher, "BASE_URL", server.base_url):
+            assert BibleFetcher().get_scripture("John 3:16") is None
+
+
+def test_fake_llm_client_shapes():
+    client = FakeLLMClient("groq", LatencyProfile())
+    response = client.chat.completions.create(model="m", messages=[{"role": "user", "content": "x" * 400}])
+    assert response.usage.prompt_tokens == 100
+    assert '"series_title"' in response.choices[0].message.content
+
+    gemini = FakeLLMClient("gemini", LatencyProfile(failure_rate=1.0))
+    with pytest.raises(InjectedFailure):
+        gemini.models.generate_content(model="m", contents="prompt")
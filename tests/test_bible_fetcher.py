@@ -38,3 +38,58 @@ def test_get_scripture_exception(bible_fetcher):
     with patch('requests.get', side_effect=Exception("Connection error")):
         text = bible_fetcher.get_scripture("John 3:16")
         assert text is None
+
+def test_get_scripture_is_cached_per_version(bible_fetcher):
+    """Repeated and differently-spelled references reuse one request per version"""
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"text": "For God so loved the world..."}
+
+    with patch('requests.get', return_value=mock_response) as mock_get:
+        assert bible_fetcher.get_scripture("John 3:16", "kjv") == "For God so loved the world..."
+        assert bible_fetcher.get_scripture("Jn 3:16", "kjv") == "For God so loved the world..."
+        assert mock_get.call_count == 1
+        bible_fetcher.get_scripture("John 3:16", "web")
+        assert mock_get.call_count == 2
+
+def test_references_sharing_a_prefix_are_cached_apart(bible_fetcher):
+    def respond(url, params, timeout):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"text": url.rsplit("/", 1)[-1]}
+        return response
+
+    with patch('requests.get', side_effect=respond) as mock_get:
+        assert bible_fetcher.get_scripture("John 3:16-17", "kjv") == "John 3:16-17"
+        assert bible_fetcher.get_scripture("John 3:16-17, 19", "kjv") == "John 3:16-17, 19"
+        assert bible_fetcher.get_scripture("Genesis 1:1-2", "kjv") == "Genesis 1:1-2"
+        assert bible_fetcher.get_scripture("Genesis 1:1-2:3", "kjv") == "Genesis 1:1-2:3"
+        assert mock_get.call_count == 4
+
+def test_failed_fetch_is_retried(bible_fetcher):
+    with patch('requests.get', side_effect=Exception("Connection error")) as mock_get:
+        assert bible_fetcher.get_scripture("John 3:16") is None
+        assert bible_fetcher.get_scripture("John 3:16") is None
+        assert mock_get.call_count == 2
+
+def test_prefetch_warms_cache(bible_fetcher):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"text": "Verse"}
+
+    with patch('requests.get', return_value=mock_response) as mock_get:
+        futures = bible_fetcher.prefetch(["John 3:16", "Romans 8:28"], ["kjv", "web"])
+        assert [f.result(timeout=5) for f in futures] == ["Verse"] * 4
+        assert bible_fetcher.get_scripture("Romans 8:28", "web") == "Verse"
+        assert mock_get.call_count == 4
+
+def test_prefetch_stays_within_quota_budget(bible_fetcher):
+    references = [f"Psalms {n}:1" for n in range(1, 31)]
+
+    with patch.object(bible_fetcher, "_fetch_single_ref", return_value="Verse") as fetch:
+        # 30 requests per minute (the bible_api default) leave 15 for a 30 s prefetch window
+        futures = bible_fetcher.prefetch(references, ["kjv", "web", "webbe"])
+        assert [f.result(timeout=5) for f in futures] == ["Verse"] * 15
+        assert {call.args for call in fetch.call_args_list} == {
+            (ref, version) for ref in references[:5] for version in ("kjv", "web", "webbe")}
+        assert bible_fetcher.prefetch(references, ["kjv"], budget=0) == []
+        assert fetch.call_count == 15
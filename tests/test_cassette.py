@@ -0,0 +1,116 @@
+import gzip
+import json
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from src.utils.cassette import use_cassette, replayable, CassetteMiss, ReplayedError
+from src.utils.bible_fetcher import BibleFetcher
+from src.generation.content_generator import ContentGenerator
+
+
+def _bible_response(text):
+    response = MagicMock()
+    response.status_code = 200
+    response.text = json.dumps({"reference": "John 3:16", "text": text})
+    response.json.return_value = json.loads(response.text)
+    return response
+
+
+class TestCassette:
+
+    def test_record_then_replay_bible_fetch(self, tmp_path):
+        path = str(tmp_path / "bible.jsonl.gz")
+
+        with patch('requests.get', return_value=_bible_response("For God so loved...")):
+            with use_cassette(path, mode="record"):
+                assert BibleFetcher().get_scripture("John 3:16") == "For God so loved..."
+
+        # Replay never touches the network
+        with patch('requests.get', side_effect=AssertionError("network used")):
+            with use_cassette(path, mode="replay"):
+                assert BibleFetcher().get_scripture("John 3:16") == "For God so loved..."
+
+    def test_cassette_is_compact_gzip_jsonl(self, tmp_path):
+        path = tmp_path / "calls.jsonl.gz"
+        with use_cassette(str(path), mode="record"):
+            replayable("demo", {"n": 1}, lambda: {"answer": 42})
+
+        with gzip.open(path, "rt") as f:
+            [entry] = [json.loads(line) for line in f]
+        assert entry["kind"] == "demo"
+        assert entry["payload"] == {"answer": 42}
+        assert "latency" in entry
+
+    def test_replay_speed(self, tmp_path):
+        path = str(tmp_path / "slow.jsonl.gz")
+
+        def slow_call():
+            time.sleep(0.05)
+            return "done"
+
+        with use_cassette(path, mode="record"):
+            replayable("slow", {}, slow_call)
+
+        with use_cassette(path, mode="replay", speed="zero"):
+            started = time.perf_counter()
+            assert replayable("slow", {}, slow_call) == "done"
+            assert time.perf_counter() - started < 0.04
+
+        with use_cassette(path, mode="replay", speed="recorded"):
+            started = time.perf_counter()
+            replayable("slow", {}, slow_call)
+            assert time.perf_counter() - started >= 0.045
+
+    def test_identical_requests_replay_in_order(self, tmp_path):
+        path = str(tmp_path / "seq.jsonl.gz")
+        values = iter([1, 2])
+        with use_cassette(path, mode="record"):
+            replayable("counter", {}, lambda: next(values))
+            replayable("counter", {}, lambda: next(values))
+
+        with use_cassette(path, mode="replay"):
+            results = [replayable("counter", {}, lambda: 0) for _ in range(3)]
+        assert results == [1, 2, 2]
+
+    def test_recorded_errors_are_replayed(self, tmp_path):
+        path = str(tmp_path / "err.jsonl.gz")
+
+        def failing():
+            raise ConnectionError("timeout")
+
+        with use_cassette(path, mode="record"):
+            with pytest.raises(ConnectionError):
+                replayable("flaky", {}, failing)
+
+        with use_cassette(path, mode="replay"):
+            with pytest.raises(ReplayedError, match="ConnectionError: timeout"):
+                replayable("flaky", {}, failing)
+
+    def test_replay_miss(self, tmp_path):
+        path = str(tmp_path / "empty.jsonl.gz")
+        with use_cassette(path, mode="record"):
+            pass
+        with use_cassette(path, mode="replay"):
+            with pytest.raises(CassetteMiss):
+                replayable("llm", {"prompt": "unseen"}, lambda: "x")
+
+    @patch('src.generation.content_generator.BibleFetcher')
+    @patch('src.generation.content_generator.get_llm_client')
+    def test_llm_call_replay(self, mock_get_client, mock_bible_fetcher, tmp_path, monkeypatch):
+        monkeypatch.setenv("LLM_MODEL", "gpt-4")
+        mock_client = MagicMock()
+        mock_completion = MagicMock()
+        mock_completion.choices = [MagicMock(message=MagicMock(content='{"ok": true}'))]
+        mock_completion.usage.prompt_tokens = 120
+        mock_completion.usage.completion_tokens = 30
+        mock_client.chat.completions.create.return_value = mock_completion
+        mock_get_client.return_value = (mock_client, 'openai')
+        path = str(tmp_path / "llm.jsonl.gz")
+
+        generator = ContentGenerator()
+        with use_cassette(path, mode="record"):
+            assert generator._call_llm("prompt") == '{"ok": true}'
+
+        mock_client.chat.completions.create.side_effect = AssertionError("network used")
+        with use_cassette(path, mode="replay"):
+            assert generator._call_llm("prompt") == '{"ok": true}'
@@ -0,0 +1,89 @@
+import threading
+import time
+from unittest.mock import patch
+
+from src.ingestion.audio_downloader import AudioDownloader
+from src.ingestion.channel_sync import sync_channel
+
+CHANNEL = "https://www.youtube.com/@GraceChurch"
+
+
+class FakeListingYDL:
+    """Channel root -> Videos tab -> newest-first flat entries, served lazily page by page."""
+
+    ids = [f"v{n:03d}" for n in range(600, 0, -1)]
+    pages_fetched = 0
+
+    def __init__(self, params=None):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @classmethod
+    def _entries(cls):
+        for start in range(0, len(cls.ids), 30):
+            cls.pages_fetched += 1
+            for vid in cls.ids[start:start + 30]:
+                yield {"_type": "url", "ie_key": "Youtube", "id": vid, "title": f"Sunday Service {vid}", "duration": 3600}
+
+    def extract_info(self, url, download=False, process=True):
+        assert not process and self.params.get("extract_flat")
+        if url == CHANNEL:
+            return {"_type": "playlist", "entries": iter([{"_type": "url", "ie_key": "YoutubeTab", "url": CHANNEL + "/videos"}])}
+        return {"_type": "playlist", "entries": self._entries()}
+
+
+@patch("src.ingestion.audio_downloader.yt_dlp.YoutubeDL", FakeListingYDL)
+def test_listing_stops_after_known_videos(tmp_path):
+    FakeListingYDL.pages_fetched = 0
+    downloader = AudioDownloader(output_dir=str(tmp_path))
+    known = set(FakeListingYDL.ids[3:])  # everything but the three newest
+
+    new = downloader.list_videos(CHANNEL, known)
+
+    assert [e["id"] for e in new] == FakeListingYDL.ids[:3]
+    assert new[0]["url"] == "https://www.youtube.com/watch?v=v600"
+    # A weekly sync reads the first page, not all 20
+    assert FakeListingYDL.pages_fetched == 1
+
+
+@patch("src.ingestion.audio_downloader.yt_dlp.YoutubeDL", FakeListingYDL)
+def test_full_listing_finds_gaps(tmp_path):
+    downloader = AudioDownloader(output_dir=str(tmp_path))
+    known = set(FakeListingYDL.ids) - {"v001"}
+    assert downloader.list_videos(CHANNEL, known) == []
+    assert [e["id"] for e in downloader.list_videos(CHANNEL, known, stop_after_known=None)] == ["v001"]
+
+
+@patch("src.ingestion.audio_downloader.yt_dlp.YoutubeDL", FakeListingYDL)
+def test_sync_downloads_new_videos_with_bounded_concurrency(tmp_path):
+    downloader = AudioDownloader(output_dir=str(tmp_path))
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def fake_download(url, prefix=""):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        if prefix == "v598":
+            raise RuntimeError("connection reset")
+        path = str(tmp_path / f"{prefix}.m4a")
+        downloader.downloads[path] = {"id": prefix, "duration": 3599}
+        return path
+
+    downloader.download_audio = fake_download
+    known = set(FakeListingYDL.ids[8:])
+    items = sync_channel(CHANNEL, known, downloader=downloader, max_workers=2)
+
+    assert peak[0] == 2
+    # Oldest first, the failed download left for the next sync
+    assert [i["id"] for i in items] == ["v593", "v594", "v595", "v596", "v597", "v599", "v600"]
+    assert items[0]["audio_path"].endswith("v593.m4a") and items[0]["duration"] == 3599
+
+    assert [i["id"] for i in sync_channel(CHANNEL, known, downloader=downloader, limit=2)] == ["v599", "v600"]
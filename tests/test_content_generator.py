@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from src.generation.content_generator import ContentGenerator
+from src.generation.models import Guide
 
 class TestContentGenerator:
     
@@ -41,9 +42,11 @@ class TestContentGenerator:
         generator = ContentGenerator()
         result = generator.generate_content("transcript text")
         
-        assert result['series_title'] == "Test Series"
-        assert len(result['days']) == 6
-        assert "John 3:16" in result['memory_verse']
+        assert result.series_title == "Test Series"
+        assert len(result.days) == 6
+        assert result.days[0].question == "Q1"
+        assert "John 3:16" in result.memory_verse.text
+        assert result.quote_verification == []
         mock_client.models.generate_content.assert_called_once()
 
     @patch('src.generation.content_generator.BibleFetcher')
@@ -77,7 +80,7 @@ class TestContentGenerator:
         generator = ContentGenerator()
         result = generator.generate_content("transcript text")
         
-        assert result['series_title'] == "Test Series"
+        assert result.series_title == "Test Series"
         mock_client.chat.completions.create.assert_called_once()
 
     @patch('src.generation.content_generator.get_llm_client')
@@ -118,3 +121,24 @@ class TestContentGenerator:
         
         with pytest.raises(ValueError, match="LLM did not return valid JSON"):
             generator.generate_content("transcript")
+
+    @patch('src.generation.content_generator.BibleFetcher')
+    @patch('src.generation.content_generator.get_llm_client')
+    def test_enrich_for_versions_reuses_one_generation(self, mock_get_client, mock_bible_fetcher):
+        mock_get_client.return_value = (MagicMock(), 'gemini')
+        mock_bible_fetcher.return_value.get_scripture.side_effect = lambda ref, version: f"{ref} in {version}"
+
+        generator = ContentGenerator()
+        base = Guide.from_dict({
+            "series_title": "Series",
+            "memory_verse_reference": "John 3:16",
+            "days": [{"day": 1, "title": "T", "scripture_reference": "Romans 8:28", "reflection": "R", "question": "Q", "prayer": "P"}],
+        })
+        results = generator.enrich_for_versions(base, ["kjv", "web", "rvr", "kjv"])
+
+        assert list(results) == ["kjv", "web", "rvr"]
+        assert results["web"].memory_verse.text == "John 3:16 (WEB):\nJohn 3:16 in web"
+        assert results["rvr"].days[0].scripture.text == "Romans 8:28 (RVR): \"Romans 8:28 in rvr\""
+        # The generated content itself is left untouched for the next version
+        assert "memory_verse" not in base.to_dict()
+        assert "scripture" not in base.to_dict()["days"][0]
@@ -0,0 +1,128 @@
+import json
+import os
+import time
+
+import pytest
+
+from src.ingestion.drop_folder import DropFolderWatcher, load_folder_defaults
+
+
+def _drop(path, data=b"ID3 sermon audio", age_s=60):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    # Finished long enough ago to count as fully written
+    past = time.time() - age_s
+    os.utime(path, (past, past))
+    return str(path)
+
+
+def test_nearest_folder_defaults_win(tmp_path):
+    (tmp_path / "guide-defaults.json").write_text(json.dumps({"series": "Sunday", "preacher": "Pastor A", "bible_version": "kjv"}))
+    (tmp_path / "youth").mkdir()
+    (tmp_path / "youth" / "guide-defaults.json").write_text(json.dumps({"series": "Youth", "logo": "logo.png",
+                                                                        "bible_version": ["web", "kjv"], "colour": "red"}))
+
+    assert load_folder_defaults(str(tmp_path), str(tmp_path)) == {"series": "Sunday", "preacher": "Pastor A", "bible_version": ["kjv"]}
+    assert load_folder_defaults(str(tmp_path), str(tmp_path / "youth")) == {
+        "series": "Youth", "preacher": "Pastor A", "bible_version": ["web", "kjv"],
+        "logo": os.path.join(str(tmp_path / "youth"), "logo.png"),
+    }
+
+
+def test_waits_for_writes_to_settle_and_skips_copies(tmp_path):
+    watcher = DropFolderWatcher(str(tmp_path), is_known=lambda h: False, settle_s=0.2, use_inotify=False)
+    first = _drop(tmp_path / "2024-05-05.mp3")
+    _drop(tmp_path / "notes.txt")
+    growing = _drop(tmp_path / "live.mp3", age_s=0)
+    watcher.scan()
+    # Seen for the first time: not ready until it stays unchanged for settle_s
+    assert watcher._collect() == []
+
+    time.sleep(0.25)
+    with open(growing, "ab") as f:
+        f.write(b" still recording")
+    jobs = watcher.poll(0)
+    assert [job["path"] for job in jobs] == [first]
+    assert jobs[0]["defaults"] == {}
+
+    # The same audio copied in again under another name is skipped
+    _drop(tmp_path / "copy" / "Sunday service.mp3")
+    time.sleep(0.25)
+    assert [job["path"] for job in watcher.poll(0)] == [growing]
+    watcher.close()
+
+
+def test_archived_audio_is_not_processed_again(tmp_path):
+    known = set()
+    watcher = DropFolderWatcher(str(tmp_path), is_known=lambda h: h in known, settle_s=0, use_inotify=False)
+    _drop(tmp_path / "a.mp3", b"first")
+    jobs = watcher.poll(0)
+    known.add(jobs[0]["audio_hash"])
+
+    restarted = DropFolderWatcher(str(tmp_path), is_known=lambda h: h in known, settle_s=0, use_inotify=False)
+    _drop(tmp_path / "b.mp3", b"second")
+    assert [os.path.basename(job["path"]) for job in restarted.poll(0)] == ["b.mp3"]
+
+
+def test_inotify_reports_new_subfolders(tmp_path):
+    watcher = DropFolderWatcher(str(tmp_path), settle_s=0)
+    if watcher.mode != "inotify":
+        pytest.skip("inotify is not available here")
+    watcher.scan()
+    path = _drop(tmp_path / "2024" / "may.m4a")
+    jobs = []
+    for _ in range(20):
+        jobs += watcher.poll(0.1)
+        if jobs:
+            break
+    assert [job["path"] for job in jobs] == [path]
+    watcher.close()
+
+
+def test_daemon_survives_a_failed_recording(tmp_path):
+    from unittest.mock import MagicMock, patch
+    from src import main
+
+    watcher = MagicMock()
+    watcher.jobs.return_value = iter([{"path": str(tmp_path / "moved.mp3"), "defaults": {}},
+                                      {"path": str(tmp_path / "next.mp3"), "defaults": {}}])
+    args = main.build_parser().parse_args(["--watch-folder", str(tmp_path), "--archive", str(tmp_path / "archive.db"),
+                                           "--trace-file", str(tmp_path / "trace.jsonl")])
+    calls = []
+
+    def process_audio(job_args, tracer, path, source, archive=None):
+        calls.append((path, archive))
+        if path.endswith("moved.mp3"):
+            raise FileNotFoundError(path)
+
+    with patch.object(main, "DropFolderWatcher", return_value=watcher), \
+            patch.object(main, "process_audio", side_effect=process_audio):
+        main.run_drop_folder(args, main.configure_tracer())
+
+    assert [path for path, _ in calls] == [str(tmp_path / "moved.mp3"), str(tmp_path / "next.mp3")]
+    # Every job shares the daemon's archive connection, closed when the daemon stops
+    archive = calls[0][1]
+    assert archive is calls[1][1] and archive is not None
+    with pytest.raises(Exception):
+        archive.conn.execute("SELECT 1")
+    watcher.close.assert_called_once()
+
+
+def test_failed_run_closes_its_archive(tmp_path):
+    from unittest.mock import patch
+    from src import main
+    from src.storage.archive import ArchiveStore
+
+    args = main.build_parser().parse_args(["--file", "x.mp3", "--archive", str(tmp_path / "archive.db")])
+    opened = []
+
+    def fail(args, tracer, archive, *rest):
+        opened.append(archive)
+        raise SystemExit(1)
+
+    with patch.object(main, "_process_audio", side_effect=fail), pytest.raises(SystemExit):
+        main.process_audio(args, main.configure_tracer(), "x.mp3", "x.mp3")
+
+    assert isinstance(opened[0], ArchiveStore)
+    with pytest.raises(Exception):
+        opened[0].conn.execute("SELECT 1")
@@ -0,0 +1,94 @@
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.ingestion import fingerprint as fp
+from src.storage.archive import ArchiveStore
+
+RATE = fp.SAMPLE_RATE
+
+
+def _sermon(seconds, seed):
+    """Stand-in for speech: a new mix of tones every quarter second"""
+    rng = np.random.default_rng(seed)
+    segment = RATE // 4
+    t = np.arange(segment) / RATE
+    chunks = []
+    for _ in range(seconds * 4):
+        freqs, amps = rng.uniform(200, 1800, 4), rng.uniform(0.2, 1.0, 4)
+        chunks.append((amps[:, None] * np.sin(2 * np.pi * freqs[:, None] * t)).sum(axis=0) * 3000)
+    return np.concatenate(chunks).astype(np.float32)
+
+
+def _write_wav(path, samples, rate=RATE, channels=1):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(np.clip(samples, -32768, 32767).astype("<i2").tobytes())
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def livestream():
+    return _sermon(180, seed=1)
+
+
+def test_edited_copy_matches_and_other_sermons_do_not(livestream):
+    rng = np.random.default_rng(2)
+    # The upload starts mid-frame, drops two passages, is quieter and picked up some noise
+    edited = np.concatenate([livestream[333:20 * RATE], livestream[60 * RATE:120 * RATE], livestream[140 * RATE:]])
+    edited = edited * 0.5 + rng.normal(0, 200, len(edited)).astype(np.float32)
+
+    full, cut, other = fp.fingerprint(livestream), fp.fingerprint(edited), fp.fingerprint(_sermon(150, seed=7))
+    # 4 bytes per 128 ms frame
+    assert len(fp.to_bytes(full)) == 4 * len(full) and len(full) == pytest.approx(180 / fp.FRAME_S, abs=5)
+    assert fp.coverage(cut, full) >= fp.MIN_COVERAGE
+    assert fp.coverage(other, full) < 0.1
+
+    candidates = [(1, fp.to_bytes(other)), (2, fp.to_bytes(full))]
+    assert fp.best_match(cut, candidates, min_match_s=60)[0] == 2
+    # The livestream contains the upload just as well
+    assert fp.best_match(full, [(3, fp.to_bytes(cut))], min_match_s=60)[0] == 3
+    # A clip shorter than a sermon is never taken for one
+    assert fp.best_match(cut, candidates) is None
+
+
+def test_archived_fingerprints_are_found_from_files(tmp_path, monkeypatch, livestream):
+    # The desk copy is a 16 kHz stereo WAV of the same audio
+    stereo = np.repeat(np.interp(np.arange(0, len(livestream), 0.5), np.arange(len(livestream)), livestream), 2)
+    desk = _write_wav(tmp_path / "desk.wav", stereo.astype(np.float32), rate=2 * RATE, channels=2)
+    stream = _write_wav(tmp_path / "stream.wav", livestream)
+
+    with ArchiveStore(str(tmp_path / "archive.db")) as archive:
+        sermon_id = archive.ingest("Transcript", {}, source=stream, audio_hash="a")
+        archive.add_fingerprint(sermon_id, fp.to_bytes(fp.fingerprint_file(stream)))
+
+        match = fp.best_match(fp.fingerprint_file(desk), archive.fingerprints(), min_match_s=60)
+        assert match[0] == sermon_id and match[1] >= fp.MIN_COVERAGE
+        assert archive.get_sermon(sermon_id)["source"] == stream
+
+        # The file downloaded after a failed stream is looked up the same way (this one is three minutes long)
+        from src import main
+        monkeypatch.setattr(main, "MIN_MATCH_S", 60)
+        monkeypatch.setattr(main, "best_match", lambda prints, candidates: fp.best_match(prints, candidates, 60))
+        archived, prints, guides = main.find_archived(main.configure_tracer(), archive, desk, "b", None)
+        assert archived["id"] == sermon_id and len(prints) and guides == {}
+
+
+def test_wav_is_low_passed_before_downsampling(tmp_path, monkeypatch):
+    monkeypatch.setattr(fp.shutil, "which", lambda name: None)
+    source_rate, seconds = 48000, 25
+    t = np.arange(source_rate * seconds) / source_rate
+    # 5 kHz is above the new Nyquist frequency; without a low-pass it folds down to 3 kHz
+    path = _write_wav(tmp_path / "desk.wav", 8000 * np.sin(2 * np.pi * 1000 * t) + 8000 * np.sin(2 * np.pi * 5000 * t),
+                      rate=source_rate)
+
+    samples = fp.decode_audio(path)
+    assert len(samples) == seconds * RATE
+    # Across the decoder's block boundaries the 1 kHz tone comes through in place and the 5 kHz one is gone
+    expected = 8000 * np.sin(2 * np.pi * 1000 * np.arange(len(samples)) / RATE)
+    residue = (samples - expected)[RATE:-RATE]
+    assert np.sqrt(np.mean(residue ** 2)) < 80
@@ -0,0 +1,107 @@
+import json
+import logging
+import logging.handlers
+import threading
+import pytest
+from src.utils.logger import setup_logger, configure_logging, shutdown_logging
+
+
+@pytest.fixture
+def fresh_logging(tmp_path, monkeypatch):
+    """Reconfigures the shared pipeline into a temp log dir and restores it afterwards"""
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    configure_logging(force=True)
+    yield tmp_path
+    # Back to the session's log directory and settings before reconfiguring
+    monkeypatch.undo()
+    configure_logging(force=True)
+
+
+class TestLogger:
+
+    def test_single_queue_handler_for_all_modules(self, fresh_logging):
+        setup_logger("main")
+        setup_logger("content_generator")
+        setup_logger("bible_fetcher")
+
+        root_queue_handlers = [h for h in logging.getLogger().handlers if isinstance(h, logging.handlers.QueueHandler)]
+        assert len(root_queue_handlers) == 1
+        # Module loggers no longer own file handlers
+        assert not logging.getLogger("main").handlers
+
+    def test_records_reach_shared_file(self, fresh_logging):
+        setup_logger("main").info("from main")
+        setup_logger("bible_fetcher").warning("from fetcher")
+        shutdown_logging()
+
+        content = (fresh_logging / "app.log").read_text()
+        assert "main - INFO - from main" in content
+        assert "bible_fetcher - WARNING - from fetcher" in content
+
+    def test_json_format(self, fresh_logging, monkeypatch):
+        monkeypatch.setenv("LOG_FORMAT", "json")
+        configure_logging(force=True)
+        setup_logger("content_generator").info("generated")
+        shutdown_logging()
+
+        lines = (fresh_logging / "app.log").read_text().splitlines()
+        entry = json.loads(lines[-1])
+        assert entry["logger"] == "content_generator"
+        assert entry["message"] == "generated"
+        assert entry["level"] == "INFO"
+
+    def test_level_from_environment(self, fresh_logging, monkeypatch):
+        monkeypatch.setenv("LOG_LEVEL", "WARNING")
+        log = setup_logger("level_probe")
+        assert log.level == logging.WARNING
+
+    def test_logging_from_many_threads(self, fresh_logging):
+        log = setup_logger("worker")
+
+        def work(n):
+            for i in range(50):
+                log.info(f"worker {n} record {i}")
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        shutdown_logging()
+
+        lines = (fresh_logging / "app.log").read_text().splitlines()
+        assert sum("worker" in line for line in lines) == 400
+
+    def test_rotation_settings(self, fresh_logging, monkeypatch):
+        monkeypatch.setenv("LOG_MAX_BYTES", "1024")
+        monkeypatch.setenv("LOG_BACKUP_COUNT", "2")
+        listener = configure_logging(force=True)
+        file_handler = next(h for h in listener.handlers if isinstance(h, logging.handlers.RotatingFileHandler))
+        assert file_handler.maxBytes == 1024
+        assert file_handler.backupCount == 2
+
+    def test_spawned_workers_log_through_the_parent(self, fresh_logging, tmp_path, monkeypatch):
+        from src.design.render_pool import render_guides
+
+        monkeypatch.setenv("LOG_FORMAT", "json")
+        configure_logging(force=True)
+        guide = {"series_title": "Worker Log", "memory_verse_reference": "John 3:16",
+                 "days": [{"day": 1, "title": "T", "reflection": "R", "question": "Q", "prayer": "P"}]}
+        results = render_guides([guide], output_dir=str(tmp_path / "pdf"), max_workers=1)
+        shutdown_logging()
+
+        entries = [json.loads(line) for line in (fresh_logging / "app.log").read_text().splitlines()]
+        rendered = [e for e in entries if e["logger"] == "pdf_designer" and "PDF generated" in e["message"]]
+        assert [e["process"] for e in rendered] == [results[0]["pid"]]
+        # The worker never opened a log file of its own
+        assert sorted(p.name for p in fresh_logging.glob("app*.log")) == ["app.log"]
+
+    def test_child_processes_never_rotate_the_shared_file(self, fresh_logging, monkeypatch):
+        import os
+        from src.utils import logger
+
+        monkeypatch.setattr(logger, "_in_child", True)
+        listener = configure_logging(force=True)
+        file_handler = next(h for h in listener.handlers if isinstance(h, logging.FileHandler))
+        assert not isinstance(file_handler, logging.handlers.RotatingFileHandler)
+        assert file_handler.baseFilename == str(fresh_logging / f"app.{os.getpid()}.log")
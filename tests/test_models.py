@@ -0,0 +1,73 @@
+import pytest
+
+from src.generation import models
+from src.generation.models import Guide, read_guide, write_guide
+
+
+def _data(**overrides):
+    data = {
+        "series_title": "Renewed",
+        "memory_verse_reference": "Romans 12:2",
+        "days": [
+            {"day": 1, "title": "T", "scripture_reference": "Psalm 1:1", "reflection": "R", "questions": ["Q1", "Q2"],
+             "prayer": "P", "theme": "Rest"},
+        ],
+        "key_quotes": ["Renew your mind daily."],
+        "audience": "youth",
+    }
+    data.update(overrides)
+    return data
+
+
+def test_strict_validation_names_the_problem():
+    for data, message in (
+        ({k: v for k, v in _data().items() if k != "key_quotes"}, "Missing required key in JSON: key_quotes"),
+        ({k: v for k, v in _data().items() if k != "memory_verse_reference"}, "Missing memory_verse_reference"),
+        (_data(days="six"), "'days' must be a list"),
+        (_data(days=[{"title": "T"}]), "Day 1 missing 'question' field"),
+    ):
+        with pytest.raises(ValueError, match=message):
+            Guide.from_dict(data, strict=True)
+    # Content files being rendered only need what the PDF shows
+    assert Guide.from_dict({"series_title": "Draft"}).days == []
+
+
+def test_normalizes_once_and_keeps_unknown_keys():
+    guide = Guide.from_dict(_data(), strict=True)
+    day = guide.days[0]
+    assert day.question == "Q1"
+    assert day.scripture.reference == "Psalm 1:1" and day.scripture.text is None
+
+    data = guide.to_dict()
+    assert data["audience"] == "youth"
+    assert data["days"][0]["theme"] == "Rest"
+    assert data["days"][0]["question"] == "Q1"
+    assert "scripture" not in data["days"][0] and "memory_verse" not in data
+    assert Guide.from_dict(data) == guide
+
+
+def test_day_number_is_not_invented():
+    data = _data(days=[{"title": "T", "question": "Q"}])
+    assert "day" not in Guide.from_dict(data).to_dict()["days"][0]
+    assert Guide.from_dict(_data()).to_dict()["days"][0]["day"] == 1
+
+
+def test_copy_is_independent():
+    guide = Guide.from_dict(_data())
+    copy = guide.copy()
+    copy.days[0].scripture.text = "Psalm 1:1 (KJV): \"Blessed is the man\""
+    copy.memory_verse.text = "Romans 12:2 (KJV):\nBe not conformed"
+    assert guide.days[0].scripture.text is None and guide.memory_verse.text is None
+
+
+def test_json_is_the_same_with_and_without_orjson(tmp_path, monkeypatch):
+    guide = Guide.from_dict(_data(series_title="Renovación"))
+    path = tmp_path / "Renewed_content.json"
+    write_guide(str(path), guide)
+    written = path.read_bytes()
+    assert read_guide(str(path)) == guide
+
+    monkeypatch.setattr(models, "orjson", None)
+    assert guide.to_json(indent=True) == written
+    assert "Renovación".encode("utf-8") in written
+    assert Guide.from_json(written) == guide
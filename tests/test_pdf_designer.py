@@ -1,5 +1,8 @@
 import os
+from datetime import datetime, timezone
+from PIL import Image
 from src.design.pdf_designer import PDFDesigner
+from src.design.resource_cache import clear_caches, cache_stats, load_logo
 
 
 class TestPDFDesigner:
@@ -34,3 +37,102 @@ class TestPDFDesigner:
 
         assert os.path.exists(path)
         assert os.path.getsize(path) > 0
+
+
+class TestResourceCache:
+    def _content(self):
+        return {
+            "series_title": "Cache Series",
+            "memory_verse": "John 3:16 (KJV):\nFor God so loved the world.",
+            "days": [{"day": 1, "title": "T", "scripture": "S", "reflection": "R", "question": "Q", "prayer": "P"}],
+        }
+
+    def test_fonts_parsed_once_per_process(self):
+        clear_caches()
+        first = PDFDesigner()
+        second = PDFDesigner()
+        assert cache_stats()["fonts"] == 3
+        # Each designer has its own font objects (subsetting is per document)
+        assert first.fonts["montserrat"] is not second.fonts["montserrat"]
+        assert first.fonts["montserrat"].cmap is second.fonts["montserrat"].cmap
+
+    def test_cached_output_matches_uncached(self, tmp_path):
+        clear_caches()
+        fixed = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        outputs = []
+        for cache in (False, True, True):
+            designer = PDFDesigner(cache_resources=cache)
+            designer.set_creation_date(fixed)
+            path = tmp_path / f"guide_{len(outputs)}.pdf"
+            designer.create_pdf(self._content(), str(path))
+            outputs.append(path.read_bytes())
+        assert outputs[0] == outputs[1] == outputs[2]
+
+    def test_logo_decoded_once_and_downscaled(self, tmp_path):
+        clear_caches()
+        logo_path = tmp_path / "logo.png"
+        Image.new("RGB", (2000, 1000), (10, 20, 30)).save(logo_path)
+
+        first = load_logo(str(logo_path), 30)
+        assert load_logo(str(logo_path), 30) is first
+        assert first.width == 354  # 30mm at 300 DPI
+        assert first.height == 177
+
+        # A changed file (new mtime) is decoded again
+        Image.new("RGB", (200, 100), (10, 20, 30)).save(logo_path)
+        stat = os.stat(logo_path)
+        os.utime(logo_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        refreshed = load_logo(str(logo_path), 30)
+        assert refreshed is not first
+        assert refreshed.width == 200
+
+    def test_create_pdf_with_cached_logo(self, tmp_path):
+        logo_path = tmp_path / "logo.png"
+        Image.new("RGB", (800, 800), (200, 30, 60)).save(logo_path)
+        output_file = tmp_path / "logo_guide.pdf"
+        PDFDesigner().create_pdf(self._content(), str(output_file), str(logo_path))
+        assert output_file.stat().st_size > 0
+
+
+class TestCompactOutput:
+    def _content(self, title="Compact Series"):
+        return {
+            "series_title": title,
+            "memory_verse": "John 3:16 (KJV):\nFor God so loved the world.",
+            "days": [
+                {"day": i, "title": f"Day {i}", "scripture": "S", "reflection": "Reflection " * 40, "question": "Q", "prayer": "P"}
+                for i in range(1, 7)
+            ],
+        }
+
+    def _noisy_logo(self, tmp_path):
+        logo_path = tmp_path / "logo.png"
+        Image.effect_noise((1500, 1500), 60).convert("RGB").save(logo_path)
+        return str(logo_path)
+
+    def test_compact_mode_shrinks_output_and_reports_size(self, tmp_path):
+        logo = self._noisy_logo(tmp_path)
+        regular = PDFDesigner()
+        regular.create_pdf(self._content(), str(tmp_path / "regular.pdf"), logo)
+        compact = PDFDesigner(compact=True)
+        compact.create_pdf(self._content(), str(tmp_path / "compact.pdf"), logo)
+
+        assert compact.output_size == os.path.getsize(tmp_path / "compact.pdf")
+        assert compact.output_size < regular.output_size
+
+    def test_booklet_shares_resources_across_weeks(self, tmp_path):
+        logo = self._noisy_logo(tmp_path)
+        weeks = [self._content(f"Week {i}") for i in range(1, 5)]
+
+        single_sizes = []
+        for i, week in enumerate(weeks):
+            designer = PDFDesigner(compact=True)
+            designer.create_pdf(week, str(tmp_path / f"week_{i}.pdf"), logo)
+            single_sizes.append(designer.output_size)
+
+        booklet = PDFDesigner(compact=True)
+        booklet.create_booklet(weeks, str(tmp_path / "booklet.pdf"), logo)
+
+        assert booklet.page_no() == 4 * 7
+        assert booklet._cover_pages == {1, 8, 15, 22}
+        assert booklet.output_size < sum(single_sizes) * 0.75
@@ -0,0 +1,157 @@
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+import pytest
+from google.genai import errors
+
+from src.generation.content_generator import ContentGenerator
+from src.generation.prompts import DEVOTIONAL_SYSTEM_PROMPT
+from src.providers.prompt_cache import GeminiPromptCache
+from src.utils.tracing import configure_tracer
+
+
+def _gemini_client(cached_tokens=1000):
+    client = MagicMock()
+    client.caches.create.return_value = SimpleNamespace(name="cachedContents/abc")
+    usage = SimpleNamespace(prompt_token_count=1200, candidates_token_count=300, cached_content_token_count=cached_tokens)
+    client.models.generate_content.return_value = SimpleNamespace(text="{}", usage_metadata=usage)
+    return client
+
+
+def _generator(client, provider, monkeypatch):
+    monkeypatch.setenv("LLM_MODEL", "test-model")
+    with patch("src.generation.content_generator.get_llm_client", return_value=(client, provider)):
+        return ContentGenerator(bible_fetcher=MagicMock())
+
+
+def _llm_spans(tracer):
+    return [s.attributes for s in tracer.finished_spans() if s.name == "llm.call"]
+
+
+def test_gemini_system_prompt_is_cached_once_and_reused(monkeypatch):
+    tracer = configure_tracer()
+    client = _gemini_client()
+    generator = _generator(client, "gemini", monkeypatch)
+    generator._call_llm("sermon one")
+    generator._call_llm("sermon two")
+
+    client.caches.create.assert_called_once()
+    assert client.caches.create.call_args.kwargs["config"].system_instruction == DEVOTIONAL_SYSTEM_PROMPT
+    for call, prompt in zip(client.models.generate_content.call_args_list, ["sermon one", "sermon two"]):
+        # Only the user prompt is sent; the system prompt comes from the cache
+        assert call.kwargs["contents"] == prompt
+        assert call.kwargs["config"].cached_content == "cachedContents/abc"
+    attrs = _llm_spans(tracer)[-1]
+    assert (attrs["cached_input_tokens"], attrs["uncached_input_tokens"]) == (1000, 200)
+    assert attrs["latency_s"] >= 0
+    assert 'kind="cached_input"' in tracer.render_prometheus()
+
+
+def test_gemini_without_cache_support_sends_system_instruction(monkeypatch):
+    tracer = configure_tracer()
+    client = _gemini_client(cached_tokens=None)
+    client.caches.create.side_effect = errors.ClientError(400, {"error": {"message": "content is too small to cache"}})
+    generator = _generator(client, "gemini", monkeypatch)
+    generator._call_llm("sermon one")
+    generator._call_llm("sermon two")
+
+    # The refusal is remembered instead of retried on every call
+    client.caches.create.assert_called_once()
+    config = client.models.generate_content.call_args.kwargs["config"]
+    assert config.system_instruction == DEVOTIONAL_SYSTEM_PROMPT and config.cached_content is None
+    attrs = _llm_spans(tracer)[-1]
+    assert (attrs["cached_input_tokens"], attrs["uncached_input_tokens"]) == (0, 1200)
+
+
+@pytest.mark.parametrize("failure", [
+    errors.ClientError(429, {"error": {"message": "resource exhausted"}}),
+    errors.ServerError(503, {"error": {"message": "unavailable"}}),
+    ConnectionError("connection reset"),
+])
+def test_gemini_transient_cache_failure_is_retried(monkeypatch, failure):
+    client = _gemini_client()
+    client.caches.create.side_effect = [failure, client.caches.create.return_value]
+    generator = _generator(client, "gemini", monkeypatch)
+    generator._call_llm("sermon one")
+    assert client.models.generate_content.call_args.kwargs["config"].system_instruction == DEVOTIONAL_SYSTEM_PROMPT
+
+    generator._call_llm("sermon two")
+    assert client.caches.create.call_count == 2
+    assert client.models.generate_content.call_args.kwargs["config"].cached_content == "cachedContents/abc"
+
+
+def test_gemini_expired_cache_falls_back_and_is_recreated(monkeypatch):
+    client = _gemini_client()
+    ok = client.models.generate_content.return_value
+    client.models.generate_content.side_effect = [errors.ClientError(404, {"error": {"message": "not found"}}), ok, ok]
+    generator = _generator(client, "gemini", monkeypatch)
+    generator._call_llm("sermon one")
+    assert client.models.generate_content.call_args.kwargs["config"].system_instruction == DEVOTIONAL_SYSTEM_PROMPT
+
+    generator._call_llm("sermon two")
+    assert client.caches.create.call_count == 2
+    assert client.models.generate_content.call_args.kwargs["config"].cached_content == "cachedContents/abc"
+
+
+def test_slow_cache_creation_only_holds_up_its_own_prompt():
+    import threading
+
+    release = threading.Event()
+    slow = _gemini_client()
+    slow.caches.create.side_effect = lambda **kwargs: release.wait(5) and SimpleNamespace(name="cachedContents/slow")
+    cache = GeminiPromptCache()
+    names = []
+    waiting = [threading.Thread(target=lambda: names.append(cache.get(slow, "m", "prompt"))) for _ in range(2)]
+    for thread in waiting:
+        thread.start()
+
+    # Another client's cache is created while the slow request is still out
+    assert cache.get(_gemini_client(), "m", "prompt") == "cachedContents/abc"
+    assert not release.is_set() and names == []
+
+    release.set()
+    for thread in waiting:
+        thread.join()
+    # The request waiting for the same key reuses the cache instead of creating another
+    assert names == ["cachedContents/slow", "cachedContents/slow"]
+    slow.caches.create.assert_called_once()
+
+
+def test_caching_can_be_turned_off(monkeypatch):
+    monkeypatch.setenv("LLM_PROMPT_CACHE", "0")
+    client = _gemini_client()
+    _generator(client, "gemini", monkeypatch)._call_llm("sermon")
+    client.caches.create.assert_not_called()
+
+
+def test_cache_is_replaced_before_it_expires():
+    client = _gemini_client()
+    cache = GeminiPromptCache(ttl_s=120)
+    with patch("src.providers.prompt_cache.time.monotonic", return_value=1000.0):
+        assert cache.get(client, "m", "system") == "cachedContents/abc"
+    with patch("src.providers.prompt_cache.time.monotonic", return_value=1030.0):
+        cache.get(client, "m", "system")
+    assert client.caches.create.call_count == 1
+    # Within the expiry margin a new cache is created rather than handing out one about to vanish
+    with patch("src.providers.prompt_cache.time.monotonic", return_value=1070.0):
+        cache.get(client, "m", "system")
+    assert client.caches.create.call_count == 2
+
+
+def test_openai_prefix_cache_hits_are_recorded(monkeypatch):
+    tracer = configure_tracer()
+    client = MagicMock()
+    usage = SimpleNamespace(prompt_tokens=1500, completion_tokens=300,
+                            prompt_tokens_details=SimpleNamespace(cached_tokens=1280))
+    message = SimpleNamespace(content="{}")
+    client.chat.completions.create.return_value = SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+    _generator(client, "groq", monkeypatch)._call_llm("sermon")
+
+    messages = client.chat.completions.create.call_args.kwargs["messages"]
+    # The fixed system prompt leads, so it is the shared prefix of every request
+    assert messages[0] == {"role": "system", "content": DEVOTIONAL_SYSTEM_PROMPT}
+    attrs = _llm_spans(tracer)[-1]
+    assert (attrs["cached_input_tokens"], attrs["uncached_input_tokens"]) == (1280, 220)
+    # Replayed responses keep the cached count
+    encoded = ContentGenerator._encode_openai(client.chat.completions.create.return_value)
+    assert ContentGenerator._openai_cached_tokens(ContentGenerator._decode_openai(encoded).usage) == 1280
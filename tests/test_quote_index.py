@@ -0,0 +1,60 @@
+from src.generation.models import Guide
+from src.generation.quote_index import QuoteIndex, recheck_scripture_quotes, verify_quotes
+
+TRANSCRIPT = (
+    "Good morning church. Today we continue in Romans. The mind is the muscle that unleashes "
+    "our potential, and who we are today is a result of the thoughts we have been thinking. "
+    "So let us renew our minds every single day, because God is faithful to finish what He started."
+)
+
+
+class TestQuoteIndex:
+
+    def test_exact_quote_matches_with_span(self):
+        index = QuoteIndex(TRANSCRIPT)
+        result = index.match("The mind is the muscle that unleashes our potential")
+        assert result["score"] == 1.0
+        assert TRANSCRIPT[result["start"]:result["end"]] == "The mind is the muscle that unleashes our potential"
+
+    def test_fuzzy_quote_ignores_case_punctuation_and_small_edits(self):
+        index = QuoteIndex(TRANSCRIPT)
+        result = index.match("who we are today is the result of the thoughts we've been thinking!")
+        assert result["score"] >= 0.8
+        assert result["text"].startswith("who we are today")
+
+    def test_unrelated_quote_scores_zero(self):
+        result = QuoteIndex(TRANSCRIPT).match("Strong minds unleash potential when nobody is watching")
+        assert result["score"] < 0.8
+
+    def test_verify_quotes_flags_invented(self):
+        content = {
+            "key_quotes": ["renew our minds every single day", "Faith moves mountains before breakfast"],
+            "days": [{"reflection": 'As we heard, "God is faithful to finish what He started." Amen.'}],
+        }
+        results = verify_quotes(content, TRANSCRIPT)
+
+        assert [r["field"] for r in results] == ["key_quotes[0]", "key_quotes[1]", "days[0].reflection"]
+        assert [r["invented"] for r in results] == [False, True, False]
+        assert results[1]["start"] is None
+
+    def test_quoted_scripture_is_not_invented(self):
+        content = {
+            "days": [{"scripture_reference": "Romans 12:2",
+                      "reflection": 'Paul writes, "be ye transformed by the renewing of your mind." '
+                                    'And "nobody in the church ever said these words here".'}],
+        }
+        # Checked before the scripture is fetched, as the generator does
+        guide = Guide.from_dict(content)
+        guide.quote_verification = verify_quotes(guide, TRANSCRIPT)
+        assert [r["invented"] for r in guide.quote_verification] == [True, True]
+        shared = guide.quote_verification
+
+        guide.days[0].scripture.text = ('Romans 12:2 (KJV): "And be not conformed to this world: but be ye '
+                                        'transformed by the renewing of your mind"')
+        assert [r["quote"] for r in recheck_scripture_quotes(guide)] == ["be ye transformed by the renewing of your mind."]
+        assert [r["invented"] for r in guide.quote_verification] == [False, True]
+        assert guide.quote_verification[0]["scripture"] == "Romans 12:2"
+        # Copies made before the recheck keep their own entries
+        assert shared[0]["invented"] is True
+        # With the text already there, the first check knows it too
+        assert [r["invented"] for r in verify_quotes(guide, TRANSCRIPT)] == [False, True]
@@ -0,0 +1,139 @@
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from src.utils import rate_limit
+from src.utils.rate_limit import DEFAULT_LIMITS, Governor, Limits, TokenBucket, limits_from_env, retry_after
+
+
+def _response(status, headers=None):
+    return SimpleNamespace(status_code=status, headers=headers or {})
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after_s):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = SimpleNamespace(headers={"retry-after": str(retry_after_s)})
+
+
+class TestRateLimit:
+
+    def test_token_bucket_refills_at_rate(self):
+        bucket = TokenBucket(per_minute=60)  # 1/s, holds 15
+        now = bucket.updated
+        assert bucket.wait_time(1, now) == 0.0
+        bucket.take(15)
+        assert bucket.wait_time(1, now) == pytest.approx(1.0)
+        assert bucket.wait_time(1, now + 1.0) == 0.0
+        # Larger than capacity: wait for a full bucket, not forever
+        assert bucket.wait_time(1000, now + 1.0) == pytest.approx(14.0)
+        # Halved rate after a 429
+        assert bucket.wait_time(2, now + 1.0, scale=0.5) == pytest.approx(2.0)
+
+    def test_concurrency_cap(self):
+        governor = Governor({"svc": Limits(concurrency=2)})
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def work():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        threads = [threading.Thread(target=governor.call, args=("svc", work)) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert peak[0] == 2
+
+    def test_retries_after_429_and_slows_down(self):
+        governor = Governor({"svc": Limits(rpm=600)})
+        responses = iter([_response(429, {"Retry-After": "0.05"}), _response(200)])
+
+        started = time.monotonic()
+        result = governor.call("svc", lambda: next(responses))
+
+        assert result.status_code == 200
+        assert time.monotonic() - started >= 0.05
+        assert governor.stats()["svc"]["throttled"] == 1
+        assert governor.stats()["svc"]["rate_scale"] == pytest.approx(0.55)  # halved, then one success
+
+    def test_gives_up_after_max_retries(self):
+        governor = Governor({"svc": Limits(concurrency=1)})
+        calls = []
+
+        def fail():
+            calls.append(1)
+            raise RateLimited(0.01)
+
+        with pytest.raises(RateLimited):
+            governor.call("svc", fail)
+        assert len(calls) == rate_limit.MAX_RETRIES + 1
+
+    def test_other_errors_are_not_retried(self):
+        governor = Governor({"svc": Limits(concurrency=1)})
+        with pytest.raises(ValueError):
+            governor.call("svc", lambda: (_ for _ in ()).throw(ValueError("boom")))
+        assert governor.stats()["svc"]["in_flight"] == 0
+
+    def test_fair_queueing_across_jobs(self, monkeypatch):
+        monkeypatch.setattr(rate_limit, "_job_key", lambda: threading.current_thread().name[0])
+        governor = Governor({"svc": Limits(concurrency=1)})
+        order = []
+        governor.acquire("svc")  # hold the only slot
+
+        def worker():
+            governor.acquire("svc")
+            order.append(threading.current_thread().name)
+            governor.release("svc")
+
+        threads = []
+        for name in ("A1", "A2", "A3", "B1"):
+            t = threading.Thread(target=worker, name=name)
+            t.start()
+            threads.append(t)
+            while governor.stats()["svc"]["waiting"] < len(threads):
+                time.sleep(0.001)
+
+        governor.release("svc")
+        for t in threads:
+            t.join()
+        # Job B's single call is not stuck behind job A's backlog
+        assert order == ["A1", "B1", "A2", "A3"]
+
+    def test_settle_charges_actual_tokens(self):
+        governor = Governor({"llm": Limits(tpm=60_000)})  # 15k burst
+        governor.call("llm", lambda: "ok", tokens=1000, actual_tokens=lambda r: 11_000)
+        bucket = governor._state("llm").tokens
+        assert bucket.level == pytest.approx(4000, abs=50)
+
+    def test_retry_after_detection(self):
+        assert retry_after(_response(200)) is None
+        assert retry_after(_response(429, {"retry-after": "7"})) == 7.0
+        assert retry_after(_response(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+        assert retry_after(RateLimited(3)) == 3.0
+        assert retry_after(SimpleNamespace(code=429)) == 0.0
+
+    def test_limits_from_env(self, monkeypatch):
+        monkeypatch.setenv("RATE_LIMIT_GROQ", "rpm=10, tpm=5000, concurrency=2")
+        limits = limits_from_env("groq")
+        assert (limits.rpm, limits.tpm, limits.concurrency) == (10.0, 5000.0, 2)
+        monkeypatch.setenv("RATE_LIMIT_GROQ", "off")
+        assert limits_from_env("groq") is None
+        monkeypatch.setenv("RATE_LIMIT_GROQ", "burst=9")
+        assert limits_from_env("groq") is DEFAULT_LIMITS["groq"]
+        assert limits_from_env("unknown_service") is None
+
+
+def test_bandwidth_cap_charges_are_shared(monkeypatch):
+    # Time stands still: two downloads charging back to back share one budget
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: 0.0, sleep=lambda s: None))
+    cap = rate_limit.BandwidthCap(1000)
+    # 1000 bytes of burst, then 1000 B/s: the second charge waits behind the first
+    assert cap.consume(1500) == pytest.approx(0.5)
+    assert cap.consume(1500) == pytest.approx(2.0)
+    assert cap.consume(0) == 0.0
@@ -0,0 +1,45 @@
+import os
+from src.design.render_pool import guide_filename, render_guides
+
+
+def _content(title, reflection="Reflection text."):
+    return {
+        "series_title": title,
+        "memory_verse": "John 3:16 (KJV):\nFor God so loved the world.",
+        "days": [{"day": 1, "title": "T", "scripture": "S", "reflection": reflection, "question": "Q", "prayer": "P"}],
+    }
+
+
+class TestRenderPool:
+
+    def test_guide_filename_is_deterministic_and_unique(self):
+        a = _content("The Book of Romans")
+        b = _content("The Book of Romans", reflection="Different week.")
+        assert guide_filename(a) == guide_filename(dict(a))
+        assert guide_filename(a) != guide_filename(b)
+        assert guide_filename(a).startswith("The_Book_of_Romans_")
+        assert guide_filename(a).endswith(".pdf")
+
+    def test_render_guides_in_parallel(self, tmp_path):
+        contents = [_content("Week", reflection=f"Reflection {i}") for i in range(3)]
+        contents.append(contents[0])  # duplicate renders once, same path
+
+        results = render_guides(contents, output_dir=str(tmp_path), max_workers=2)
+
+        assert len(results) == 4
+        assert all(r["error"] is None for r in results)
+        assert len({r["output_path"] for r in results}) == 3
+        assert results[3]["output_path"] == results[0]["output_path"]
+        for r in results:
+            assert os.path.getsize(r["output_path"]) > 0
+            assert r["seconds"] > 0
+
+    def test_default_output_is_a_new_run_directory(self, tmp_path, monkeypatch):
+        from src.design import render_pool
+
+        monkeypatch.setattr(render_pool, "DEFAULT_OUTPUT_ROOT", str(tmp_path / "output"))
+        result = render_guides([_content("Week")], max_workers=1)[0]
+
+        assert result["error"] is None
+        run_dir = os.path.dirname(result["output_path"])
+        assert os.path.dirname(run_dir) == str(tmp_path / "output" / "runs")
@@ -0,0 +1,81 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from src.providers.router import Route, Router
+
+
+def _router(**kwargs):
+    return Router([
+        Route("groq", "llama-3.3-70b-versatile", context_window=128_000, cost_per_mtok=0.59, max_tokens=8_000,
+              expected_latency_s=5),
+        Route("gemini", "gemini-2.5-flash", context_window=1_000_000, cost_per_mtok=0.30, expected_latency_s=20),
+        Route("gemini", "gemini-2.5-pro", context_window=1_000_000, cost_per_mtok=1.25, min_tokens=20_000,
+              expected_latency_s=40),
+    ], **kwargs)
+
+
+class TestRouter:
+
+    def test_short_transcripts_go_to_the_fast_route(self):
+        decision = _router().choose(3_000)
+        assert decision.route.key == ("groq", "llama-3.3-70b-versatile")
+
+    def test_size_limits_and_context_window(self):
+        router = _router()
+        assert [r.model for r in router.choose(12_000).ranked] == ["gemini-2.5-flash"]
+        assert {r.model for r in router.choose(30_000).ranked} == {"gemini-2.5-flash", "gemini-2.5-pro"}
+        # Nothing fits: the largest context window is used
+        small = Router([Route("groq", "small", context_window=8_000)])
+        assert small.choose(50_000).route.model == "small"
+
+    def test_weights_trade_latency_against_cost(self):
+        router = _router(latency_weight=0.1, cost_weight=5.0)
+        assert router.choose(3_000).route.provider == "gemini"
+
+    def test_observed_latency_and_errors_change_the_choice(self):
+        router = _router()
+        for _ in range(5):
+            router.record("groq", "llama-3.3-70b-versatile", 60.0, True)
+        assert router.choose(3_000).route.model == "gemini-2.5-flash"
+
+        router = _router()
+        for ok in (False, False, True):
+            router.record("groq", "llama-3.3-70b-versatile", 1.0, ok)
+        decision = router.choose(3_000)
+        assert decision.route.model == "gemini-2.5-flash"
+        assert decision.ranked[-1].provider == "groq"  # unhealthy routes stay as a last resort
+
+    def test_load_trace_seeds_statistics(self, tmp_path):
+        trace = tmp_path / "trace.jsonl"
+        with open(trace, "w") as f:
+            for duration in (50.0, 55.0, 60.0):
+                f.write(json.dumps({"name": "llm.call", "duration_s": duration, "status": "ok",
+                                    "attributes": {"provider": "groq", "model": "llama-3.3-70b-versatile"}}) + "\n")
+            f.write(json.dumps({"name": "pdf_render", "duration_s": 1.0, "status": "ok", "attributes": {}}) + "\n")
+
+        router = _router()
+        assert router.load_trace(str(trace)) == 3
+        assert router.stats(router.routes[0]) == (55.0, 0.0, 3)
+
+    def test_from_config(self, tmp_path):
+        policy = tmp_path / "routes.json"
+        policy.write_text(json.dumps({"cost_weight": 2, "routes": [{"provider": "openai", "model": "gpt-4o", "cost_per_mtok": 2.5}]}))
+        router = Router.from_config(str(policy))
+        assert router.cost_weight == 2
+        assert router.routes[0].key == ("openai", "gpt-4o")
+
+    @patch('src.generation.content_generator.BibleFetcher')
+    @patch('src.generation.content_generator.get_llm_client')
+    def test_generator_falls_back_to_next_route(self, mock_get_client, mock_bible_fetcher):
+        from src.generation.content_generator import ContentGenerator
+
+        failing, working = MagicMock(), MagicMock()
+        failing.chat.completions.create.side_effect = RuntimeError("upstream down")
+        working.models.generate_content.return_value = MagicMock(text='{"ok": true}', usage_metadata=None)
+        mock_get_client.side_effect = lambda provider, api_key: ({"groq": failing, "gemini": working}[provider], provider)
+
+        router = _router()
+        generator = ContentGenerator(router=router)
+        assert generator._generate("short prompt") == '{"ok": true}'
+        assert generator.provider == "gemini" and generator.model == "gemini-2.5-flash"
+        assert router.stats(router.routes[0])[1] == 1.0
@@ -0,0 +1,40 @@
+from src.utils.scripture_refs import extract_references, normalize_reference
+
+
+class TestScriptureRefs:
+
+    def test_extracts_canonical_references_in_order(self):
+        text = (
+            "Turn with me to Romans 8:28. Later we read 1 John 1:9, then Rom. 8:28 again, "
+            "first Corinthians chapter 13 verses 4 to 7 and Psalm 23."
+        )
+        assert extract_references(text) == ["Romans 8:28", "1 John 1:9", "1 Corinthians 13:4-7", "Psalms 23"]
+
+    def test_ignores_lowercase_words_and_impossible_chapters(self):
+        text = "Make a mark 4 times, John 316 is not a verse, and neither is 3 Kings 2:1."
+        assert extract_references(text) == []
+
+    def test_everyday_words_need_a_verse_or_chapter(self):
+        text = ("We hold Mark 2 services on Sunday, I asked Job 3 times, Dan 4 years ago heard James 2 songs, "
+                "the Acts 2 team met Ruth 1 night, Song 5 was loud, Phil 2 days late, and John 3 rang twice.")
+        assert extract_references(text) == []
+        text = "Read Mark 2:17, Job chapter 3, Dan. 6:22, Song 2:4, James 1 verse 5 and John chapter 3."
+        assert extract_references(text) == ["Mark 2:17", "Job 3", "Daniel 6:22", "Song of Solomon 2:4",
+                                            "James 1:5", "John 3"]
+        # Unambiguous names still count on their own
+        assert extract_references("Psalm 23 and Romans 8") == ["Psalms 23", "Romans 8"]
+        # A reference field is a reference whatever the book
+        assert normalize_reference("Mark 2") == "Mark 2"
+
+    def test_limit(self):
+        text = "John 3:16, Romans 8:28, Isaiah 40:31"
+        assert extract_references(text, limit=2) == ["John 3:16", "Romans 8:28"]
+
+    def test_normalize_reference(self):
+        assert normalize_reference("Jn 3:16") == "John 3:16"
+        assert normalize_reference("Song of Songs 2:4") == "Song of Solomon 2:4"
+        assert normalize_reference("not a reference") is None
+        assert normalize_reference("John 3:16-17, 19") == "John 3:16-17"
+        assert normalize_reference("John 3:16-17, 19", exact=True) is None
+        assert normalize_reference("Genesis 1:1-2:3", exact=True) is None
+        assert normalize_reference(" Jn 3:16 ", exact=True) == "John 3:16"
@@ -0,0 +1,71 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.ingestion.stream import AudioStream, StreamError, stream_fields
+
+AUDIO = bytes(range(256)) * 4096  # 1 MiB
+
+
+@pytest.fixture
+def media_server():
+    """Serves AUDIO at /audio; /forbidden answers 403 like an IP-bound media URL"""
+    seen_headers = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            seen_headers.append(dict(self.headers))
+            if self.path != "/audio":
+                self.send_response(403)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(AUDIO)))
+            self.end_headers()
+            self.wfile.write(AUDIO)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", seen_headers
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_stream_is_read_in_chunks(media_server):
+    base, seen_headers = media_server
+    stream = AudioStream(f"{base}/audio", "Sermon.webm", headers={"User-Agent": "yt-dlp"}, filesize=len(AUDIO))
+    with stream.open() as body:
+        chunks = list(body)
+    assert b"".join(chunks) == AUDIO
+    assert len(chunks) > 1
+    assert stream.bytes_read == len(AUDIO)
+    assert seen_headers[0]["User-Agent"] == "yt-dlp"
+
+
+def test_read_serves_file_like_access(media_server):
+    base, _ = media_server
+    with AudioStream(f"{base}/audio", "Sermon.webm").open() as body:
+        head = body.read(10)
+        rest = b"".join(body)
+    assert head + rest == AUDIO
+
+
+def test_truncated_or_refused_stream_raises(media_server):
+    base, _ = media_server
+    with AudioStream(f"{base}/audio", "Sermon.webm", filesize=len(AUDIO) + 1).open() as body:
+        with pytest.raises(StreamError, match="ended after"):
+            list(body)
+    with pytest.raises(StreamError, match="403"):
+        AudioStream(f"{base}/forbidden", "Sermon.webm").open()
+
+
+def test_stream_fields_from_selected_format():
+    info = {"url": "https://media/a", "ext": "webm", "filesize": 10, "http_headers": {"User-Agent": "x"}}
+    assert stream_fields(info) == {"url": "https://media/a", "headers": {"User-Agent": "x"}, "filesize": 10, "ext": "webm"}
+    merged = {"requested_formats": [{"url": "https://media/b", "ext": "m4a"}], "ext": "mp4"}
+    assert stream_fields(merged)["url"] == "https://media/b"
+    assert stream_fields(merged)["ext"] == "m4a"
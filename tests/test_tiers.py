@@ -0,0 +1,76 @@
+import json
+import wave
+
+import assemblyai as aai
+
+from src.transcription.tiers import TIERS, TierPolicy, audio_duration
+
+
+def test_auto_without_deadline_keeps_best_model():
+    assert TierPolicy().choose(3600).speech_model == aai.SpeechModel.best
+
+
+def test_deadline_picks_best_tier_that_fits():
+    policy = TierPolicy()
+    # standard is predicted at 15 + 0.05 * 3600 = 195s, fast at 15 + 0.02 * 3600 = 87s
+    assert policy.choose(3600, deadline_s=300).name == "standard"
+    assert policy.choose(3600, deadline_s=120).name == "fast"
+    # Nothing fits: the fastest tier is the best bet
+    assert policy.choose(3600, deadline_s=10).name == "fast"
+
+
+def test_known_language_of_ordinary_length_gets_the_fast_tier():
+    policy = TierPolicy(fast_max_s=90 * 60)
+    assert policy.choose(duration_s=45 * 60, language="en").name == "fast"
+    # Longer services and unknown languages keep the best tier the default deadline allows
+    assert policy.choose(duration_s=3 * 3600, language="en").name == "standard"
+    assert policy.choose(duration_s=45 * 60).name == "standard"
+
+
+def test_default_deadline_applies_without_one():
+    # standard is predicted at 15 + 0.05 * 6h = 1095s, past the 15 min default; fast at 447s
+    assert TierPolicy().choose(6 * 3600).name == "fast"
+
+
+def test_observed_turnaround_overrides_defaults():
+    policy = TierPolicy()
+    for _ in range(3):
+        policy.record("standard", 3600, 15 + 0.01 * 3600)
+    assert policy.choose(3600, deadline_s=60).name == "standard"
+
+
+def test_premium_is_english_only_and_never_automatic():
+    policy = TierPolicy()
+    assert policy.choose(600, language="en").name == "fast"
+    assert policy.choose(3 * 3600, language="en").name == "standard"
+    assert policy.choose(600, language="en", requested="premium").name == "premium"
+    assert policy.choose(600, language="es", requested="premium").name == "standard"
+    assert not TIERS["premium"].supports(None)
+
+
+def test_load_trace_seeds_turnaround(tmp_path):
+    trace = tmp_path / "trace.jsonl"
+    spans = [
+        {"name": "transcription.poll", "status": "ok",
+         "attributes": {"tier": "fast", "turnaround_s": 25.0, "audio_duration_s": 1000}},
+        {"name": "transcription.poll", "status": "error", "attributes": {"tier": "fast", "turnaround_s": 999}},
+        {"name": "llm.call", "status": "ok", "attributes": {}},
+    ]
+    trace.write_text("\n".join(json.dumps(s) for s in spans) + "\n")
+    policy = TierPolicy()
+    assert policy.load_trace(str(trace)) == 1
+    assert policy.predict(TIERS["fast"], 1000) == 25.0
+
+
+def test_audio_duration(tmp_path):
+    path = tmp_path / "a.wav"
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(8000)
+        w.writeframes(b"\0\0" * 8000 * 3)
+    assert audio_duration(str(path)) == 3.0
+    mp3 = tmp_path / "a.mp3"
+    mp3.write_bytes(b"\0" * 16000)
+    assert audio_duration(str(mp3)) == 1.0  # 128 kbps estimate
+    assert audio_duration(str(tmp_path / "missing.mp3")) is None
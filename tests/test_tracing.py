@@ -0,0 +1,84 @@
+import json
+import urllib.request
+import pytest
+from src.utils.tracing import Tracer, serve_metrics, configure_tracer, span
+
+
+class TestTracer:
+
+    def test_child_spans_are_nested(self):
+        tracer = Tracer()
+        with tracer.span("pipeline") as root:
+            with tracer.span("scripture.fetch", reference="John 3:16") as child:
+                pass
+
+        spans = {s.name: s for s in tracer.finished_spans()}
+        assert spans["scripture.fetch"].parent_id == root.span_id
+        assert spans["pipeline"].parent_id is None
+        assert child.trace_id == root.trace_id
+        assert spans["scripture.fetch"].duration >= 0
+
+    def test_error_marks_span(self):
+        tracer = Tracer()
+        with pytest.raises(RuntimeError):
+            with tracer.span("llm.call"):
+                raise RuntimeError("boom")
+
+        [s] = tracer.finished_spans()
+        assert s.status == "error"
+        assert s.error == "boom"
+        assert 'study_guide_span_errors_total{span="llm.call"} 1' in tracer.render_prometheus()
+
+    def test_token_attributes_become_counters(self):
+        tracer = Tracer()
+        for _ in range(2):
+            with tracer.span("llm.call") as s:
+                s.set_attributes(input_tokens=100, output_tokens=20)
+
+        metrics = tracer.render_prometheus()
+        assert 'study_guide_span_duration_seconds_count{span="llm.call"} 2' in metrics
+        assert 'study_guide_tokens_total{span="llm.call",kind="input"} 200' in metrics
+        assert 'study_guide_tokens_total{span="llm.call",kind="output"} 40' in metrics
+
+    def test_profile_stage_attaches_snapshots(self):
+        tracer = Tracer(profile=True)
+        with tracer.stage("pdf_render"):
+            sum(i * i for i in range(1000))
+
+        [s] = tracer.finished_spans()
+        assert s.attributes["stage"] is True
+        assert s.attributes["profile_top"]
+        assert "memory_peak_bytes" in s.attributes
+
+    def test_export_jsonl(self, tmp_path):
+        tracer = Tracer()
+        with tracer.span("pipeline"):
+            with tracer.span("transcription.poll"):
+                pass
+
+        path = tmp_path / "trace.jsonl"
+        assert tracer.export_jsonl(str(path)) == 2
+        rows = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [r["name"] for r in rows] == ["transcription.poll", "pipeline"]
+        # Exported spans are cleared so repeated exports do not duplicate
+        assert tracer.export_jsonl(str(path)) == 0
+
+    def test_module_span_uses_configured_tracer(self):
+        tracer = configure_tracer()
+        with span("scripture.fetch"):
+            pass
+        assert [s.name for s in tracer.finished_spans()] == ["scripture.fetch"]
+
+    def test_metrics_endpoint(self):
+        tracer = configure_tracer()
+        with tracer.span("pdf.output"):
+            pass
+
+        server = serve_metrics(0)
+        try:
+            host, port = server.server_address[:2]
+            assert host == "127.0.0.1"
+            body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+        finally:
+            server.shutdown()
+        assert 'study_guide_span_duration_seconds_count{span="pdf.output"} 1' in body
@@ -98,3 +98,97 @@ class TestTranscriptionService:
         
         with pytest.raises(Exception, match="Transcription failed: API Error"):
             service.transcribe_audio(str(audio_file))
+
+    @patch('src.transcription.transcriber.aai.Transcriber')
+    @patch.dict(os.environ, {"ASSEMBLYAI_API_KEY": "fake_key"})
+    def test_configured_language_skips_detection(self, mock_transcriber_cls, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        mock_transcript = MagicMock()
+        mock_transcript.status = aai.TranscriptStatus.completed
+        mock_transcript.text = "Hello world."
+        mock_transcript.id = "fake_id"
+        mock_transcript.audio_duration = 600
+        mock_instance = mock_transcriber_cls.return_value
+        mock_instance.transcribe.return_value = mock_transcript
+
+        audio_file = tmp_path / "test.mp3"
+        audio_file.write_text("fake")
+
+        service = TranscriptionService(tier="fast", language="en")
+        result = service.transcribe_audio(str(audio_file))
+
+        config = mock_instance.transcribe.call_args.kwargs["config"]
+        assert config.speech_model == aai.SpeechModel.nano
+        assert config.language_code == "en"
+        assert not config.language_detection
+        assert result["tier"] == "fast"
+        assert result["turnaround_s"] >= 0
+        # The run is remembered for the next automatic choice
+        assert service.policy.predict(service.policy.tiers["fast"], 600) < 60
+
+    @patch('src.transcription.transcriber.aai.Transcriber')
+    @patch.dict(os.environ, {"ASSEMBLYAI_API_KEY": "fake_key"})
+    def test_stream_falls_back_from_media_url_to_pipe(self, mock_transcriber_cls, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        refused = MagicMock(status=aai.TranscriptStatus.error, error="Download error, 403 Forbidden")
+        done = MagicMock(status=aai.TranscriptStatus.completed, text="Hello world.", id="fake_id", audio_duration=600)
+        mock_instance = mock_transcriber_cls.return_value
+        mock_instance.transcribe.side_effect = [refused, done]
+        piped = []
+        mock_instance.upload_file.side_effect = lambda body: piped.extend(body) or "https://cdn.assemblyai/upload/1"
+
+        stream = MagicMock(url="https://media.example/audio", filesize=8, duration=600, video_id="abc",
+                           bytes_read=8)
+        stream.name = "Sunday Service.webm"
+        stream.open.return_value.__enter__.return_value = iter([b"abcd", b"efgh"])
+
+        result = TranscriptionService(tier="fast").transcribe_stream(stream)
+
+        urls = [c.args[0] for c in mock_instance.transcribe.call_args_list]
+        assert urls == ["https://media.example/audio", "https://cdn.assemblyai/upload/1"]
+        assert b"".join(piped) == b"abcdefgh"
+        assert result["text"] == "Hello world."
+        assert result["raw_path"].endswith("Sunday Service_transcript.txt")
+        # Nothing was written besides the transcript outputs
+        assert sorted(os.listdir(tmp_path)) == ["output"]
+
+    @patch('src.transcription.transcriber.aai.Transcriber')
+    @patch.dict(os.environ, {"ASSEMBLYAI_API_KEY": "fake_key"})
+    def test_stream_url_mode_does_not_pipe(self, mock_transcriber_cls, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        mock_instance = mock_transcriber_cls.return_value
+        mock_instance.transcribe.return_value = MagicMock(status=aai.TranscriptStatus.error, error="403")
+        stream = MagicMock(url="https://media.example/audio", filesize=8, duration=600, video_id="abc")
+        stream.name = "s.webm"
+
+        with pytest.raises(Exception, match="Transcription failed: 403"):
+            TranscriptionService().transcribe_stream(stream, mode="url")
+        mock_instance.upload_file.assert_not_called()
+        stream.open.assert_not_called()
+
+    @patch('src.transcription.transcriber.aai.Transcriber')
+    @patch.dict(os.environ, {"ASSEMBLYAI_API_KEY": "fake_key"})
+    def test_word_timing_is_kept_in_a_sidecar(self, mock_transcriber_cls, tmp_path, monkeypatch):
+        from types import SimpleNamespace
+        from src.transcription.word_timings import WordTimings
+
+        monkeypatch.chdir(tmp_path)
+        words = [SimpleNamespace(text=t, start=i * 300, end=i * 300 + 250, confidence=0.9)
+                 for i, t in enumerate(["Hello", "world."])]
+        mock_transcript = MagicMock(status=aai.TranscriptStatus.completed, text="Hello world.", id="fake_id",
+                                    audio_duration=1, words=words)
+        mock_transcriber_cls.return_value.transcribe.return_value = mock_transcript
+        audio_file = tmp_path / "test.mp3"
+        audio_file.write_text("fake")
+
+        result = TranscriptionService().transcribe_audio(str(audio_file))
+
+        assert result["timings_path"].endswith("test_words.bin")
+        with open(result["json_path"]) as f:
+            assert json.load(f)["word_timings"] == "test_words.bin"
+        with WordTimings(result["timings_path"]) as timings:
+            assert timings.word(1, result["text"]) == {"start": 300, "end": 550, "confidence": 0.9, "offset": 6,
+                                                       "text": "world."}
+        # Cassettes keep the words, so a replay writes the same sidecar
+        replayed = TranscriptionService._decode_transcript(TranscriptionService._encode_transcript(mock_transcript))
+        assert [(w.text, w.start) for w in replayed.words] == [("Hello", 0), ("world.", 300)]
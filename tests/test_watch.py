@@ -0,0 +1,75 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+from src.design.watch import PreviewWatcher, infer_version, stale_references
+from src.generation.models import Guide
+
+
+def _content():
+    return {
+        "series_title": "Renewed",
+        "memory_verse_reference": "Romans 12:2",
+        "memory_verse": "Romans 12:2 (WEB):\nDon't be conformed to this world",
+        "days": [
+            {"day": i + 1, "title": f"Day {i + 1}", "scripture_reference": f"Psalm {i + 1}:1",
+             "scripture": f"Psalm {i + 1}:1 (WEB): \"Blessed is the man\"", "reflection": "R", "question": "Q", "prayer": "P"}
+            for i in range(6)
+        ],
+        "key_quotes": ["Renew your mind daily."],
+    }
+
+
+def test_stale_references_and_version():
+    guide = Guide.from_dict(_content())
+    assert infer_version(guide) == "web"
+    assert stale_references(guide) == []
+    guide.days[2].scripture.reference = "John 1:1"
+    guide.days[4].scripture.text = "Psalm 5:1 (Text not found)"
+    assert stale_references(guide) == ["John 1:1", "Psalm 5:1"]
+
+
+def test_render_fetches_only_changed_references(tmp_path):
+    path = tmp_path / "Renewed_content.json"
+    content = _content()
+    content["days"][0]["scripture_reference"] = "John 1:1"
+    path.write_text(json.dumps(content))
+    fetcher = MagicMock()
+    fetcher.get_scripture.return_value = "In the beginning was the Word"
+
+    watcher = PreviewWatcher(str(path), bible_fetcher=fetcher)
+    assert watcher.render() is not None
+
+    fetcher.get_scripture.assert_called_once_with("John 1:1", "web")
+    assert (tmp_path / "Renewed.pdf").stat().st_size > 0
+    # The editor's file is left alone
+    assert json.loads(path.read_text()) == content
+
+
+def test_watch_rerenders_on_change_and_survives_bad_saves(tmp_path):
+    path = tmp_path / "Renewed_content.json"
+    path.write_text(json.dumps(_content()))
+    watcher = PreviewWatcher(str(path), bible_fetcher=MagicMock())
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, kwargs={"interval": 0.02, "stop": stop})
+    thread.start()
+
+    def wait_for(renders):
+        deadline = time.monotonic() + 10
+        while watcher.renders < renders and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return watcher.renders
+
+    try:
+        assert wait_for(1) == 1
+        path.write_text('{"series_title": "Renew')  # half-saved file
+        time.sleep(0.2)
+        assert watcher.renders == 1
+        content = _content()
+        content["days"][0]["title"] = "Edited title"
+        path.write_text(json.dumps(content))
+        assert wait_for(2) == 2
+    finally:
+        stop.set()
+        thread.join()
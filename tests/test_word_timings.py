@@ -0,0 +1,63 @@
+import os
+
+import pytest
+from types import SimpleNamespace
+
+from src.generation.quote_index import verify_quotes
+from src.transcription.word_timings import WordTimings, link_quotes_to_audio, write_word_timings
+
+TEXT = "Good morning, church. We must renew our minds daily, said Paul."
+
+
+def _words(text=TEXT):
+    return [SimpleNamespace(text=w, start=i * 400, end=i * 400 + 350, confidence=0.5 + i / 40)
+            for i, w in enumerate(text.split())]
+
+
+def test_roundtrip_is_compact_and_exact(tmp_path):
+    path = str(tmp_path / "s_words.bin")
+    words = _words()
+    assert write_word_timings(path, words, TEXT) == len(words)
+    # 16-byte header, 16 bytes per word, and up to 2 bytes padding after each 16-bit column
+    assert os.path.getsize(path) == 16 + 16 * len(words) + 4
+
+    with WordTimings(path) as timings:
+        assert len(timings) == len(words)
+        assert list(timings.starts) == [w.start for w in words]
+        assert list(timings.ends) == [w.end for w in words]
+        assert [timings.word(i, TEXT)["text"] for i in range(len(words))] == TEXT.split()
+        # float16 keeps confidences to about three significant digits
+        assert timings.confidence(3) == pytest.approx(words[3].confidence, abs=1e-3)
+
+
+def test_text_ranges_map_to_audio(tmp_path):
+    path = str(tmp_path / "s_words.bin")
+    write_word_timings(path, _words(), TEXT)
+    start = TEXT.index("renew")
+    with WordTimings(path) as timings:
+        # "renew our minds" is words 5-7
+        assert timings.time_span(start, start + len("renew our minds")) == (5 * 400, 7 * 400 + 350)
+        # A range starting in the space after a word begins at the next word
+        assert timings.time_span(start - 1, start + 2) == (5 * 400, 5 * 400 + 350)
+        assert timings.time_span(10, 10) is None
+
+        results = verify_quotes({"key_quotes": ["We must renew our minds daily", "Invented words entirely"]}, TEXT)
+        assert link_quotes_to_audio(results, timings) == 1
+    assert (results[0]["audio_start_ms"], results[0]["audio_end_ms"]) == (3 * 400, 8 * 400 + 350)
+    assert "audio_start_ms" not in results[1]
+
+
+def test_unlocated_words_keep_offsets_sorted(tmp_path):
+    path = str(tmp_path / "s_words.bin")
+    words = [SimpleNamespace(text=t, start=i, end=i + 1, confidence=1.0) for i, t in enumerate(["Amen", "hallelujah", "church"])]
+    write_word_timings(path, words, "Amen church")
+    with WordTimings(path) as timings:
+        assert list(timings.offsets) == [0, 4, 5]
+        assert [timings.word(i, "Amen church")["text"] for i in range(3)] == ["Amen", "", "church"]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.bin"
+    path.write_bytes(b"PK\x03\x04" + b"\0" * 20)
+    with pytest.raises(ValueError, match="not a word timing file"):
+        WordTimings(str(path))
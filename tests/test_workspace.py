@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from src.utils.workspace import RunWorkspace, atomic_write, file_lock, read_latest
+
+
+def test_atomic_write_replaces_whole_file_or_nothing(tmp_path):
+    path = tmp_path / "guide.json"
+    with atomic_write(str(path)) as f:
+        f.write('{"v": 1}')
+    assert json.loads(path.read_text()) == {"v": 1}
+    assert path.stat().st_mode & 0o777 == 0o644
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as f:
+            f.write('{"v": 2, "trunc')
+            raise RuntimeError("renderer crashed")
+    # The old content survives and no temporary file is left behind
+    assert json.loads(path.read_text()) == {"v": 1}
+    assert os.listdir(tmp_path) == ["guide.json"]
+
+
+@pytest.mark.parametrize("remove", [False, True])
+def test_file_lock_serializes_read_modify_write(tmp_path, remove):
+    counter = tmp_path / "counter"
+    counter.write_text("0")
+
+    def bump():
+        for _ in range(5):
+            with file_lock(str(tmp_path / "counter.lock"), remove=remove):
+                value = int(counter.read_text())
+                time.sleep(0.001)
+                counter.write_text(str(value + 1))
+
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counter.read_text() == "20"
+    # A removed lock file is gone once the last holder releases it
+    assert (tmp_path / "counter.lock").exists() is (not remove)
+
+
+def test_parallel_runs_get_private_directories_and_one_index(tmp_path):
+    root = str(tmp_path)
+    workspaces = [RunWorkspace(root) for _ in range(6)]
+    assert len({w.directory for w in workspaces}) == 6
+
+    def publish(i, workspace):
+        pdf = workspace.path("Renewed.pdf")
+        with atomic_write(pdf, "wb") as f:
+            f.write(b"%PDF-" + bytes([i]))
+        workspace.publish("Renewed" if i % 2 else f"Series_{i}", {"kjv": {"pdf_path": pdf}})
+
+    threads = [threading.Thread(target=publish, args=(i, w)) for i, w in enumerate(workspaces)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    latest = read_latest(root)
+    # Every publish landed; the shared series points at one complete run
+    assert set(latest) == {"Renewed", "Series_0", "Series_2", "Series_4"}
+    newest = latest["Renewed"]
+    assert newest["run_id"] in {workspaces[i].run_id for i in (1, 3, 5)}
+    with open(newest["artifacts"]["kjv"]["pdf_path"], "rb") as f:
+        assert f.read().startswith(b"%PDF-")
+    with open(os.path.join(newest["directory"], "run.json"), encoding="utf-8") as f:
+        assert json.load(f)["key"] == "Renewed"
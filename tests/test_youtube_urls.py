@@ -0,0 +1,23 @@
+import pytest
+
+from src.utils.youtube_urls import classify_url, video_id
+
+
+@pytest.mark.parametrize("url, kind, vid", [
+    ("https://www.youtube.com/watch?v=abc123", "video", "abc123"),
+    ("https://youtu.be/abc123", "video", "abc123"),
+    ("youtube.com/live/abc123", "video", "abc123"),
+    ("https://m.youtube.com/shorts/abc123", "video", "abc123"),
+    ("https://www.youtube.com/watch?v=abc123&list=PL1", "video", "abc123"),
+    ("https://www.youtube.com/playlist?list=PL1", "playlist", None),
+    ("https://www.youtube.com/@GraceChurch", "channel", None),
+    ("https://www.youtube.com/@GraceChurch/streams", "channel", None),
+    ("https://www.youtube.com/channel/UC123/videos", "channel", None),
+    ("https://www.youtube.com/", None, None),
+    ("https://www.youtube.com/watch", None, None),
+    ("https://example.com/?u=youtube.com/watch?v=abc123", None, None),
+    ("https://facebook.com/video", None, None),
+])
+def test_classify_and_video_id(url, kind, vid):
+    assert classify_url(url) == kind
+    assert video_id(url) == vid